@@ -0,0 +1,213 @@
+"""
+Headless entry point: load a workbook, apply scenarios, solve, compute emissions and write results,
+without the Streamlit UI. Streamlit is never imported; matplotlib only with --plots.
+
+    python batchRun.py data.xlsx --scenario fAvg target=Containerboard incr=5 --scenario contam recovery=ssr --out results
+    python batchRun.py data.xlsx --spec scenarios.json --out results
+
+A spec file is a json list of scenarios, e.g. [{"scenario": "demand", "prod": "Tissue-Home", "perc": -5}].
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import metrics
+from metrics import stage
+from impData import impData
+from createModel import baseModel, failedMessage
+from scenarios import setfAvg, setmpYield, setDemand, setContam, fiberDeg
+from resultsStore import resultsStore
+from exportResults import FORMATS, modelTables, modelMeta, writeBundle, writeWorkbook
+
+FPROD = ['Containerboard', 'Paperboard', 'Tissue-Away', 'Tissue-Home', 'P&W', 'Newsprint']
+
+# scenario name -> function taking (model, **settings)
+SCENARIOS = {'fAvg': setfAvg, 'mpYield': setmpYield, 'demand': setDemand, 'contam': setContam, 'fiberDeg': fiberDeg}
+
+# plots.py function -> argument it draws from
+PLOTS = {'fUseChange': 'model', 'fUseByProd': 'model', 'fSources': 'model', 'mxpShift': 'model',
+         'dirEnergyCons': 'emissions', 'ghg_notForEoL': 'emissions', 'ghg_wForEoL': 'emissions',
+         'emBreakdown': 'emissions', 'emNet': 'emissions'}
+
+
+def loadModel(file, fProd=FPROD, cacheDir=None, name='batch'):
+    """
+    read a workbook and copy its base model
+
+    :param file: path to data spreadsheet
+    :param fProd: list of products in system
+    :param cacheDir: directory for cached workbook tables; None to always read Excel
+    :param name: model name str
+    :return: createModel object
+    """
+    data = impData(file, list(fProd), cacheDir=cacheDir)
+    return baseModel(data, fProd).copy(name)
+
+
+def applyScenarios(model, spec):
+    """
+    apply scenario settings in order
+
+    :param model: createModel object
+    :param spec: list of dicts, each with a 'scenario' key from SCENARIOS and the function's keyword arguments
+    """
+    for s in spec:
+        s = dict(s)
+        name = s.pop('scenario')
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario '{name}'; choose from {', '.join(SCENARIOS)}")
+        SCENARIOS[name](model, **s)
+
+
+def solve(model, solveCache=None):
+    """
+    optimize and, if a solution was found, extract results & emissions
+
+    :param model: createModel object
+    :param solveCache: directory of cached solves; None to always run the solver
+    :return: True if solved
+    """
+    model.runModel(solveCache)
+    if model.solved:
+        model.getResults()
+    return model.solved
+
+
+def writeResults(model, outDir, unit='st', plots=False, fmt='csv', xlsx=False):
+    """
+    write result & emissions tables, and optionally an xlsx of them and the UI figures as png
+
+    :param model: solved createModel object
+    :param outDir: output directory
+    :param unit: unit for result tables, a key of modelResults.UNITS
+    :param plots: also save figures (imports matplotlib)
+    :param fmt: bundle format, one of exportResults.FORMATS; 'zip' writes results.zip in outDir
+    :param xlsx: also write results.xlsx
+    :return: list of written paths
+    """
+    os.makedirs(outDir, exist_ok=True)
+    tables = modelTables(model, unit)
+    with stage('writeBundle', tables=len(tables), format=fmt):
+        paths = writeBundle(tables, os.path.join(outDir, 'results.zip') if fmt == 'zip' else outDir, fmt,
+                            modelMeta(model, unit))
+    if xlsx:
+        with stage('writeWorkbook', tables=len(tables)):
+            paths.append(os.path.join(outDir, 'results.xlsx'))
+            writeWorkbook(tables, paths[-1])
+
+    if plots:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import plots as pl
+        for name, arg in PLOTS.items():
+            with stage('plot', figure=name):
+                fig, ax = plt.subplots()
+                getattr(pl, name)(model if arg == 'model' else model.emissions, ax)
+                paths.append(os.path.join(outDir, f'{name}.png'))
+                fig.savefig(paths[-1], bbox_inches='tight')
+                plt.close(fig)
+    return paths
+
+
+def parseSetting(text):
+    """
+    'key=value' -> (key, value), with numbers converted
+    """
+    key, _, value = text.partition('=')
+    try:
+        value = float(value)
+    except ValueError:
+        pass
+    return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve the fiber distribution model without the Streamlit UI.')
+    parser.add_argument('workbook', help='data spreadsheet')
+    parser.add_argument('--products', nargs='+', default=FPROD, help='products in system')
+    parser.add_argument('--scenario', nargs='+', action='append', default=[], metavar=('NAME', 'KEY=VALUE'),
+                        help=f"scenario to apply, one of {', '.join(SCENARIOS)}, with its settings; repeatable")
+    parser.add_argument('--spec', help='json file with a list of scenarios, applied before --scenario')
+    parser.add_argument('--out', default='results', help='output directory')
+    parser.add_argument('--unit', default='st', choices=['MMst', 'st', 'Mg'], help='unit of result tables')
+    parser.add_argument('--cache-dir', help='directory for cached workbook tables')
+    parser.add_argument('--solve-cache', help='directory for cached solves; repeated models skip the solver')
+    parser.add_argument('--format', default='csv', choices=FORMATS,
+                        help='csv files, one zip of csv files, or parquet files (needs pyarrow)')
+    parser.add_argument('--xlsx', action='store_true', help='also write all tables to a new results.xlsx')
+    parser.add_argument('--plots', action='store_true', help='also save figures (needs matplotlib)')
+    parser.add_argument('--sensitivity', action='store_true',
+                        help='also write duals, reduced costs & ranging (always runs the solver)')
+    parser.add_argument('--diagnose', choices=['iis', 'relax'],
+                        help='if infeasible, write the conflicting constraints found this way to conflicts.csv')
+    parser.add_argument('--diagnose-time', type=float, default=10, help='time limit for --diagnose in seconds')
+    parser.add_argument('--metrics', help='append per-stage timing & memory records to this json lines file')
+    parser.add_argument('--metrics-summary', action='store_true', help='print a table of time spent by stage')
+    parser.add_argument('--store', help='also append the run to this results store (see resultsStore)')
+    parser.add_argument('--label', help='label for the run in --store')
+    parser.add_argument('--quiet', action='store_true', help='silence Gurobi output')
+    args = parser.parse_args(argv)
+
+    spec = []
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    spec += [dict([('scenario', s[0])] + [parseSetting(x) for x in s[1:]]) for s in args.scenario]
+    for s in spec:
+        if s.get('scenario') not in SCENARIOS:
+            parser.error(f"unknown scenario '{s.get('scenario')}'; choose from {', '.join(SCENARIOS)}")
+
+    if args.format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        parser.error("--format parquet needs pyarrow; install it or use zip or csv")
+
+    if args.metrics or args.metrics_summary:
+        metrics.enable(args.metrics)
+    try:
+        return _run(args, spec)
+    finally:
+        if metrics.enabled():
+            if args.metrics_summary:
+                print(metrics.summary().to_string(float_format='{:.3f}'.format))
+            metrics.disable()
+
+
+def _run(args, spec):
+    """
+    load, apply scenarios, solve & write results
+
+    :param args: parsed arguments of main
+    :param spec: list of scenarios for applyScenarios
+    :return: exit code
+    """
+    model = loadModel(args.workbook, args.products, args.cache_dir)
+    if args.quiet:
+        model.m.Params.OutputFlag = 0
+    applyScenarios(model, spec)
+    solved = solve(model, None if args.sensitivity else args.solve_cache)
+    if args.store:
+        with resultsStore(args.store) as store:
+            store.addModel(model, spec, label=args.label, unit=args.unit)
+    if not solved:
+        print(failedMessage(model.status), file=sys.stderr)
+        if args.diagnose:
+            report = model.diagnose(args.diagnose, args.diagnose_time)
+            os.makedirs(args.out, exist_ok=True)
+            report['conflicts'].to_csv(os.path.join(args.out, 'conflicts.csv'))
+            print(f"{report['status']}{'' if report['complete'] else ' (search cut short)'}; rows in conflict by "
+                  f"family: {report['families']}; details in {os.path.join(args.out, 'conflicts.csv')}",
+                  file=sys.stderr)
+        return 1
+
+    paths = writeResults(model, args.out, args.unit, args.plots, args.format, args.xlsx)
+    if args.sensitivity:
+        for name, df in [('sensitivity', model.sensitivity()), ('reducedCosts', model.reducedCosts())]:
+            paths.append(os.path.join(args.out, f'{name}.csv'))
+            df.to_csv(paths[-1])
+    print(f'Objective {model.objVal:,.2f}; wrote {len(paths)} files to {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,74 @@
 import gurobipy as gp
 from gurobipy import GRB
-import sys
+import copy
 import pandas as pd
 import numpy as np
-import streamlit as st
+import scipy.sparse as sp
 import emissionsCalcV4 as em
+from dataCache import workbookKey, modelKey, loadSolution, saveSolution, MAX_BYTES
+from modelResults import modelResults, baselineResults
+from metrics import stage, timed
+
+
+def keyName(name, key):
+    """
+    name a variable or constraint the way Model.addVars/addConstrs do
+    :param name: family name
+    :param key: str or tuple key
+    :return: name as str, e.g. "rpMaxUse[RecPulp_P&W,P&W,0.3]" for key (pulp, product, rec level)
+    """
+    return f"{name}[{','.join(map(str, key)) if isinstance(key, tuple) else key}]"
+
+
+def position(handle):
+    """
+    :param handle: Var or Constr of an updated model
+    :return: its position in the model; a handle removed from the model (index -2) raises ValueError
+    """
+    if handle.index < 0:
+        raise ValueError(f'{handle} is no longer in the model; drop its handle when removing it')
+    return handle.index
+
+
+# constraint & variable families the scenarios act on, reported by createModel.sensitivity / reducedCosts
+SENSITIVITY = ['constantDemand', 'non-constantDemand', 'recFix', 'recMax', 'prodTargetRec', 'rPulpCap', 'collMax',
+               'expUpper', 'rFiberAvail']
+VAR_SENSITIVITY = ['prodDemand', 'rpulpProd', 'rExp', 'sCollectNew']
+# solver statuses kept in the solve cache; limits & interrupts depend on the run, not the model
+FINAL = (GRB.OPTIMAL, GRB.INFEASIBLE, GRB.INF_OR_UNBD, GRB.UNBOUNDED)
+# what a solve that ended without an optimum is reported as, by solver status
+FAILED = {GRB.INFEASIBLE: 'The model is infeasible. Try changing the scenario settings.',
+          GRB.INF_OR_UNBD: 'The model is infeasible or unbounded. Try changing the scenario settings.',
+          GRB.UNBOUNDED: 'The model is unbounded. Check that the scenario settings keep every flow limited.',
+          GRB.INTERRUPTED: 'The solve was cancelled.'}
+
+
+def failedMessage(status):
+    """
+    :param status: Gurobi status of a solve that is not optimal
+    :return: message for the user
+    """
+    return FAILED.get(status, f'The solve stopped without a solution (Gurobi status {status}).')
+
+
+def baseModel(data, fProd):
+    """
+    base-case model for a dataset and product selection, built once and kept on the data object;
+    scenarios work on copies from createModel.copy, so the base model itself is never modified or solved
+    :param data: object from impData class with variables read in from spreadsheet
+    :param fProd: products in system
+    :return: createModel object
+    """
+    if getattr(data, '_baseModels', None) is None:
+        data._baseModels = {}
+    key = tuple(fProd)
+    if key not in data._baseModels:
+        data._baseModels[key] = createModel('base', data, list(fProd))
+    return data._baseModels[key]
 
 class createModel:
 
+    @timed('buildModel')
     def __init__(self, name, data, fProd):
         """
         create Gurobi model as decision variables, objective, and base constraints
@@ -16,6 +77,7 @@ class createModel:
         :param fProd: products in system
         """
         self.fileName = data.fileName
+        self.dataKey = data.cacheKey  # workbook hash, computed on first cached solve if the data was not cached
 
         # bring in all the relevant data
         self.fProd = fProd
@@ -69,317 +131,617 @@ class createModel:
         self.pbpVolOld = data.pbpVolOld
         self.consCollOld = data.consCollOld
         self.exportOld = data.exportOld
+        self.baselineResults = baselineResults(data)  # read-only baseline tables, shared by the results of every solve
+        self.emFactors = data.emFactors()
 
         # flag if results exist
         self.solved = False
         self.failed = False
+        self.base = None  # model this one was copied from
+        self.warm = None  # basis & solution of the last optimal solve, see saveStart
+        self.hasBasis = False  # Gurobi still holds the basis of an earlier solve of self.m
+        self.status = None  # Gurobi status, objective, simplex iterations & solution vector of the last solve;
+        self.objVal = np.nan  # set from the solve cache when the solver was skipped
+        self.iterations = 0
+        self.solution = None  # None while the solution is only held by Gurobi (self.m.X)
 
         # create model
         self.m = gp.Model(f"FiberDistrModel_{name}")
 
-        # define decision variables
-        arc_rp2p = [(p, r, t) for p in self.rPulp for t in self.fProd for r in self.rLevel[t]]
-        arc_vp2p = [(q, r, t) for q in self.vPulp for t in self.fProd for r in self.rLevel[t]]
-        arc_dem = [(r, t) for t in self.fProd for r in self.rLevel[t]]
-
-        self.rfiber2pulp = self.m.addVars(self.rFiber, self.rPulp, lb=0, name='rFiber2Pulp')
-        self.vfiber2pulp = self.m.addVars(self.vFiber, self.vPulp, lb=0, name='vFiber2Pulp')
-
-        self.rpulpProd = self.m.addVars(self.rPulp, lb=0, name='rpulpProd')
-        self.vpulpProd = self.m.addVars(self.vPulp, lb=0, name='vpulpProd')
-
-        self.rpulp2prod = self.m.addVars(arc_rp2p, lb=0, name='rPulp2Prod')
-        self.vpulp2prod = self.m.addVars(arc_vp2p, lb=0, name='vPulp2Prod')
-
-        self.rExpNew = self.m.addVars(self.rFiber, lb=0, name='rExp')
-        self.rResidue = self.m.addVars(self.rFiber, lb=0, name='rResidue')
-
-        self.prodDemand = self.m.addVars(arc_dem, lb=0, name='prodDemand')
-        self.prodFiberW = self.m.addVars(arc_dem, lb=0, name='prodFiberWeight')
-        self.prodNonFW = self.m.addVars(arc_dem, lb=0, name='prodNonFiberWeight')
+        # index sets; every family below is laid out in the order its keys are listed here
+        self.arcs = [(r, t) for t in self.fProd for r in self.rLevel[t]]  # (rec level, product)
+        nRF, nVF, nRP, nVP = len(self.rFiber), len(self.vFiber), len(self.rPulp), len(self.vPulp)
+        nT, nS, nA = len(self.fProd), len(self.wsource), len(self.arcs)
+        arcT = np.array([self.fProd.index(t) for r, t in self.arcs])
+        arcR = np.array([r for r, t in self.arcs])
+        arcKeys = [(t, r) for r, t in self.arcs]  # constraint keys per arc
+        tLast = np.array([t in self.fProd[-2:] for t in self.fProd])  # products with fixed recycled content
+
+        # define decision variables, one MVar per family; self.cols holds each family's column positions
+        self.nVars = 0
+        self.cols = {}
+        self.varKeys = {}  # family name -> keys in column order
+        self.constrs = {}  # registry of constraint handles: family name -> tupledict of key -> Constr
+        self.rfiber2pulp = self.addMVars('rFiber2Pulp', [(i, p) for i in self.rFiber for p in self.rPulp], (nRF, nRP))
+        self.vfiber2pulp = self.addMVars('vFiber2Pulp', [(j, q) for j in self.vFiber for q in self.vPulp], (nVF, nVP))
+
+        self.rpulpProd = self.addMVars('rpulpProd', list(self.rPulp))
+        self.vpulpProd = self.addMVars('vpulpProd', list(self.vPulp))
+
+        self.rpulp2prod = self.addMVars('rPulp2Prod', [(p, r, t) for p in self.rPulp for r, t in self.arcs], (nRP, nA))
+        self.vpulp2prod = self.addMVars('vPulp2Prod', [(q, r, t) for q in self.vPulp for r, t in self.arcs], (nVP, nA))
+
+        self.rExpNew = self.addMVars('rExp', list(self.rFiber))
+        self.rResidue = self.addMVars('rResidue', list(self.rFiber))
+
+        self.prodDemand = self.addMVars('prodDemand', self.arcs)
+        self.prodFiberW = self.addMVars('prodFiberWeight', self.arcs)
+        self.prodNonFW = self.addMVars('prodNonFiberWeight', self.arcs)
+
+        self.sCollectNew = self.addMVars('sCollectNew', [(t, s) for t in self.fProd for s in self.wsource], (nT, nS))
+        self.sCollectDelta = self.addMVars('sCollectDelta', [(t, s) for t in self.fProd for s in self.wsource], (nT, nS))
+        self.m.update()
 
-        self.sCollectNew = self.m.addVars(self.fProd, self.wsource, lb=0, name='sCollectNew')
-        self.sCollectDelta = self.m.addVars(self.fProd, self.wsource, lb=0, name='sCollectDelta')
+        RF2P, VF2P = self.cols['rFiber2Pulp'], self.cols['vFiber2Pulp']
+        RPP, VPP = self.cols['rpulpProd'], self.cols['vpulpProd']
+        RP2P, VP2P = self.cols['rPulp2Prod'], self.cols['vPulp2Prod']
+        REXP, RRES = self.cols['rExp'], self.cols['rResidue']
+        DEM, FW, NFW = self.cols['prodDemand'], self.cols['prodFiberWeight'], self.cols['prodNonFiberWeight']
+        SCN, SCD = self.cols['sCollectNew'], self.cols['sCollectDelta']
+
+        # coefficient tables as arrays, in the same order as the families above
+        rY = self.rF2PYield.loc[self.rFiber, self.rPulp].values  # fiber x pulp
+        vY = self.vF2PYield.loc[self.vFiber, self.vPulp].values
+        rPY = np.array([self.rPYield[p] for p in self.rPulp])
+        vPY = np.array([self.vPYield[q] for q in self.vPulp])
+        consumed = np.array([[self.prodConsumed[t, s] for s in self.wsource] for t in self.fProd])  # product x source
+        collCost = np.array([[self.sCollectCost[t, s] for s in self.wsource] for t in self.fProd])
+        collOld = np.array([[self.sCollectOld[t, s] for s in self.wsource] for t in self.fProd])
+        collMax = np.array([[self.sCollectMax[t, s] for s in self.wsource] for t in self.fProd])
+        wYld = np.array([[[self.wPaperYld[i, t, s] for s in self.wsource] for t in self.fProd] for i in self.rFiber])
+        expOld = np.array([self.rExpOld[i] for i in self.rFiber])
+        nfPct = np.array([self.nonFiberPct[t].sum() for t in self.fProd])
+        dink = np.array(['Deinked' in p for p in self.rPulp])
+        market = np.array(['Market' in q for q in self.vPulp])
 
         # set objective function
-        self.m.setObjective( # TODO: does the weighting still make sense?
-            0.01 * gp.quicksum(
-                self.rFCost[i] * gp.quicksum(self.rfiber2pulp[i, p] * 1000 for p in self.rPulp if 'Deinked' not in p)
-                for i in self.rFiber)
-            + 0.01 * gp.quicksum(
-                self.vFCost[j] * gp.quicksum(self.vfiber2pulp[j, q] * 1000 for q in self.vPulp if 'Market' not in q)
-                for j in self.vFiber)
-            + 0.01 * gp.quicksum(
-                self.rPCost[p] * gp.quicksum(
-                    gp.quicksum(self.rpulp2prod[p, r, t] * 1000 for r in self.rLevel[t]) for t in self.fProd) for p in
-                self.rPulp)
-            + 0.01 * gp.quicksum(
-                self.vPCost[q] * gp.quicksum(
-                    gp.quicksum(self.vpulp2prod[q, r, t] * 1000 for r in self.rLevel[t]) for t in self.fProd) for q in
-                self.vPulp)
-            + 0.01 * gp.quicksum(
-                self.sCollectCost[t, s] * self.sCollectDelta[t, s] * self.prodConsumed[t, s] for t in self.fProd for s in
-                self.wsource)
-            + 0.01 * gp.quicksum(
-                (self.rExCost[i] - self.rFCost[i]) * (self.rExpOld[i] - self.rExpNew[i]) * 1000 for i in self.rFiber),
-            GRB.MINIMIZE)
+        # TODO: does the weighting still make sense?
+        c = np.zeros(self.nVars)
+        c[RF2P] = 0.01 * (np.array([self.rFCost[i] for i in self.rFiber])[:, None] * 1000) * ~dink
+        c[VF2P] = 0.01 * (np.array([self.vFCost[j] for j in self.vFiber])[:, None] * 1000) * ~market
+        c[RP2P] = 0.01 * (np.array([self.rPCost[p] for p in self.rPulp])[:, None] * 1000)
+        c[VP2P] = 0.01 * (np.array([self.vPCost[q] for q in self.vPulp])[:, None] * 1000)
+        c[SCD] = 0.01 * (collCost * consumed)
+        exMargin = np.array([self.rExCost[i] - self.rFCost[i] for i in self.rFiber])
+        c[REXP] = 0.01 * (-exMargin * 1000)
+        self.m.setMObjective(None, c, 0.01 * sum((exMargin * expOld * 1000).tolist()), sense=GRB.MINIMIZE)
 
         # set base constraints
         # Mass balance
-        self.m.addConstrs(
-            (self.rF2PYield[p].dot(self.rfiber2pulp.select('*', p)) == self.rpulpProd[p] for p in self.rPulp), "rPulpinFlow")
-        self.m.addConstrs(
-            (self.vF2PYield[q].dot(self.vfiber2pulp.select('*', q)) == self.vpulpProd[q] for q in self.vPulp),
-            "vPulpinFlow")
-
-        self.m.addConstrs(
-            (
-            gp.quicksum(gp.quicksum(self.rpulp2prod[p, r, t] for r in self.rLevel[t]) for t in self.fProd) == self.rpulpProd[
-                p]
-            for p in self.rPulp), "rPulpoutFlow")
-        self.m.addConstrs(
-            (
-            gp.quicksum(gp.quicksum(self.vpulp2prod[q, r, t] for r in self.rLevel[t]) for t in self.fProd) == self.vpulpProd[
-                q]
-            for q in self.vPulp), "vPulpoutFlow")
-
-        # Market pulp consumption capacity (minimum)
-        self.m.addConstrs(
-            (gp.quicksum(self.rpulp2prod[p, r, t] for r in self.rLevel[t]) >= self.minPulp.loc[p, t]
-             for p in self.rPulp for t in self.fProd if 'Deinked' in p), "dinkMin")
-        self.m.addConstrs(
-            (gp.quicksum(self.vpulp2prod[q, r, t] for r in self.rLevel[t]) >= self.minPulp.loc[q, t]
-             for q in self.vPulp for t in self.fProd if 'Market' in q), "mpMin")
+        self.addMConstrs('rPulpinFlow', list(self.rPulp), [(np.arange(nRP)[None, :], RF2P, rY), (np.arange(nRP), RPP, -1)],
+                         GRB.EQUAL, 0)
+        self.addMConstrs('vPulpinFlow', list(self.vPulp), [(np.arange(nVP)[None, :], VF2P, vY), (np.arange(nVP), VPP, -1)],
+                         GRB.EQUAL, 0)
+
+        self.addMConstrs('rPulpoutFlow', list(self.rPulp), [(np.arange(nRP)[:, None], RP2P, 1), (np.arange(nRP), RPP, -1)],
+                         GRB.EQUAL, 0)
+        self.addMConstrs('vPulpoutFlow', list(self.vPulp), [(np.arange(nVP)[:, None], VP2P, 1), (np.arange(nVP), VPP, -1)],
+                         GRB.EQUAL, 0)
+
+        # Market pulp consumption capacity (minimum); one row per (pulp, product), summed over rec levels
+        for name, pulps, cols, pick in [('dinkMin', self.rPulp, RP2P, dink), ('mpMin', self.vPulp, VP2P, market)]:
+            sel = [p for p, k in zip(pulps, pick) if k]
+            self.addMConstrs(name, [(p, t) for p in sel for t in self.fProd],
+                             [(np.arange(len(sel))[:, None] * nT + arcT[None, :], cols[pick], 1)],
+                             GRB.GREATER_EQUAL, self.minPulp.loc[sel, self.fProd].values)
 
         # Pulp production capacity (maximum)
-        self.m.addConstrs((self.rpulpProd[p] <= self.rPCap[p] for p in self.rPulp if 'Deinked' in p), "rPulpCap")
-        self.m.addConstrs((self.vpulpProd[q] <= self.vPCap[q] for q in self.vPulp if 'Market' not in q),
-                                 "vPulpCap")
+        self.addMConstrs('rPulpCap', [p for p, k in zip(self.rPulp, dink) if k], [(np.arange(dink.sum()), RPP[dink], 1)],
+                         GRB.LESS_EQUAL, [self.rPCap[p] for p, k in zip(self.rPulp, dink) if k])
+        self.addMConstrs('vPulpCap', [q for q, k in zip(self.vPulp, market) if not k], [(np.arange((~market).sum()), VPP[~market], 1)],
+                         GRB.LESS_EQUAL, [self.vPCap[q] for q, k in zip(self.vPulp, market) if not k])
 
         # Pulp production recycled content capacity (maximum)
-        self.m.addConstrs(
-            (self.rpulp2prod[p, r, t] <= self.maxrPulp[t].loc[r, p] for p in self.rPulp for t in self.fProd for r in
-             self.rLevel[t]), "rpMaxUse")
-        self.m.addConstrs(
-            (self.vpulp2prod[q, r, t] <= self.maxvPulp[t].loc[r, q] for q in self.vPulp for t in self.fProd for r in
-             self.rLevel[t]), "vpMaxUse")
-
-        # Recipe
-        self.m.addConstrs(
-            (self.rF2PYield.loc[i, p] * self.rfiber2pulp[i, p] >= self.recipeMin.loc[i, p] * self.rpulpProd[p] for p in
-             self.rPulp for i in
-             self.rFiber),
-            "rRecipeMin")
-        self.m.addConstrs(
-            (self.rF2PYield.loc[i, p] * self.rfiber2pulp[i, p] <= self.recipeMax.loc[i, p] * self.rpulpProd[p] for p in
-             self.rPulp for i in
-             self.rFiber),
-            "rRecipeMax")
-        self.m.addConstrs(
-            (self.rF2PYield.loc[i, p] * self.rfiber2pulp[i, p] - self.rRecipeYield.loc[i, p] * self.rpulpProd[p] == 0
-             for p in self.rPulp for i in self.rFiber
-             if 'Deinked' in p or 'P&W' in p or 'News' in p), 'rRecipe')
-        self.m.addConstrs(
-            (self.vF2PYield.loc[j, q] * self.vfiber2pulp[j, q] == self.vRecipeYield.loc[j, q] * self.vpulpProd[q]
-             for q in self.vPulp for j in
-             self.vFiber),
-            "vRecipe")
+        for name, pulps, cols, maxPulp in [('rpMaxUse', self.rPulp, RP2P, self.maxrPulp), ('vpMaxUse', self.vPulp, VP2P, self.maxvPulp)]:
+            cap = np.hstack([maxPulp[t].loc[self.rLevel[t], pulps].values.T for t in self.fProd])  # pulp x arc
+            self.addMConstrs(name, [(p, t, r) for p in pulps for r, t in self.arcs], [(np.arange(cols.size), cols.ravel(), 1)],
+                             GRB.LESS_EQUAL, cap.ravel())
+
+        # Recipe; one row per (pulp, fiber)
+        recipe = np.arange(nRP * nRF).reshape(nRP, nRF).T  # fiber x pulp -> row
+        recipeKeys = [(p, i) for p in self.rPulp for i in self.rFiber]
+        pulpCol = np.broadcast_to(RPP, (nRF, nRP))
+        for name, share, sense in [('rRecipeMin', self.recipeMin, GRB.GREATER_EQUAL), ('rRecipeMax', self.recipeMax, GRB.LESS_EQUAL)]:
+            self.addMConstrs(name, recipeKeys,
+                             [(recipe, RF2P, rY), (recipe, pulpCol, -share.loc[self.rFiber, self.rPulp].values)], sense, 0)
+        fixed = np.array(['Deinked' in p or 'P&W' in p or 'News' in p for p in self.rPulp])
+        fixedRow = np.arange(fixed.sum() * nRF).reshape(-1, nRF).T
+        self.addMConstrs('rRecipe', [(p, i) for p, k in zip(self.rPulp, fixed) if k for i in self.rFiber],
+                         [(fixedRow, RF2P[:, fixed], rY[:, fixed]),
+                          (fixedRow, pulpCol[:, fixed], -self.rRecipeYield.loc[self.rFiber, self.rPulp].values[:, fixed])],
+                         GRB.EQUAL, 0)
+        vRecipe = np.arange(nVP * nVF).reshape(nVP, nVF).T
+        self.addMConstrs('vRecipe', [(q, j) for q in self.vPulp for j in self.vFiber],
+                         [(vRecipe, VF2P, vY), (vRecipe, np.broadcast_to(VPP, (nVF, nVP)),
+                                                -self.vRecipeYield.loc[self.vFiber, self.vPulp].values)],
+                         GRB.EQUAL, 0)
 
         # Wastepaper recovery
-        self.m.addConstrs((self.sCollectNew[t, s] <= self.sCollectMax[t, s] for t in self.fProd for s in self.wsource),
-                               "collMax")
-        self.m.addConstrs((self.sCollectNew[t, s] >= self.sCollectOld[t, s] for t in self.fProd for s in self.wsource),
-                               "collMin")
-        self.m.addConstrs(
-            (self.sCollectNew[t, s] - self.sCollectDelta[t, s] == self.sCollectOld[t, s] for t in self.fProd for s in
-             self.wsource), "collDel")
+        coll = [(t, s) for t in self.fProd for s in self.wsource]
+        self.addMConstrs('collMax', coll, [(np.arange(nT * nS), SCN.ravel(), 1)], GRB.LESS_EQUAL, collMax.ravel())
+        self.addMConstrs('collMin', coll, [(np.arange(nT * nS), SCN.ravel(), 1)], GRB.GREATER_EQUAL, collOld.ravel())
+        self.addMConstrs('collDel', coll, [(np.arange(nT * nS), SCN.ravel(), 1), (np.arange(nT * nS), SCD.ravel(), -1)],
+                         GRB.EQUAL, collOld.ravel())
 
         # Export
-        self.m.addConstrs((self.rExpNew[i] <= self.rExpOld[i] for i in self.rFiber), "expUpper")
+        self.addMConstrs('expUpper', list(self.rFiber), [(np.arange(nRF), REXP, 1)], GRB.LESS_EQUAL, expOld)
 
         # Recovery balance
-        self.m.addConstrs((self.rfiber2pulp.sum(i, '*') + self.rExpNew[i] + self.rResidue[i] -
-                                 gp.quicksum(gp.quicksum(
-                                     self.wPaperYld[i, t, s] * self.sCollectNew[t, s] * self.prodConsumed[t, s] for s in
-                                     self.wsource)
-                                             for t in self.fProd) == 0 for i in self.rFiber), "rFiberAvail")
-
-        self.m.addConstrs(
-            (self.prodDemand.sum('*', t) == self.productUse.loc[t, 'Domestic Consumption'] for t in self.fProd),
-            "constantDemand")
-        self.m.addConstrs(
-            (self.prodDemand[r, t] >= self.minDemand[t].loc[r] for t in self.fProd for r in self.rLevel[t]), "minDemand")
-
-        self.m.addConstrs(
-            (self.prodNonFW[r, t] == self.nonFiberPct[t].sum() * self.prodDemand[r, t] for t in self.fProd for r in
-             self.rLevel[t]), "nfMass")
-        self.m.addConstrs(
-            (self.prodFiberW[r, t] == (1 - self.nfYld * self.nonFiberPct[t].sum()) * self.prodDemand[r, t]
-             for t in self.fProd for r in self.rLevel[t]), "fPlusNF")
-
-        self.m.addConstrs((gp.quicksum(self.rPYield[p] * self.rpulp2prod[p, r, t] for p in self.rPulp)
-                                 + gp.quicksum(self.vPYield[q] * self.vpulp2prod[q, r, t] for q in self.vPulp) ==
-                                 self.prodFiberW[r, t]
-                                 for t in self.fProd for r in self.rLevel[t]), "bothBalance")
-        self.m.addConstrs((gp.quicksum(self.rPYield[p] * self.rpulp2prod[p, r, t] for p in self.rPulp) - r *
-                                 self.prodFiberW[r, t] == 0
-                                 for t in self.fProd for r in self.rLevel[t]), "recBalance")
-        self.m.addConstrs(
-            (gp.quicksum(self.vPYield[q] * self.vpulp2prod[q, r, t] for q in self.vPulp) - (1 - r) * self.prodFiberW[
-                r, t] == 0
-             for t in self.fProd for r in self.rLevel[t]), "virBalance")
+        self.addMConstrs('rFiberAvail', list(self.rFiber),
+                         [(np.arange(nRF)[:, None], RF2P, 1), (np.arange(nRF), REXP, 1), (np.arange(nRF), RRES, 1),
+                          (np.arange(nRF)[:, None, None], SCN[None, :, :], -(wYld * consumed))], GRB.EQUAL, 0)
+
+        self.addMConstrs('constantDemand', list(self.fProd), [(arcT, DEM, 1)], GRB.EQUAL,
+                         self.productUse.loc[self.fProd, 'Domestic Consumption'].values)
+        self.addMConstrs('minDemand', arcKeys, [(np.arange(nA), DEM, 1)], GRB.GREATER_EQUAL,
+                         np.hstack([self.minDemand[t].loc[self.rLevel[t]].values for t in self.fProd]))
+
+        self.addMConstrs('nfMass', arcKeys, [(np.arange(nA), NFW, 1), (np.arange(nA), DEM, -nfPct[arcT])], GRB.EQUAL, 0)
+        self.addMConstrs('fPlusNF', arcKeys, [(np.arange(nA), FW, 1), (np.arange(nA), DEM, -(1 - self.nfYld * nfPct[arcT]))],
+                         GRB.EQUAL, 0)
+
+        self.addMConstrs('bothBalance', arcKeys, [(np.arange(nA)[None, :], RP2P, rPY[:, None]),
+                                                    (np.arange(nA)[None, :], VP2P, vPY[:, None]), (np.arange(nA), FW, -1)],
+                         GRB.EQUAL, 0)
+        self.addMConstrs('recBalance', arcKeys, [(np.arange(nA)[None, :], RP2P, rPY[:, None]), (np.arange(nA), FW, -arcR)],
+                         GRB.EQUAL, 0)
+        self.addMConstrs('virBalance', arcKeys, [(np.arange(nA)[None, :], VP2P, vPY[:, None]), (np.arange(nA), FW, -(1 - arcR))],
+                         GRB.EQUAL, 0)
         # baseline -- no scenario
         self.rAvg = {t: self.oldDemand[t].dot(self.rLevel[t]) / self.oldDemand[t].sum() for t in self.fProd}
+        recTarget = np.array([self.rAvg[t] * self.oldDemand[t].sum() for t in self.fProd])
 
-        self.m.addConstrs(
-            (self.prodDemand[r, t] <= self.maxDemand[t].loc[r] for t in self.fProd for r in self.rLevel[t]
-             if t not in self.fProd[-2:]), "maxDemand")
-        self.m.addConstrs(
-            (gp.quicksum(r * self.prodDemand[r, t] for r in self.rLevel[t]) == self.rAvg[t] * self.oldDemand[t].sum()
-             for t in self.fProd if t in self.fProd[-2:]), "recFix")
-        self.m.addConstrs(
-            (gp.quicksum(r * self.prodDemand[r, t] for r in self.rLevel[t]) <= self.rAvg[t] * self.oldDemand[t].sum()
-             for t in self.fProd if t not in self.fProd[-2:]), "recMax")
+        free = ~tLast[arcT]
+        self.addMConstrs('maxDemand', [a for a, k in zip(arcKeys, free) if k], [(np.arange(free.sum()), DEM[free], 1)],
+                         GRB.LESS_EQUAL, np.hstack([self.maxDemand[t].loc[self.rLevel[t]].values for t in self.fProd])[free])
+        for name, pick, sense in [('recFix', tLast, GRB.EQUAL), ('recMax', ~tLast, GRB.LESS_EQUAL)]:
+            prodRow = np.cumsum(pick) - 1  # row of each picked product
+            self.addMConstrs(name, [t for t, k in zip(self.fProd, pick) if k],
+                             [(prodRow[arcT][pick[arcT]], DEM[pick[arcT]], arcR[pick[arcT]])], sense, recTarget[pick])
 
         self.m.update()
 
-    def runModel(self):
+    def addMVars(self, name, keys, shape=None):
         """
-        update and run Gurobi optimization
+        add a variable family as one MVar, keyed like Model.addVars
+        :param name: variable family name
+        :param keys: list of keys in column order, str or tuple
+        :param shape: shape of the family's column positions, saved in self.cols[name]
+        :return: tupledict of key -> Var
+        """
+        x = self.m.addMVar(len(keys), lb=0, name=[keyName(name, k) for k in keys])
+        self.cols[name] = np.arange(self.nVars, self.nVars + len(keys)).reshape(shape or len(keys))
+        self.varKeys[name] = list(keys)
+        self.nVars += len(keys)
+        return gp.tupledict(zip(keys, x.tolist()))
+
+    def addMConstrs(self, name, keys, terms, sense, rhs):
+        """
+        add a constraint family in one call from a sparse coefficient matrix over all model variables
+        :param name: constraint family name
+        :param keys: list of constraint keys in row order, named like Model.addConstrs
+        :param terms: list of (row, column, coefficient) arrays; each triple is broadcast to a common shape
+        :param sense: constraint sense
+        :param rhs: right-hand side as scalar or array in row order
+        :return: MConstr, or None for an empty family
+        """
+        if not keys:
+            return None
+        rows, cols, vals = zip(*[[a.ravel() for a in np.broadcast_arrays(*t)] for t in terms])
+        A = sp.csr_matrix((np.concatenate(vals).astype(float), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(len(keys), self.nVars))
+        b = np.broadcast_to(np.asarray(rhs, dtype=float).ravel(), len(keys))
+        c = self.m.addMConstr(A, None, sense, b, name=[keyName(name, k) for k in keys])
+        self.constrs[name] = gp.tupledict(zip(keys, c.tolist()))
+        return c
+
+    def addConstr(self, name, key, lhs, sense, rhs):
+        """
+        add a single row and file it in the constraint registry
+        :param name: constraint family name
+        :param key: constraint key
+        :param lhs: left-hand side as LinExpr
+        :param sense: constraint sense
+        :param rhs: right-hand side
+        :return: Constr
+        """
+        c = self.m.addLConstr(lhs, sense, rhs, keyName(name, key))
+        self.constrs.setdefault(name, gp.tupledict())[key] = c
+        return c
+
+    def moveConstr(self, name, key, newName, newKey=None):
+        """
+        refile an existing row under another family (and key), renaming it to match
+        :param name: current constraint family name
+        :param key: current constraint key
+        :param newName: new constraint family name
+        :param newKey: new constraint key; None keeps the current key
+        :return: Constr
+        """
+        newKey = key if newKey is None else newKey
+        c = self.constrs[name].pop(key)
+        c.ConstrName = keyName(newName, newKey)
+        self.constrs.setdefault(newName, gp.tupledict())[newKey] = c
+        return c
+
+    def getConstrs(self, names):
         """
+        look up rows by exact family name
+        :param names: family name str or list of names
+        :return: list of Constr in family & key order
+        """
+        if isinstance(names, str):
+            names = [names]
+        return [c for f in names for c in self.constrs.get(f, {}).values()]
+
+    def removeConstrs(self, name, keys=None):
+        """
+        remove rows from the model and the constraint registry
+        :param name: constraint family name
+        :param keys: list of constraint keys; None removes the whole family
+        """
+        fam = self.constrs.get(name, gp.tupledict())
+        keys = list(fam) if keys is None else keys
+        self.m.remove([fam.pop(k) for k in keys])
+
+    @timed('copyModel')
+    def copy(self, name=None, env=None):
+        """
+        copy the model for a new scenario; variable and constraint handles are remapped onto the copy
+        :param name: model name str, formatted as "FiberDistrModel_[name]"; None keeps this model's name
+        :param env: gp.Env to put the copy in, e.g. one per solver thread; None uses this model's environment
+        :return: createModel object sharing this model's data
+        """
+        self.m.update()  # pending rows & columns get their positions, which the handles below are remapped by
+        new = copy.copy(self)
+        new.m = self.m.copy(env)
+        if name is not None:
+            new.m.ModelName = f"FiberDistrModel_{name}"
+        new.base = self.base or self
+        new.solved = False
+        new.failed = False
+        new.hasBasis = False
+        new.status, new.objVal, new.iterations, new.solution = None, np.nan, 0, None
+
+        # handles are matched by position, which Model.copy preserves
+        x = new.m.getVars()
+        for attr, val in vars(self).items():
+            if isinstance(val, gp.tupledict) and val and isinstance(next(iter(val.values())), gp.Var):
+                setattr(new, attr, gp.tupledict((k, x[position(v)]) for k, v in val.items()))
+        c = new.m.getConstrs()
+        new.constrs = {f: gp.tupledict((k, c[position(v)]) for k, v in cs.items()) for f, cs in self.constrs.items()}
+        return new
+
+    def takeSolve(self, other):
+        """
+        take over the outcome of a solve of a copy of this model, e.g. one solved in another Gurobi environment:
+        status, objective, solution vector, warm start, and results & emissions if it has them
+        :param other: createModel object copied from this one, after runModel
+        """
+        self.status, self.objVal, self.iterations = other.status, other.objVal, other.iterations
+        self.solved, self.failed, self.warm = other.solved, other.failed, other.warm
+        self.solution = other.solution
+        if self.solution is None and other.solved:
+            self.solution = np.array(other.m.getAttr('X', other.m.getVars()))
+        self.hasBasis = False  # the basis stays with the copy; the next solve starts from warm
+        for attr in ['results', 'emissions']:
+            if attr in vars(other):
+                setattr(self, attr, getattr(other, attr))
+
+    def saveStart(self):
+        """
+        keep the basis and primal/dual solution of an optimal solve; rows are stored by family & key so the start
+        can be loaded back after scenario edits or onto a copy
+        """
+        x = self.m.getVars()
+        rows = {}
+        for f, fam in self.constrs.items():
+            cs = list(fam.values())
+            rows[f] = dict(zip(fam.keys(), zip(self.m.getAttr('CBasis', cs), self.m.getAttr('Pi', cs))))
+        self.warm = (np.array(self.m.getAttr('VBasis', x)), np.array(self.m.getAttr('X', x)), rows)
+
+    def loadStart(self):
+        """
+        feed the saved basis & solution back to Gurobi; rows added since then start with a basic slack and zero dual.
+        If rows were removed or refiled the basis may no longer have one basic per row; new rows are then made
+        nonbasic, and if that is not enough only the primal & dual start vectors are passed on
+        """
+        if self.warm is None:
+            return
+        vBasis, xStart, rows = self.warm
+        x = self.m.getVars()
+        cs, cBasis, dStart, new = [], [], [], []
+        for f, fam in self.constrs.items():
+            saved = rows.get(f, {})
+            for k, c in fam.items():
+                if k not in saved:
+                    new.append(len(cs))
+                b, pi = saved.get(k, (GRB.BASIC, 0.0))
+                cs.append(c)
+                cBasis.append(b)
+                dStart.append(pi)
+
+        excess = (vBasis == GRB.BASIC).sum() + cBasis.count(GRB.BASIC) - len(cs)
+        for n in new[:max(excess, 0)]:
+            cBasis[n] = GRB.NONBASIC_LOWER
+        if excess == len(new[:max(excess, 0)]):
+            self.m.setAttr('VBasis', x, vBasis.tolist())
+            self.m.setAttr('CBasis', cs, cBasis)
+        self.m.setAttr('PStart', x, xStart.tolist())
+        self.m.setAttr('DStart', cs, dStart)
+
+    def cacheKey(self):
+        """
+        fingerprint of the model as it stands, for the solve cache
+        :return: key from dataCache.modelKey
+        """
+        if self.dataKey is None:
+            self.dataKey = workbookKey(self.fileName, self.fProd)
         self.m.update()
-        self.m.optimize()
+        return modelKey(self.m, self.dataKey)
+
+    def loadSolve(self, cacheDir):
+        """
+        take the solve from the cache if this exact model was solved before
+        :param cacheDir: directory of solves keyed by model fingerprint & workbook
+        :return: True on a cache hit
+        """
+        cached = loadSolution(cacheDir, self.cacheKey())
+        if cached is None:
+            return False
+        self.status, self.objVal, self.solution = cached
+        self.iterations = 0
+        self.solved = self.status == GRB.OPTIMAL
+        self.failed = not self.solved
+        return True
+
+    def saveSolve(self, cacheDir, maxBytes=MAX_BYTES):
+        """
+        store status, objective & solution vector of the last solve under the model's fingerprint
+        :param cacheDir: directory of solves keyed by model fingerprint & workbook
+        :param maxBytes: size cap for cacheDir, least recently used solves are evicted first
+        """
+        x = self.solution
+        if x is None and self.status == GRB.OPTIMAL:
+            x = self.m.getAttr('X', self.m.getVars())
+        saveSolution(cacheDir, self.cacheKey(), self.status, None if x is None else self.objVal, x, maxBytes)
 
-        if self.m.status == GRB.OPTIMAL:
+    def runModel(self, cacheDir=None, maxBytes=MAX_BYTES, callback=None):
+        """
+        update and run Gurobi optimization
+        :param cacheDir: directory of solves keyed by model fingerprint & workbook; None to always run the solver
+        :param maxBytes: size cap for cacheDir, least recently used solves are evicted first
+        :param callback: Gurobi callback function(model, where), e.g. for progress or to terminate the solve
+        """
+        with stage('update') as rec:
+            self.m.update()
+            rec.update(rows=self.m.NumConstrs, cols=self.m.NumVars)
+        if cacheDir is not None and self.loadSolve(cacheDir):
+            return
+
+        if not self.hasBasis:  # edits in place keep Gurobi's own basis; copies start from the saved one
+            self.loadStart()
+        with stage('optimize', model=self.m.ModelName) as rec:
+            self.m.optimize(callback)
+            rec.update(status=self.m.status, iterations=self.m.IterCount, runtime=self.m.Runtime, work=self.m.Work)
+        self.hasBasis = True
+        self.status, self.iterations, self.solution = self.m.status, self.m.IterCount, None
+        self.objVal = self.m.ObjVal if self.status == GRB.OPTIMAL else np.nan
+        if cacheDir is not None and self.status in FINAL:
+            self.saveSolve(cacheDir, maxBytes)
+
+        if self.status == GRB.OPTIMAL:
             self.solved = True
             self.failed = False
-        elif self.m.status != GRB.OPTIMAL:
+            self.saveStart()
+        elif self.status == GRB.INTERRUPTED:
+            self.solved = False
+            self.failed = False
+        elif self.status != GRB.OPTIMAL:
             self.solved = False
             self.failed = True
-            st.write('\nThe model is infeasible. Try changing the scenario settings.')
-            # st.write('The model is infeasible; relaxing the constraints')
-            # orignumvars = self.m.NumVars
-            # self.m.feasRelaxS(0, False, False, True)
-            # self.m.optimize()
-            # status = self.m.status
-            # if status in (GRB.INF_OR_UNBD, GRB.INFEASIBLE, GRB.UNBOUNDED):
-            #     st.write('The relaxed model cannot be solved \
-            #            because it is infeasible or unbounded')
-            #     sys.exit(1)
-            # if status != GRB.OPTIMAL:
-            #     st.write('Optimization was stopped with status %d' % status)
-            #     sys.exit(1)
-            # st.write('\nSlack values:')
-            # slacks = self.m.getVars()[orignumvars:]
-            # for sv in slacks:
-            #     if sv.X > 1e-6:
-            #         st.write('%s = %g' % (sv.VarName, sv.X))
-
-    def getResults(self):
-        """
-        save Gurobi model decision variables, convert from MM short ton to short ton, and calculate emissions data
+            # callers report failedMessage(status); diagnose() explains the infeasibility on a copy without touching this model
+
+    @timed('getResults')
+    def getResults(self, x=None):
+        """
+        save Gurobi model decision variables to self.results (reported in short tons) and calculate emissions data
+        :param x: solution vector in variable order, e.g. one scenario's ScenNX; None uses the last solve
         """
+        # one bulk read of the solution; each table is a reshape of its family's columns (see self.cols)
+        if x is None:
+            x = self.m.getAttr('X', self.m.getVars()) if self.solution is None else self.solution
+        x = np.array(x, dtype=float)
+        col = {f: x[c] for f, c in self.cols.items()}
+        onArc = np.array([[t == t2 for r, t2 in self.arcs] for t in self.fProd], dtype=float)  # product x arc
+        arcEnd = np.cumsum([len(self.rLevel[t]) for t in self.fProd])[:-1]
+
         fSetPulp = self.fProd + ['Market']
         fSetFiber = self.rFiber + self.vFiber
-        self.f2pVolNew = pd.DataFrame(0, index=fSetFiber, columns=fSetPulp)
-
         fAllPulp = self.rPulp + self.vPulp
-        self.pbpVolNew = pd.DataFrame(0, index=fAllPulp, columns=self.fProd)
-
-        self.exportNew = pd.DataFrame(0, index=self.rFiber, columns=['exportNew'])
-        self.rsdlNew = pd.Series(0, index=self.rFiber, name='residuals')
-        self.demandNew = {}
-        self.nfNew = {}
-        self.fiberWNew = {}
-        self.collDelta = pd.DataFrame(0, index=self.fProd, columns=self.wsource)
-        self.collNew = pd.DataFrame(0, index=self.fProd, columns=self.wsource)
-        self.addlRec = pd.Series(0, index=self.rFiber)
-
-        for i in fSetFiber:
-            if i in self.rFiber:
-                self.f2pVolNew.loc[i] = self.m.getAttr('x', self.rfiber2pulp.select(i, '*'))
-            else:
-                self.f2pVolNew.loc[i] = self.m.getAttr('x', self.vfiber2pulp.select(i, '*'))
-
-        for p in fAllPulp:
-            if p in self.rPulp:
-                self.pbpVolNew.loc[p] = [sum(self.m.getAttr('x', self.rpulp2prod.select(p, '*', t))) for t in self.fProd]
-            else:
-                self.pbpVolNew.loc[p] = [sum(self.m.getAttr('x', self.vpulp2prod.select(p, '*', t))) for t in self.fProd]
-
-        for i in self.rFiber:
-            self.exportNew.loc[i] = self.m.getAttr('x', self.rExpNew.select(i))
-
-        for i in self.rFiber:
-            self.rsdlNew[i] = np.unwrap(self.m.getAttr('x', self.rResidue.select(i)))
-
-        for t in self.fProd:
-            self.demandNew[t] = pd.Series(self.m.getAttr('x', self.prodDemand.select('*', t)), index=self.rLevel[t], name=t)
-            self.nfNew[t] = pd.Series(self.m.getAttr('x', self.prodNonFW.select('*', t)), index=self.rLevel[t], name=t)
-            self.fiberWNew[t] = pd.Series(self.m.getAttr('x', self.prodFiberW.select('*', t)), index=self.rLevel[t], name=t)
-
-        for t in self.fProd:
-            self.collDelta.loc[t] = self.m.getAttr('x', self.sCollectDelta.select(t, '*'))
-
-        for t in self.fProd:
-            self.collNew.loc[t] = self.m.getAttr('x', self.sCollectNew.select(t, '*'))
-
-        for i in self.rFiber:
-            self.addlRec.loc[i] = sum(
-                [self.wPaperYld[i, t, s] * self.prodConsumed[t, s] * np.unwrap(self.m.getAttr('x', self.sCollectDelta.select(t, s)))
-                 for t in self.fProd for s in self.wsource])
+        split = lambda f: {t: pd.Series(v, index=self.rLevel[t], name=t) for t, v in zip(self.fProd, np.split(col[f], arcEnd))}
+
+        wYld = np.array([[[self.wPaperYld[i, t, s] for s in self.wsource] for t in self.fProd] for i in self.rFiber])
+        consumed = np.array([[self.prodConsumed[t, s] for s in self.wsource] for t in self.fProd])
 
         ccIndex = self.consCollOld.index
-        self.consCollNew = pd.DataFrame(0, index=ccIndex, columns=self.fProd)
-        for t in self.fProd:
-            self.consCollNew.loc[ccIndex[0],t] = self.productUse.loc[t,ccIndex[0]]
-            self.consCollNew.loc[ccIndex[1], t] = self.productUse.loc[t, ccIndex[0]] * sum(
-                self.productUse.loc[t][:-1].multiply(self.collNew.loc[t].values))
-            self.consCollNew.loc[ccIndex[2], t] = self.productUse.loc[t, ccIndex[0]] * sum(self.productUse.loc[t][:-1].multiply(
-                self.collNew.loc[t].values * self.channelYield.loc[0]))
-
-        # convert to US tons (short tons) from MM short tons
-        self.f2pVolNew = self.f2pVolNew * 1000;
-        self.pbpVolNew = self.pbpVolNew * 1000;
-        self.f2pVolOld = self.f2pVolOld * 1000;
-        self.pbpVolOld = self.pbpVolOld * 1000
-        self.exportNew = self.exportNew * 1000;
-        self.exportOld = self.exportOld * 1000;
-        self.rsdlNew = self.rsdlNew * 1000;
-        self.addlRec = self.addlRec * 1000
-        self.consCollOld = self.consCollOld * 1000
-        self.consCollNew = self.consCollNew * 1000
-        for t in self.demandNew.keys():
-            self.demandNew[t] = self.demandNew[t] * 1000
-            self.nfNew[t] = self.nfNew[t] * 1000
-            self.fiberWNew[t] = self.fiberWNew[t] * 1000
-            self.oldDemand[t] = self.oldDemand[t] * 1000
+        use = self.productUse.loc[self.fProd]
+        cons = use[ccIndex[0]].values
+        share = use.iloc[:, :-1].values * col['sCollectNew']  # product x source
+
+        # results & baseline stay in MM short tons; reports convert on access (modelResults.UNITS)
+        self.results = modelResults({
+            'f2pVolNew': pd.DataFrame(np.vstack([col['rFiber2Pulp'], col['vFiber2Pulp']]), index=fSetFiber,
+                                      columns=fSetPulp),
+            'pbpVolNew': pd.DataFrame(np.vstack([col['rPulp2Prod'], col['vPulp2Prod']]) @ onArc.T, index=fAllPulp,
+                                      columns=self.fProd),
+            'exportNew': pd.DataFrame(col['rExp'], index=self.rFiber, columns=['exportNew']),
+            'rsdlNew': pd.Series(col['rResidue'], index=self.rFiber, name='residuals'),
+            'demandNew': split('prodDemand'),
+            'nfNew': split('prodNonFiberWeight'),
+            'fiberWNew': split('prodFiberWeight'),
+            'addlRec': pd.Series((wYld * consumed).reshape(len(self.rFiber), -1) @ col['sCollectDelta'].ravel(),
+                                 index=self.rFiber),
+            'consCollNew': pd.DataFrame(
+                [cons, cons * share.sum(1), cons * (share * self.channelYield.loc[0].values).sum(1)],
+                index=ccIndex, columns=self.fProd),
+        }, shares={
+            'collNew': pd.DataFrame(col['sCollectNew'], index=self.fProd, columns=self.wsource),
+            'collDelta': pd.DataFrame(col['sCollectDelta'], index=self.fProd, columns=self.wsource),
+        }, baseline=self.baselineResults)
 
         # energy & emissions calculations
+        res = self.results
         p2pYld = self.rPYield.copy(); p2pYld.update(self.vPYield)
         p2pYld = pd.DataFrame.from_dict(p2pYld, orient='index', columns=['pYield'])
-        em1 = em.en_emissions(self.fileName, self.fProd, self.rLevel, self.f2pYld, p2pYld, self.f2pVolNew, self.pbpVolNew, self.consCollNew, self.exportNew, self.demandNew)
-        self.emissions = em1.calculateEmissions()
+        with stage('emissionsLoad'):
+            em1 = em.en_emissions(self.emFactors, self.fProd, self.rLevel, self.f2pYld, p2pYld, res.f2pVolNew, res.pbpVolNew, res.consCollNew, res.exportNew, res.demandNew)
+        with stage('emissionsCompute'):
+            self.emissions = em1.calculateEmissions()
+
+    def liveSolve(self):
+        """
+        raise unless Gurobi holds an optimal basis for the model as it stands (not a cached or multi-scenario solve)
+        """
+        if not self.solved or self.solution is not None:
+            raise ValueError('sensitivity needs an optimal solve of this model by Gurobi; run runModel without a cache')
+
+    def sensitivity(self, families=SENSITIVITY):
+        """
+        duals & right-hand side ranging from the last solve; within [rhsLow, rhsUp] the objective changes by
+        dual per unit of rhs with the same basis
+        :param families: constraint family names
+        :return: df indexed by (family, key) with sense, rhs, slack, dual, rhsLow & rhsUp
+        """
+        self.liveSolve()
+        rows = [((f, k), c) for f in families for k, c in self.constrs.get(f, {}).items()]
+        cs = [c for fk, c in rows]
+        cols = {'sense': 'Sense', 'rhs': 'RHS', 'slack': 'Slack', 'dual': 'Pi', 'rhsLow': 'SARHSLow', 'rhsUp': 'SARHSUp'}
+        index = pd.MultiIndex.from_arrays([[f for (f, k), c in rows], [k for (f, k), c in rows]], names=['family', 'key'])
+        return pd.DataFrame({col: self.m.getAttr(a, cs) if cs else [] for col, a in cols.items()}, index=index)
+
+    def reducedCosts(self, families=VAR_SENSITIVITY):
+        """
+        reduced costs & objective ranging from the last solve; within [objLow, objUp] the solution stays optimal
+        :param families: variable family names
+        :return: df indexed by (family, key) with value, reducedCost, obj, objLow & objUp
+        """
+        self.liveSolve()
+        x = self.m.getVars()
+        vs = [x[j] for f in families for j in self.cols[f].ravel()]
+        cols = {'value': 'X', 'reducedCost': 'RC', 'obj': 'Obj', 'objLow': 'SAObjLow', 'objUp': 'SAObjUp'}
+        index = pd.MultiIndex.from_arrays([[f for f in families for k in self.varKeys[f]],
+                                           [k for f in families for k in self.varKeys[f]]], names=['family', 'key'])
+        return pd.DataFrame({col: self.m.getAttr(a, vs) for col, a in cols.items()}, index=index)
+
+    def extrapolate(self, rhs):
+        """
+        objective after changing right-hand sides, from the duals of the last solve without re-solving
+        :param rhs: dict of (family, key) -> new rhs
+        :return: (objective, True if the changes together stay within the ranging (100% rule) and the estimate is exact)
+        """
+        sa = self.sensitivity(sorted({f for f, k in rhs}))
+        pos = {fk: n for n, fk in enumerate(sa.index)}
+        objVal, used = self.objVal, 0.0
+        for fk, new in rhs.items():
+            row = sa.iloc[pos[fk]]
+            delta = new - row['rhs']
+            objVal += row['dual'] * delta
+            room = row['rhsUp'] - row['rhs'] if delta > 0 else row['rhs'] - row['rhsLow']
+            used += abs(delta) / room if room > 0 else (np.inf if delta else 0)
+        return objVal, used <= 1
+
+    def rowLabels(self):
+        """
+        :return: dict of row position -> (family, key) for every row in the constraint registry
+        """
+        return {c.index: (f, k) for f, fam in self.constrs.items() for k, c in fam.items()}
+
+    def colLabels(self):
+        """
+        :return: dict of column position -> (family, key) for every variable
+        """
+        return {j: (f, k) for f, keys in self.varKeys.items() for j, k in zip(self.cols[f].ravel(), keys)}
+
+    def diagnose(self, method='iis', timeLimit=10, workLimit=None):
+        """
+        explain an infeasible model on a copy, leaving this model untouched
+        :param method: 'iis' for an irreducible inconsistent subsystem, 'relax' for the smallest total constraint
+        violation that makes the model feasible (feasRelaxS)
+        :param timeLimit: seconds allowed for the IIS or relaxed solve
+        :param workLimit: Gurobi work units allowed; None for no limit
+        :return: dict with status, method, complete (False if a limit cut the search short), families (rows in
+        conflict per family), and conflicts: df indexed by (family, key) with name, sense, rhs and, for 'relax',
+        violation (amount added to the row's left-hand side); variable bounds in an IIS are listed with sense 'LB'/'UB'
+        """
+        self.m.update()
+        d = self.m.copy()
+        d.Params.OutputFlag = 0
+        d.Params.TimeLimit = timeLimit
+        if workLimit is not None:
+            d.Params.WorkLimit = workLimit
+        rows, cols = self.rowLabels(), self.colLabels()
+        cs, x = d.getConstrs(), d.getVars()
+
+        conflicts = []
+        if method == 'iis':
+            try:
+                d.computeIIS()
+            except gp.GurobiError as e:  # e.g. the model is feasible
+                return {'status': str(e), 'method': method, 'complete': False, 'families': {},
+                        'conflicts': pd.DataFrame(columns=['name', 'sense', 'rhs'])}
+            complete = bool(d.IISMinimal)
+            for j, inIIS in enumerate(d.getAttr('IISConstr', cs)):
+                if inIIS:
+                    conflicts.append((rows.get(j, ('', cs[j].ConstrName)), cs[j].ConstrName, cs[j].Sense, cs[j].RHS))
+            for bound, attr in [('LB', 'IISLB'), ('UB', 'IISUB')]:
+                for j, inIIS in enumerate(d.getAttr(attr, x)):
+                    if inIIS:
+                        conflicts.append((cols[j], x[j].VarName, bound, getattr(x[j], bound)))
+            status = 'infeasible'
+        elif method == 'relax':
+            nVars = d.NumVars
+            d.feasRelaxS(0, False, False, True)
+            d.optimize()
+            complete = d.status == GRB.OPTIMAL
+            status = 'relaxed' if d.SolCount else f'no relaxation found (status {d.status})'
+            byName = {c.ConstrName: j for j, c in enumerate(cs)}
+            viol = {}
+            for v in (d.getVars()[nVars:] if d.SolCount else []):
+                if v.X > 1e-6:  # artificial ArtP_/ArtN_ column of one row
+                    art, name = v.VarName.split('_', 1)
+                    viol[name] = viol.get(name, 0) + (v.X if art == 'ArtP' else -v.X)
+            for name, amount in viol.items():
+                j = byName[name]
+                conflicts.append((rows.get(j, ('', name)), name, cs[j].Sense, cs[j].RHS, amount))
+        else:
+            raise ValueError(f"unknown method '{method}'; use 'iis' or 'relax'")
+
+        columns = ['name', 'sense', 'rhs'] + (['violation'] if method == 'relax' else [])
+        index = pd.MultiIndex.from_arrays([[fk[0] for fk, *r in conflicts], [fk[1] for fk, *r in conflicts]],
+                                          names=['family', 'key'])
+        df = pd.DataFrame([r for fk, *r in conflicts], index=index, columns=columns)
+        return {'status': status, 'method': method, 'complete': complete,
+                'families': df.groupby(level='family').size().to_dict(), 'conflicts': df}
 
     def runSlack(self):
         """
-        Gurobi workforce solution 3 to relax constraints & solve model
-        :return: print relaxations to console
+        relax constraints on a copy of the model & print the violations needed to make it feasible
+        :return: report from diagnose
         """
         print('The model is infeasible; relaxing the constraints')
-        orignumvars = self.m.NumVars
-        self.m.feasRelaxS(0, False, False, True)
-        self.m.optimize()
-        status = self.m.status
-        if status in (GRB.INF_OR_UNBD, GRB.INFEASIBLE, GRB.UNBOUNDED):
-            print('The relaxed model cannot be solved \
-                   because it is infeasible or unbounded')
-            sys.exit(1)
-        if status != GRB.OPTIMAL:
-            print('Optimization was stopped with status %d' % status)
-            sys.exit(1)
-        print('\nSlack values:')
-        slacks = self.m.getVars()[orignumvars:]
-        for sv in slacks:
-            if sv.X > 1e-6:
-                print('%s = %g' % (sv.VarName, sv.X))
+        report = self.diagnose('relax')
+        print(f"{report['status']}\n")
+        for (f, k), r in report['conflicts'].iterrows():
+            print('%s = %g' % (r['name'], r['violation']))
+        return report
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import gurobipy as gp
+
+FORMAT = 2  # bump when the cached layout or impData's parsing changes
+MAX_AGE = 30 * 24 * 3600  # seconds before an unused entry is considered stale
+MAX_BYTES = 256 * 2 ** 20  # total size cap for the cache directory
+
+
+def workbookKey(file, fProd):
+    """
+    content hash of a workbook and product selection
+
+    :param file: path to spreadsheet or file-like object (e.g. Streamlit upload)
+    :param fProd: list of strings for products in system
+    :return: hex digest as str
+    """
+    h = hashlib.sha256()
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(2 ** 20), b''):
+                h.update(chunk)
+    else:
+        pos = file.tell()
+        file.seek(0)
+        h.update(file.read())
+        file.seek(pos)
+    h.update(json.dumps([FORMAT, list(fProd)]).encode())
+    return h.hexdigest()
+
+
+def loadTables(cacheDir, key):
+    """
+    read cached impData attributes
+
+    :param cacheDir: cache directory
+    :param key: key from workbookKey
+    :return: dict of attribute name -> value, or None on a miss
+    """
+    entry = os.path.join(cacheDir, key)
+    try:
+        with open(os.path.join(entry, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest['format'] != FORMAT:
+            raise ValueError('stale cache format')
+        with np.load(os.path.join(entry, 'data.npz'), allow_pickle=False) as z:
+            tables = {k: _unpack(v, z) for k, v in manifest['tables'].items()}
+    except (OSError, ValueError, KeyError):
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    os.utime(os.path.join(entry, 'manifest.json'))  # mark as recently used
+    return tables
+
+
+def saveTables(cacheDir, key, tables, maxBytes=MAX_BYTES, maxAge=MAX_AGE):
+    """
+    write impData attributes to the cache as an npz of numeric arrays plus a json manifest, then evict
+
+    :param cacheDir: cache directory
+    :param key: key from workbookKey
+    :param tables: dict of attribute name -> value
+    :param maxBytes: total size cap for the cache directory
+    :param maxAge: seconds before an unused entry is evicted
+    """
+    arrays = {}
+    manifest = {'format': FORMAT, 'created': time.time(),
+                'tables': {k: _pack(v, k, arrays) for k, v in tables.items()}}
+
+    # write to a scratch directory and rename so readers never see a partial entry
+    os.makedirs(cacheDir, exist_ok=True)
+    tmp = os.path.join(cacheDir, f'.{key}.{os.getpid()}')
+    os.makedirs(tmp, exist_ok=True)
+    np.savez(os.path.join(tmp, 'data.npz'), **arrays)
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+    try:
+        os.replace(tmp, os.path.join(cacheDir, key))
+    except OSError:  # another process cached the same workbook first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evict(cacheDir, maxBytes, maxAge)
+
+
+def modelKey(m, dataKey):
+    """
+    fingerprint of an updated Gurobi model: constraint matrix, senses, rhs, bounds & objective, plus the workbook
+
+    :param m: Gurobi model
+    :param dataKey: key from workbookKey for the data the model was built from
+    :return: hex digest as str
+    """
+    h = hashlib.sha256()
+    x, cs = m.getVars(), m.getConstrs()
+    A = m.getA().tocsr()
+    A.sort_indices()
+    for a in [A.indptr, A.indices, A.data, m.getAttr('RHS', cs), m.getAttr('LB', x), m.getAttr('UB', x),
+              m.getAttr('Obj', x)]:
+        h.update(np.ascontiguousarray(a, dtype=float if isinstance(a, list) else None).tobytes())
+    h.update(json.dumps([FORMAT, dataKey, A.shape, ''.join(m.getAttr('Sense', cs)), m.ObjCon, m.ModelSense]).encode())
+    return h.hexdigest()
+
+
+def loadSolution(cacheDir, key):
+    """
+    read a cached solve
+
+    :param cacheDir: cache directory
+    :param key: key from modelKey
+    :return: (status, objective, solution vector or None), or None on a miss
+    """
+    entry = os.path.join(cacheDir, key)
+    try:
+        with open(os.path.join(entry, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest['format'] != FORMAT:
+            raise ValueError('stale cache format')
+        x = np.load(os.path.join(entry, 'x.npy'), allow_pickle=False) if manifest['hasX'] else None
+        os.utime(os.path.join(entry, 'manifest.json'))  # mark as recently used
+    except (OSError, ValueError, KeyError):  # missing, or evicted by another process while reading
+        return None
+    return manifest['status'], manifest['objVal'], x
+
+
+def saveSolution(cacheDir, key, status, objVal, x=None, maxBytes=MAX_BYTES, maxAge=MAX_AGE):
+    """
+    write a solve to the cache, then evict
+
+    :param cacheDir: cache directory
+    :param key: key from modelKey
+    :param status: Gurobi status code
+    :param objVal: objective value, None if not solved
+    :param x: solution vector in variable order, None if not solved
+    :param maxBytes: total size cap for the cache directory
+    :param maxAge: seconds before an unused entry is evicted
+    """
+    os.makedirs(cacheDir, exist_ok=True)
+    tmp = os.path.join(cacheDir, f'.{key}.{os.getpid()}')
+    os.makedirs(tmp, exist_ok=True)
+    if x is not None:
+        np.save(os.path.join(tmp, 'x.npy'), np.asarray(x, dtype=float))
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump({'format': FORMAT, 'created': time.time(), 'status': status, 'objVal': objVal,
+                   'hasX': x is not None}, f)
+    try:
+        os.replace(tmp, os.path.join(cacheDir, key))
+    except OSError:  # another process cached the same model first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    evict(cacheDir, maxBytes, maxAge)
+
+
+def evict(cacheDir, maxBytes=MAX_BYTES, maxAge=MAX_AGE):
+    """
+    drop stale entries, then least recently used ones until the cache fits in maxBytes
+
+    :param cacheDir: cache directory
+    :param maxBytes: total size cap for the cache directory
+    :param maxAge: seconds before an unused entry is evicted
+    """
+    entries = []
+    for name in os.listdir(cacheDir):
+        entry = os.path.join(cacheDir, name)
+        if name.startswith('.') or not os.path.isdir(entry):
+            continue
+        try:
+            used = os.path.getmtime(os.path.join(entry, 'manifest.json'))
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+        except OSError:
+            used, size = 0, 0
+        entries.append((used, size, entry))
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for used, size, entry in sorted(entries):
+        if now - used > maxAge or total > maxBytes:
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def _label(x):
+    """
+    json-safe form of an index label or scalar
+    """
+    if isinstance(x, tuple):
+        return {'tuple': [_label(i) for i in x]}
+    if isinstance(x, np.generic):
+        return x.item()
+    return x
+
+
+def _unlabel(x):
+    if isinstance(x, dict):
+        return tuple(_unlabel(i) for i in x['tuple'])
+    return x
+
+
+def _packIndex(idx):
+    if isinstance(idx, pd.RangeIndex):
+        return {'range': [idx.start, idx.stop, idx.step], 'name': _label(idx.name)}
+    return {'values': [_label(i) for i in idx], 'dtype': str(idx.dtype), 'name': _label(idx.name)}
+
+
+def _unpackIndex(d):
+    if 'range' in d:
+        return pd.RangeIndex(*d['range'], name=_unlabel(d['name']))
+    return pd.Index([_unlabel(i) for i in d['values']], dtype=d['dtype'], name=_unlabel(d['name']))
+
+
+def _packArray(values, path, arrays):
+    if values.dtype.kind in 'biufc':
+        arrays[path] = values
+        return {'npz': path}
+    return {'list': [_label(v) for v in values]}  # labels & text stay in the manifest
+
+
+def _unpackArray(d, z):
+    if 'npz' in d:
+        return z[d['npz']]
+    values = np.empty(len(d['list']), dtype=object)
+    values[:] = [np.nan if v is None else _unlabel(v) for v in d['list']]
+    return values
+
+
+def _packItems(values, path, arrays):
+    # all-numeric containers (yield dicts, rLevel lists) go to the npz as one array
+    if values and all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in values):
+        arrays[path] = np.array(values)
+        return {'values': {'npz': path}, 'py': not isinstance(values[0], np.generic)}
+    return {'items': [_pack(v, f'{path}/{i}', arrays) for i, v in enumerate(values)]}
+
+
+def _unpackItems(d, z):
+    if 'values' in d:
+        values = z[d['values']['npz']]
+        return values.tolist() if d['py'] else list(values)
+    return [_unpack(v, z) for v in d['items']]
+
+
+def _pack(obj, path, arrays):
+    if isinstance(obj, pd.DataFrame):
+        return {'kind': 'frame', 'index': _packIndex(obj.index), 'columns': _packIndex(obj.columns),
+                'data': [_packArray(obj.iloc[:, j].values, f'{path}/{j}', arrays) for j in range(obj.shape[1])]}
+    if isinstance(obj, pd.Series):
+        return {'kind': 'series', 'name': _label(obj.name), 'index': _packIndex(obj.index),
+                'data': _packArray(obj.values, path, arrays)}
+    if isinstance(obj, dict):
+        kind = 'tupledict' if isinstance(obj, gp.tupledict) else 'dict'
+        return {'kind': kind, 'keys': [_label(k) for k in obj.keys()], **_packItems(list(obj.values()), path, arrays)}
+    if isinstance(obj, (list, tuple)):
+        kind = 'tuplelist' if isinstance(obj, gp.tuplelist) else 'list'
+        return {'kind': kind, **_packItems(list(obj), path, arrays)}
+    return {'kind': 'value', 'value': _label(obj)}
+
+
+def _unpack(d, z):
+    kind = d['kind']
+    if kind == 'frame':
+        df = pd.DataFrame({j: _unpackArray(a, z) for j, a in enumerate(d['data'])}, index=_unpackIndex(d['index']))
+        df.columns = _unpackIndex(d['columns'])
+        return df
+    if kind == 'series':
+        return pd.Series(_unpackArray(d['data'], z), index=_unpackIndex(d['index']), name=_unlabel(d['name']))
+    if kind in ('dict', 'tupledict'):
+        keys = [_unlabel(k) for k in d['keys']]
+        values = _unpackItems(d, z)
+        return gp.tupledict(zip(keys, values)) if kind == 'tupledict' else dict(zip(keys, values))
+    if kind in ('list', 'tuplelist'):
+        items = _unpackItems(d, z)
+        return gp.tuplelist(items) if kind == 'tuplelist' else items
+    return _unlabel(d['value'])
@@ -68,11 +68,95 @@ Outputs:
 """
 import pandas as pd
 import numpy as np
+from sheetGrid import readSheets, cutTable
 
-class en_emissions(): # energy & emissions
-    
-    def __init__(cls,xls,fProd,rLevel,f2pYld,pulpYld,f2pVolNew,pbpVolNew,consCollNew,exportNew,demandNew):
+def transUnitImpact(transPct,transKM,transUMI):
+    # transPct [df] - % traversed for transMode by transCode; indexed by transCode
+    # transKM [df] - distance traversed for transMode by transCode; indexed by transCode
+    # transUMI [df] - unit impact by mode (truck, train, boat); indexed by "transUMI"
+    #
+    # (return) [s] - impact per Mg moved under each transCode, summed over transport modes; a blank % or distance
+    # makes the code's impact NaN, as the per-item sums of the transport loop did
+    modes = transUMI.columns
+    return (transPct[modes] * transKM[modes] * transUMI.iloc[0]).sum(axis=1, skipna=False)
+
+
+class em_factors(): # energy & emissions factors, loaded once per dataset
+
+    def __init__(cls,xls):
         # xls (str) - name of Excel spreadsheet to pull data from
+        uC = 0.907185 # unit conversion of MM US ton to Mg/metric ton
+
+        with pd.ExcelFile(xls) as x:
+            sheet = readSheets(x, ['OldData', 'nonFiber', 'EmTables'])
+
+        # Old data
+        cls.f2pVolOld = cutTable(sheet['OldData'], usecols="A:I", skiprows=1, nrows=21, index_col=0)
+        cls.f2pVolOld.iloc[:,:-1] = cls.f2pVolOld.iloc[:,:-1] * uC * 1000
+
+        cls.pbpVolOld = cutTable(sheet['OldData'], usecols="K:R", skiprows=1, nrows=14, index_col=0)
+        cls.pbpVolOld.columns = [x[:-2] for x in cls.pbpVolOld.columns] # has .1 after column names for pandas duplicate
+        cls.pbpVolOld.iloc[:,:-1] = cls.pbpVolOld.iloc[:,:-1] * uC * 1000
+
+        cls.prodLD = cutTable(sheet['OldData'], usecols="K:Q", skiprows=19, nrows=5, index_col=0) * uC * 1000
+        cls.prodDemand = cutTable(sheet['OldData'], usecols="A:G", skiprows=26, nrows=1, index_col=0) * uC * 1000
+
+        cls.consCollOld = cutTable(sheet['OldData'], usecols="K:Q", skiprows=29, nrows=3, index_col=0) * uC * 1000
+
+        cls.exportOld = cutTable(sheet['OldData'], usecols="E:G", skiprows=31, nrows=16, index_col=0)
+        cls.exportOld.iloc[:,:-1] = cls.exportOld.iloc[:,:-1] * uC * 1000
+        cls.fiberType = cutTable(sheet['OldData'], usecols="A:B", skiprows=31, nrows=20, index_col=0)
+
+        cls.rFiber = cls.f2pVolOld.index[:16]
+        cls.vFiber = cls.f2pVolOld.index[16:]
+        cls.rPulp = [p for p in cls.pbpVolOld.index if 'Rec' in p]
+        cls.vPulp = [q for q in cls.pbpVolOld.index if 'Vir' in q]
+        cls.fPulp = [f for f in cls.pbpVolOld.index]
+
+        # Emissions Info
+        cls.chemicals = cutTable(sheet['nonFiber'], usecols="A:B,E:L", skiprows=2, nrows=42, index_col=0)
+        cls.eolEmissions = cutTable(sheet['EmTables'], usecols="A:G", skiprows=2, nrows=3, index_col=0)
+
+        cls.bfEI = cutTable(sheet['EmTables'], usecols="J:P", skiprows=2, nrows=3, index_col=0)
+        cls.bfEI.columns = [x[:-2] for x in cls.bfEI.columns] # has .1 after column names for some reason
+        cls.bioPct = cutTable(sheet['EmTables'], usecols="J:P", skiprows=8, nrows=2, index_col=0)
+        cls.pwpEI = cutTable(sheet['EmTables'], usecols="O:P", skiprows=14, nrows=5, index_col=0)
+        cls.bfCO2 = cutTable(sheet['EmTables'], usecols="A:G", skiprows=9, nrows=2, index_col=0)
+
+        cls.fuelTable = cutTable(sheet['EmTables'], usecols="A:M", skiprows=15, nrows=13, index_col=0)
+        cls.fuelTable = cls.fuelTable.fillna(0)
+
+        cls.rsdlModes = cutTable(sheet['EmTables'], usecols="A:G", skiprows=32, nrows=6, index_col=0)
+        cls.rsdlbio = cutTable(sheet['EmTables'], usecols="A:H", skiprows=41, nrows=4, index_col=0)
+        cls.rsdlbio = cls.rsdlbio.fillna(0)
+        cls.rsdlfos = cutTable(sheet['EmTables'], usecols="A:H", skiprows=48, nrows=4, index_col=0)
+        cls.rsdlfos = cls.rsdlfos.fillna(0)
+
+        cls.transPct = cutTable(sheet['EmTables'], usecols="L:P", skiprows=32, nrows=11, index_col=0)
+        cls.transKM = cutTable(sheet['EmTables'], usecols="L:P", skiprows=46, nrows=11, index_col=0)
+        cls.transUMI = cutTable(sheet['EmTables'], usecols="L:P", skiprows=59, nrows=1, index_col=0)
+        cls.transUnitImp = transUnitImpact(cls.transPct, cls.transKM, cls.transUMI)
+
+        cls.woodint = cutTable(sheet['EmTables'], usecols="A:H", skiprows=58, nrows=1, index_col=0)
+        cls.wtotalGHGb0 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=62, nrows=6, index_col=0)
+        cls.wtotalGHGb1 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=71, nrows=6, index_col=0)
+        cls.wbioGHGb0 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=80, nrows=6, index_col=0)
+        cls.wbioGHGb1 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=89, nrows=6, index_col=0)
+        cls.wfosGHGb0 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=98, nrows=6, index_col=0)
+        cls.wfosGHGb1 = cutTable(sheet['EmTables'], usecols="A:K", skiprows=107, nrows=6, index_col=0)
+
+        cls.chinaVals = cutTable(sheet['EmTables'], usecols="L:M", skiprows=66, nrows=3, index_col=0)
+        cls.chinaCons = cutTable(sheet['EmTables'], usecols="L:M", skiprows=72, nrows=6, index_col=0)
+        cls.fYield = cutTable(sheet['EmTables'], usecols="L:N", skiprows=81, nrows=5, index_col=0)
+
+        # baseline results by product set, filled in by en_emissions.calculateBaseline
+        cls.baseline = {}
+
+
+class en_emissions(): # energy & emissions
+
+    def __init__(cls,factors,fProd,rLevel,f2pYld,pulpYld,f2pVolNew,pbpVolNew,consCollNew,exportNew,demandNew):
+        # factors (em_factors) - emissions factors & old data shared by every solution; a spreadsheet name is loaded
         # fProd (list) - list of products in current scenario
         # rLevel (df) - recycled content level by product
         # f2pYld (df) - fiber to pulp yield by pulp product; indexed by fiber
@@ -82,7 +166,9 @@ class en_emissions(): # energy & emissions
         # consCollNew (df) - domestic consumption, collection, and recovery by product
         # demandNew (df) - new demand by product; indexed by rec level
         uC = 0.907185 # unit conversion of MM US ton to Mg/metric ton
-        
+        if not isinstance(factors, em_factors):
+            factors = em_factors(factors)
+
         cls.fProd = fProd
         cls.fProdM = fProd + ['Market']
         cls.rLevel = rLevel
@@ -93,86 +179,93 @@ class en_emissions(): # energy & emissions
         cls.consCollNew = consCollNew * uC
         cls.exportNew = exportNew * uC
         cls.demandNew = {t: demandNew[t] * uC for t in demandNew.keys()}
-        
-        with pd.ExcelFile(xls) as x:
-            # Old data   
-            cls.f2pVolOld = pd.read_excel(x, 'OldData', usecols="A:I", skiprows=1, nrows=21, index_col=0)
-            cls.f2pVolOld.iloc[:,:-1] = cls.f2pVolOld.iloc[:,:-1] * uC * 1000
 
-            cls.f2pVolNew = cls.f2pVolNew.assign(TransCode=cls.f2pVolOld['TransCode'].values)
-            
-            cls.pbpVolOld = pd.read_excel(x, 'OldData', usecols="K:R", skiprows=1, nrows=14, index_col=0)
-            cls.pbpVolOld.columns = [x[:-2] for x in cls.pbpVolOld.columns] # has .1 after column names for pandas duplicate
-            cls.pbpVolOld.iloc[:,:-1] = cls.pbpVolOld.iloc[:,:-1] * uC * 1000
+        cls.useFactors(factors)
+        # TransCode by label, so the tables may list their rows in any order
+        cls.f2pVolNew = cls.f2pVolNew.assign(TransCode=cls.f2pVolOld['TransCode'])
+        cls.pbpVolNew = cls.pbpVolNew.assign(TransCode=cls.pbpVolOld['TransCode'])
+        cls.exportNew = cls.exportNew.assign(TransCode=cls.exportOld['TransCode'])
 
-            cls.pbpVolNew = cls.pbpVolNew.assign(TransCode=cls.pbpVolOld['TransCode'].values)
-            
-            cls.prodLD = pd.read_excel(x, 'OldData', usecols="K:Q", skiprows=19, nrows=5, index_col=0) * uC * 1000
-            cls.prodDemand = pd.read_excel(x, 'OldData', usecols="A:G", skiprows=26, nrows=1, index_col=0) * uC * 1000
-            
-            cls.consCollOld = pd.read_excel(x, 'OldData', usecols="K:Q", skiprows=29, nrows=3, index_col=0) * uC * 1000
-            
-            cls.exportOld = pd.read_excel(x, 'OldData', usecols="E:G", skiprows=31, nrows=16, index_col=0)
-            cls.exportOld.iloc[:,:-1] = cls.exportOld.iloc[:,:-1] * uC * 1000
-            cls.exportNew = cls.exportNew.assign(TransCode=cls.exportOld['TransCode'].values)
-            cls.fiberType = pd.read_excel(x, 'OldData', usecols="A:B", skiprows=31, nrows=20, index_col=0)
-            
-            cls.rFiber = cls.f2pVolOld.index[:16]
-            cls.vFiber = cls.f2pVolOld.index[16:]
-            cls.rPulp = [p for p in cls.pbpVolOld.index if 'Rec' in p]
-            cls.vPulp = [q for q in cls.pbpVolOld.index if 'Vir' in q]
-            cls.fPulp = [f for f in cls.pbpVolOld.index]
-            
-            # Emissions Info
-            cls.chemicals = pd.read_excel(x, 'nonFiber', usecols="A:B,E:L", skiprows=2, nrows=42, index_col=0)
-            cls.eolEmissions = pd.read_excel(x, 'EmTables', usecols="A:G", skiprows=2, nrows=3, index_col=0)
-            
-            cls.bfEI = pd.read_excel(x, 'EmTables', usecols="J:P", skiprows=2, nrows=3, index_col=0)
-            cls.bfEI.columns = [x[:-2] for x in cls.bfEI.columns] # has .1 after column names for some reason
-            cls.bioPct = pd.read_excel(x, 'EmTables', usecols="J:P", skiprows=8, nrows=2, index_col=0)
-            cls.pwpEI = pd.read_excel(x, 'EmTables', usecols="O:P", skiprows=14, nrows=5, index_col=0)
-            cls.bfCO2 = pd.read_excel(x, 'EmTables', usecols="A:G", skiprows=9, nrows=2, index_col=0)
-            
-            cls.fuelTable = pd.read_excel(x, 'EmTables', usecols="A:M", skiprows=15, nrows=13, index_col=0)
-            cls.fuelTable = cls.fuelTable.fillna(0)
-            
-            cls.rsdlModes = pd.read_excel(x, 'EmTables', usecols="A:G", skiprows=32, nrows=6, index_col=0)
-            cls.rsdlbio = pd.read_excel(x, 'EmTables', usecols="A:H", skiprows=41, nrows=4, index_col=0)
-            cls.rsdlbio = cls.rsdlbio.fillna(0)
-            cls.rsdlfos = pd.read_excel(x, 'EmTables', usecols="A:H", skiprows=48, nrows=4, index_col=0)
-            cls.rsdlfos = cls.rsdlfos.fillna(0)
-            
-            cls.transPct = pd.read_excel(x, 'EmTables', usecols="L:P", skiprows=32, nrows=11, index_col=0)
-            cls.transKM = pd.read_excel(x, 'EmTables', usecols="L:P", skiprows=46, nrows=11, index_col=0)
-            cls.transUMI = pd.read_excel(x, 'EmTables', usecols="L:P", skiprows=59, nrows=1, index_col=0)
-            
-            cls.woodint = pd.read_excel(x, 'EmTables', usecols="A:H", skiprows=58, nrows=1, index_col=0)
-            cls.wtotalGHGb0 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=62, nrows=6, index_col=0)
-            cls.wtotalGHGb1 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=71, nrows=6, index_col=0)
-            cls.wbioGHGb0 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=80, nrows=6, index_col=0)
-            cls.wbioGHGb1 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=89, nrows=6, index_col=0)
-            cls.wfosGHGb0 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=98, nrows=6, index_col=0)
-            cls.wfosGHGb1 = pd.read_excel(x, 'EmTables', usecols="A:K", skiprows=107, nrows=6, index_col=0)
-            
-            cls.chinaVals = pd.read_excel(x, 'EmTables', usecols="L:M", skiprows=66, nrows=3, index_col=0)
-            cls.chinaCons = pd.read_excel(x, 'EmTables', usecols="L:M", skiprows=72, nrows=6, index_col=0)
-            cls.fYield = pd.read_excel(x, 'EmTables', usecols="L:N", skiprows=81, nrows=5, index_col=0)
+    def useFactors(cls,factors):
+        # factors (em_factors) - emissions factors & old data shared by every solution
+        # Old data
+        cls.f2pVolOld = factors.f2pVolOld
+        cls.pbpVolOld = factors.pbpVolOld
+
+        cls.prodLD = factors.prodLD
+        cls.prodDemand = factors.prodDemand
+        cls.consCollOld = factors.consCollOld
+
+        cls.exportOld = factors.exportOld
+        cls.fiberType = factors.fiberType
+
+        cls.rFiber = factors.rFiber
+        cls.vFiber = factors.vFiber
+        cls.rPulp = factors.rPulp
+        cls.vPulp = factors.vPulp
+        cls.fPulp = factors.fPulp
+
+        # Emissions Info
+        cls.chemicals = factors.chemicals
+        cls.eolEmissions = factors.eolEmissions
+
+        cls.bfEI = factors.bfEI
+        cls.bioPct = factors.bioPct
+        cls.pwpEI = factors.pwpEI
+        cls.bfCO2 = factors.bfCO2
+
+        cls.fuelTable = factors.fuelTable
+
+        cls.rsdlModes = factors.rsdlModes
+        cls.rsdlbio = factors.rsdlbio
+        cls.rsdlfos = factors.rsdlfos
+
+        cls.transPct = factors.transPct
+        cls.transKM = factors.transKM
+        cls.transUMI = factors.transUMI
+        cls.transUnitImp = factors.transUnitImp
+
+        cls.woodint = factors.woodint
+        cls.wtotalGHGb0 = factors.wtotalGHGb0
+        cls.wtotalGHGb1 = factors.wtotalGHGb1
+        cls.wbioGHGb0 = factors.wbioGHGb0
+        cls.wbioGHGb1 = factors.wbioGHGb1
+        cls.wfosGHGb0 = factors.wfosGHGb0
+        cls.wfosGHGb1 = factors.wfosGHGb1
+
+        cls.chinaVals = factors.chinaVals
+        cls.chinaCons = factors.chinaCons
+        cls.fYield = factors.fYield
+        cls.baseline = factors.baseline
     
+    # Each calculation below is done once, on arrays with a leading solution axis (the *Batch methods). The methods
+    # on dfs wrap them for a single solution, aligning each table to the OldData labels; en_emissions_batch calls
+    # them on a whole stack of solutions.
+
+    def fiberPos(cls,fibers):
+        return positions(cls.f2pVolOld.index, fibers)
+
+    def pulpPos(cls,pulps):
+        return positions(cls.pbpVolOld.index, pulps)
+
+    def frame(cls,columns):
+        # columns (dict) - name -> solution x product array from a *Batch method
+        #
+        # (return) [df] - the columns of the first solution; indexed by product
+        return pd.DataFrame({k: v[0] for k, v in columns.items()}, index = cls.fProd)
+
     def calculateTrans(cls,transVol):
         # transVol [df] - item, volume (in Mg) by product, TransCode; indexed by fiberCode or other label
-        # transPct [df] - % traversed for transMode by transCode; indexed by transCode
-        # transKM [df] - distance traversed for transMode by transCode; indexed by transCode
-        # transUMI [s] - unit impact by mode (truck, train, boat); indexed by "transUMI"
-        transImpact = pd.Series(0, index = cls.fProd)
-        
-        tC = transVol['TransCode']
-        tC = tC[(tC != 0) & (tC != 1)] # index non-zero/non-NaN elements only
-        transVol = transVol.loc[tC.index]
-        for t in cls.fProd:
-            for m in cls.transUMI.columns:
-                transImpact[t] += sum(transVol[t] * cls.transPct.loc[tC,m].values * cls.transKM.loc[tC,m].values * cls.transUMI[m].values * 1)
-                
-        return transImpact
+        return pd.Series(cls.calculateTransBatch(transVol[cls.fProd].values[None], transVol['TransCode'].values)[0],
+                         index = cls.fProd)
+
+    def calculateTransBatch(cls,vol,tC):
+        # vol [array] - volume (in Mg); solution x item x product
+        # tC [array] - TransCode by item
+        # transUnitImp [s] - impact per Mg over all transport modes; indexed by transCode
+        tC = np.asarray(tC)
+        moved = (tC != 0) & (tC != 1) # non-zero/non-NaN codes only
+        return np.einsum('sip,i->sp', vol[:, moved], cls.transUnitImp.loc[tC[moved]].values)
     
     def calculateChem(cls,chemicals,prodDemand):
         # chemicals [df] - nonfiber name, % use by product, transCode, impact factor; indexed by number
@@ -191,267 +284,362 @@ class en_emissions(): # energy & emissions
     
     def calculateEoL(cls,eolEmissions,consColl):
         # eolEmissions [df] - biogenic and fossil CO2 emission factors & transportation code by product; indexed by bio/fosCO2
-        # consColl [df] - domestic consumption, collection, and recovery by product; indexed by name        
-        prod2landfill = pd.Series(consColl.loc['Domestic Consumption'] - consColl.loc['Recovery Volume'],
-                                  index = cls.fProd, name = 'prod2landfill')
-        mrf2landfill = pd.Series(consColl.loc['Collection Volume'] - consColl.loc['Recovery Volume'],
-                                 index = cls.fProd, name = 'mrf2landfill')
-        
-        bioEoL = pd.Series(prod2landfill * eolEmissions.loc['bioCO2'], index = cls.fProd, name = 'bioEoL')
-        
-        mrf2landfill = pd.DataFrame(mrf2landfill) # works b/c all prods have same TransCode
-        transEoL = pd.Series(cls.calculateTrans(mrf2landfill.T.assign(TransCode=eolEmissions.loc['TransCode'].values[0])),
-                             index = cls.fProd, name = 'eolTrans')
-        
-        fesTransEoL = pd.Series(prod2landfill * eolEmissions.loc['fossilCO2'] + transEoL, index = cls.fProd,
-                                name = 'fesTransEoL')
-        bftEoL = pd.Series(bioEoL + fesTransEoL, name = 'bftEoL')
-        
-        return pd.concat([bioEoL, fesTransEoL, bftEoL, transEoL], axis=1)
+        # consColl [df] - domestic consumption, collection, and recovery by product; indexed by name
+        return cls.frame(cls.calculateEoLBatch(eolEmissions, stackTables([consColl], cls.consCollOld.index, cls.fProd)))
+
+    def calculateEoLBatch(cls,eolEmissions,consColl):
+        # consColl [array] - domestic consumption, collection, and recovery; solution x consCollOld row x product
+        row = cls.consCollOld.index.get_loc
+        prod2landfill = consColl[:, row('Domestic Consumption')] - consColl[:, row('Recovery Volume')]
+        mrf2landfill = consColl[:, row('Collection Volume')] - consColl[:, row('Recovery Volume')]
+
+        bioEoL = prod2landfill * eolEmissions.loc['bioCO2', cls.fProd].values
+        # all products have the same TransCode
+        transEoL = cls.calculateTransBatch(mrf2landfill[:, None, :], eolEmissions.loc['TransCode'].values[:1])
+        fesTransEoL = prod2landfill * eolEmissions.loc['fossilCO2', cls.fProd].values + transEoL
+
+        return {'bioEoL': bioEoL, 'fesTransEoL': fesTransEoL, 'bftEoL': bioEoL + fesTransEoL, 'eolTrans': transEoL}
     
     def getEnergyYldCoeff(cls,f2pVol,pbpVol):
         # f2pVol [df] - recycled fiber to pulp (in Mg); indexed by fiber code
         # pbpVol [df] - pulp by product (in Mg); indexed by pulp name
         #
         # PYCoeff [s] - pulp yield coeffient; indexed by pulp
-        f2pByPulp = pd.Series(0, index = pbpVol.index, name = 'fiber2pulp')
-        
-        for p in cls.rPulp:
-            f2pByPulp[p] = sum([f2pVol.loc[cls.rFiber,t].sum() for t in cls.fProdM 
-                               if cls.fProdM.index(t) == cls.rPulp.index(p)])
-        for q in cls.vPulp:
-            f2pByPulp[q] = sum([f2pVol.loc[cls.vFiber,t].sum() for t in cls.fProdM 
-                               if cls.fProdM.index(t) == cls.vPulp.index(q)])
-            
-        pulpProd = pd.Series([pbpVol.loc[i].sum() for i in pbpVol.index], index = pbpVol.index, name = 'pulpProd')
-        PYCoeff = (pd.Series(f2pByPulp / pulpProd, name = 'pulpYldCoeff'))
-        PYCoeff.replace([np.inf, -np.inf], np.nan, inplace=True)
-        PYCoeff = PYCoeff.fillna(0)
-        
+        PYCoeff = cls.getEnergyYldCoeffBatch(stackTables([f2pVol], cls.f2pVolOld.index, cls.fProdM),
+                                             stackTables([pbpVol], cls.pbpVolOld.index, cls.fProd))
+        return pd.Series(PYCoeff[0], index = cls.pbpVolOld.index, name = 'pulpYldCoeff')
+
+    def getEnergyYldCoeffBatch(cls,f2pVol,pbpVol):
+        # f2pVol [array] - fiber to pulp (in Mg); solution x fiber x fProdM
+        # pbpVol [array] - pulp by product (in Mg); solution x pulp x product
+        #
+        # PYCoeff [array] - pulp yield coefficient; solution x pulp
+        f2pByPulp = np.zeros(pbpVol.shape[:2])
+        # r/vPulp are matched to fProdM columns by position; blank volumes count as 0, as in the pandas sums
+        for pulps, fibers in [(cls.rPulp, cls.rFiber), (cls.vPulp, cls.vFiber)]:
+            n = min(len(pulps), len(cls.fProdM))
+            f2pByPulp[:, cls.pulpPos(pulps[:n])] = np.nansum(f2pVol[:, cls.fiberPos(fibers), :n], axis=1)
+
+        # pulp production has always summed in the TransCode column too
+        pulpProd = np.nansum(pbpVol, axis=2) + np.nan_to_num(cls.pbpVolOld['TransCode'].values)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            PYCoeff = f2pByPulp / pulpProd
+        PYCoeff[~np.isfinite(PYCoeff)] = 0
+
         return PYCoeff
     
     def getEnergyPulpPct(cls,pbpVol):
         # pbpVol [df] - pulp by product (in Mg); indexed by pulp name
         #
         # pulpPct [df] - % of rec/vir pulp used in product; indexed by pulp name
-        pulpPct = pbpVol.copy().drop(['TransCode'], axis=1)
+        pulpPct = cls.getEnergyPulpPctBatch(stackTables([pbpVol], cls.pbpVolOld.index, cls.fProd))
+        return pd.DataFrame(pulpPct[0], index = cls.pbpVolOld.index, columns = cls.fProd)
 
-        for t in pulpPct.columns:
-            rTotalPulp = pulpPct.loc[cls.rPulp,t].sum()
-            vTotalPulp = pulpPct.loc[cls.vPulp,t].sum()
+    def getEnergyPulpPctBatch(cls,pbpVol):
+        # pbpVol [array] - pulp by product (in Mg); solution x pulp x product
+        pulpPct = pbpVol.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for pulps in (cls.rPulp, cls.vPulp):
+                rows = cls.pulpPos(pulps)
+                pulpPct[:, rows] = pbpVol[:, rows] / np.nansum(pbpVol[:, rows], axis=1, keepdims=True)
+        pulpPct[np.isnan(pulpPct)] = 0
 
-            pulpPct.loc[cls.rPulp,t] = pulpPct.loc[cls.rPulp,t] / rTotalPulp
-            pulpPct.loc[cls.vPulp,t] = pulpPct.loc[cls.vPulp,t] / vTotalPulp
-        
-        return pulpPct.fillna(0)
+        return pulpPct
     
     def getEnergyMultiProd(cls,PYMult,pulpPct):
         # PYMult [s] - pulp yield multiplier; indexed by pulp name
         # pulpPct [df] - % of rec/vir pulp used in product; indexed by pulp name
         #
         # (return) [df] -  rec/vir yield multiprod by product; index by r/vYldMultiProd
-        rYldMultiProd = pd.Series([sum(pulpPct.loc[cls.rPulp,t] * PYMult[cls.rPulp]) for t in cls.fProd],
-                                   index = cls.fProd, name = 'rYldMultiProd')
-        vYldMultiProd = pd.Series([sum(pulpPct.loc[cls.vPulp,t] * PYMult[cls.vPulp]) for t in cls.fProd],
-                                   index = cls.fProd, name = 'vYldMultiProd')
-        
-        rYldMultiProd.replace([np.inf, -np.inf], np.nan, inplace=True)
-        vYldMultiProd.replace([np.inf, -np.inf], np.nan, inplace=True)
-        
-        return pd.concat([rYldMultiProd.fillna(0), vYldMultiProd.fillna(0)], axis=1)
+        return cls.frame(cls.getEnergyMultiProdBatch(PYMult.loc[cls.pbpVolOld.index].values[None],
+                                                     stackTables([pulpPct], cls.pbpVolOld.index, cls.fProd)))
+
+    def getEnergyMultiProdBatch(cls,PYMult,pulpPct):
+        # PYMult [array] - pulp yield multiplier; solution x pulp
+        # pulpPct [array] - % of rec/vir pulp used in product; solution x pulp x product
+        #
+        # (return) [dict] - rec & vir yield multiprod; solution x product
+        multiProd = {}
+        for name, pulps in [('rYldMultiProd', cls.rPulp), ('vYldMultiProd', cls.vPulp)]:
+            rows = cls.pulpPos(pulps)
+            mp = (pulpPct[:, rows] * PYMult[:, rows, None]).sum(axis=1)
+            mp[~np.isfinite(mp)] = 0
+            multiProd[name] = mp
+
+        return multiProd
     
     def calculateEnergy(cls,pbpVol,prodLD,multiProd,pwpEI,paperEI):
         # prodLD (df) - demand by product; indexed by % recycled content level
-        # bfEI (df) - bio & fes energy intensity fitting parameters by product; indexed by name
-        # bioPct (df) - bio fitting parameter for PWP; indexed by name
         # pwpEI (df) - energy intensity of PWP pulp; indexed by pulp name
         # paperEI (df) - paper production energy intensity; indexed by 'PPE'
         # pbpVol (df) - pulp by product (in Mg); indexed by pulp name
         # multiProd (df) - rec/vir yield multiprod by product; indexed by product
-        bioEnergy = pd.Series(0, index = cls.fProd, name = "bioEnergy")
-        fesEnergy = pd.Series(0, index = cls.fProd, name = 'fesEnergy')
-        totalEnergy = pd.Series(0, index = cls.fProd, name = 'totalEnergy')
-        
-        for t in cls.fProd:
-            bioEnergy[t] = sum(prodLD[t].values[:len(cls.rLevel[t])] *
-                               sum([r * cls.bfEI.loc['bioEI b1',t] + cls.bfEI.loc['bioEI b0',t] for r in cls.rLevel[t]]))
-            fesEnergy[t] = sum(prodLD[t].values[:len(cls.rLevel[t])] *
-                               cls.bfEI.loc['fesEI',t] * multiProd.loc[t,'rYldMultiProd'])
-            
-            if 'P&W' or 'News' in t:
-                avgrecPct = sum(prodLD[t].values[:len(cls.rLevel[t])] * cls.rLevel[t]) / prodLD[t].sum()
-                bioPctPW = avgrecPct * cls.bioPct.loc['bioPct b1',t] + cls.bioPct.loc['bioPct b0',t]
-                
-                pulpProdEnergy = sum([pbpVol.loc[p,t] * pwpEI.loc[p].values[0] for p in pwpEI.index])
-                ppEnergy = pulpProdEnergy + prodLD[t].sum() * paperEI.values[0]
-                
-                bioEnergy[t] = bioPctPW * ppEnergy
-                fesEnergy[t] = (1 - bioPctPW) * ppEnergy * multiProd.loc[t,'rYldMultiProd']
-                
-            totalEnergy[t] = bioEnergy[t] + fesEnergy[t]
-        
-        return pd.concat([bioEnergy, fesEnergy, totalEnergy], axis=1)
+        return cls.frame(cls.calculateEnergyBatch(stackTables([pbpVol], cls.pbpVolOld.index, cls.fProd),
+                                                  stackDemand([prodLD], cls.fProd, cls.rLevel),
+                                                  multiProd.loc[cls.fProd, 'rYldMultiProd'].values[None], pwpEI, paperEI))
+
+    def calculateEnergyBatch(cls,pbpVol,demand,rYldMultiProd,pwpEI,paperEI):
+        # pbpVol [array] - pulp by product (in Mg); solution x pulp x product
+        # demand [array] - demand; solution x rec level x product, from stackDemand
+        # rYldMultiProd [array] - rec yield multiprod; solution x product
+        # bioPct (df) - bio fitting parameter for PWP; indexed by name
+        #
+        # the P&W fit (bioPct, pwpEI) is applied to every product, as it always has been: the original
+        # check `'P&W' or 'News' in t` is always true, so the bfEI fit it guarded was overwritten
+        level = np.zeros(demand.shape[1:]) # rec level x product
+        inside = np.zeros(demand.shape[1:], dtype=bool) # within the product's rLevel
+        for j, t in enumerate(cls.fProd):
+            level[:len(cls.rLevel[t]), j] = cls.rLevel[t]
+            inside[:len(cls.rLevel[t]), j] = True
+        totalDemand = np.nansum(demand, axis=1)
+
+        avgrecPct = (np.where(inside, demand, 0) * level).sum(axis=1) / totalDemand
+        bioPctPW = avgrecPct * cls.bioPct.loc['bioPct b1', cls.fProd].values + cls.bioPct.loc['bioPct b0', cls.fProd].values
+
+        pulpProdEnergy = np.einsum('sqp,q->sp', pbpVol[:, cls.pulpPos(pwpEI.index)], pwpEI.iloc[:, 0].values)
+        ppEnergy = pulpProdEnergy + totalDemand * paperEI.values[0]
+
+        bioEnergy = bioPctPW * ppEnergy
+        fesEnergy = (1 - bioPctPW) * ppEnergy * rYldMultiProd
+
+        return {'bioEnergy': bioEnergy, 'fesEnergy': fesEnergy, 'totalEnergy': bioEnergy + fesEnergy}
     
     def calculateProduction(cls,calcEnergy):
         # calcEnergy (df) - bio, fes, and total energy from calculateEnergy; indexed by product
+        return cls.frame(cls.calculateProductionBatch({k: calcEnergy.loc[cls.fProd, k].values[None]
+                                                       for k in calcEnergy.columns}))
+
+    def calculateProductionBatch(cls,calcEnergy):
+        # calcEnergy (dict) - bio, fes, and total energy from calculateEnergyBatch; solution x product
         # bfCO2 (df) - bio & fes CO2 fitting parameters; indexed by product
-        bioCO2 = pd.Series(0, index = cls.fProd, name = 'bioCO2')
-        fesCO2 = pd.Series(0, index = cls.fProd, name = 'fesCO2')
-        totalCO2 = pd.Series(0, index = cls.fProd, name = 'totalCO2')
-        for t in cls.fProd:
-            bioCO2[t] = calcEnergy.loc[t,'bioEnergy'] * cls.bfCO2.loc['bioCO2 b1',t]
-            fesCO2[t] = calcEnergy.loc[t,'fesEnergy'] * cls.bfCO2.loc['fesCO2 b1',t]
-            totalCO2[t] = bioCO2[t] + fesCO2[t]
-            
-        return pd.concat([bioCO2, fesCO2, totalCO2], axis=1)
+        bioCO2 = calcEnergy['bioEnergy'] * cls.bfCO2.loc['bioCO2 b1', cls.fProd].values
+        fesCO2 = calcEnergy['fesEnergy'] * cls.bfCO2.loc['fesCO2 b1', cls.fProd].values
+
+        return {'bioCO2': bioCO2, 'fesCO2': fesCO2, 'totalCO2': bioCO2 + fesCO2}
     
     def calculateFuel(cls,calcEnergy):
         # calcEnergy (df) - bio, fes, and total energy from calculateEnergy; indexed by product
+        return cls.frame(cls.calculateFuelBatch({k: calcEnergy.loc[cls.fProd, k].values[None]
+                                                 for k in calcEnergy.columns}))
+
+    def calculateFuelBatch(cls,calcEnergy):
+        # calcEnergy (dict) - bio, fes, and total energy from calculateEnergyBatch; solution x product
         # fuelTable (df) - fuel impact by product; indexed by fuel type
-        fuels = cls.fuelTable.index
-        
-        bioFI = pd.Series(0, index = cls.fProd, name = 'bioFuelImp')
-        fesFI = pd.Series(0, index = cls.fProd, name = 'fesFuelImp')
-        fuelImp = pd.Series(0, index = cls.fProd, name = 'fuelImp')
-        
-        for t in cls.fProd:
-            bioFI[t] = calcEnergy.loc[t,'bioEnergy'] * sum([cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'Upstream Impact Factor'] 
-                                                             for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 1])
-            fesFI[t] = calcEnergy.loc[t,'fesEnergy'] * sum([cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'Upstream Impact Factor'] 
-                                                             for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 2])
-            fuelImp[t] = bioFI[t] + fesFI[t]
-        
-        fuelTransVol = cls.fuelTable.copy()
-        fuel1 = [f for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 1]
-        fuel2 = [f for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 2]
-        for t in cls.fProd:
-            fuelTransVol.loc[fuel1,t] = [calcEnergy.loc[t,'bioEnergy'] * cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'FU/GJ'] 
-                               for f in fuel1]
-            fuelTransVol.loc[fuel2,t] = [calcEnergy.loc[t,'fesEnergy'] * cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'FU/GJ'] 
-                               for f in fuel2]
-        
-        fuelTrans = pd.Series(cls.calculateTrans(fuelTransVol), name = 'fuelTrans')
-        
-        return pd.concat([bioFI, fesFI, fuelImp, fuelTrans], axis=1)
+        fuelType = cls.fuelTable['Fuel Type'].values
+        bio = (fuelType == 1)[:, None] # fuels x 1
+        fes = (fuelType == 2)[:, None]
+        share = cls.fuelTable[cls.fProd].values # fuels x products
+        bioE = calcEnergy['bioEnergy'][:, None, :] # solution x 1 x products
+        fesE = calcEnergy['fesEnergy'][:, None, :]
+
+        upstream = share * cls.fuelTable[['Upstream Impact Factor']].values
+        bioFI = calcEnergy['bioEnergy'] * (upstream * bio).sum(axis=0)
+        fesFI = calcEnergy['fesEnergy'] * (upstream * fes).sum(axis=0)
+
+        # fuel units by product; fuels of other types keep their table values
+        fuelUnits = share * cls.fuelTable[['FU/GJ']].values
+        fuelTransVol = np.where(bio, fuelUnits * bioE, np.where(fes, fuelUnits * fesE, share))
+        fuelTrans = cls.calculateTransBatch(fuelTransVol, cls.fuelTable['TransCode'].values)
+
+        return {'bioFuelImp': bioFI, 'fesFuelImp': fesFI, 'fuelImp': bioFI + fesFI, 'fuelTrans': fuelTrans}
     
     def calculateResidual(cls,pbpVol,f2pVol):
         # pbpVol [df] - pulp by product (in Mg); indexed by pulp name
         # f2pVol [df] - recycled fiber to pulp (in Mg); indexed by fiber code
+        return cls.frame(cls.calculateResidualBatch(stackTables([pbpVol], cls.pbpVolOld.index, cls.fProd),
+                                                    stackTables([f2pVol], cls.f2pVolOld.index, cls.fProdM)))
+
+    def calculateResidualBatch(cls,pbpVol,f2pVol):
+        # pbpVol [array] - pulp by product (in Mg); solution x pulp x product
+        # f2pVol [array] - fiber to pulp (in Mg); solution x fiber x fProdM
         # f2pYld [df] - fiber to pulp yield by pulp product; indexed by fiber
         # pulpYld [df] - pulp to product yield; indexed by pulp
         # rsdlModes [df] - residual treatments modes; indexed by residual type
         # rsdlbio [df] - transport and biogenic emissions factors; indexed by residual treatment mode
         # rsdlfos [df] - transport and fossil emissions factors; indexed by residual treatment mode
-        pulpProd = pd.Series(0, index = cls.rPulp + cls.vPulp, name = 'pulpProduced')
-        fiberRes = pd.Series(0, index = cls.rPulp + cls.vPulp, name = 'fiberResidue')
-        
-        for p in cls.rPulp: # order of fPulp must match order of r/vPulp
-            pulpProd[p] = sum([(f2pVol.loc[cls.rFiber,t].mul(cls.f2pYld.loc[cls.rFiber,t])).sum() for t in cls.fProdM 
-                    if cls.fProdM.index(t) == cls.rPulp.index(p)])
-            fiberRes[p] = sum([(f2pVol.loc[cls.rFiber,t].mul(1 - cls.f2pYld.loc[cls.rFiber,t])).sum() for t in cls.fProdM 
-                    if cls.fProdM.index(t) == cls.rPulp.index(p)])
-        for q in cls.vPulp:
-            pulpProd[q] = sum([(f2pVol.loc[cls.vFiber,t].mul(cls.f2pYld.loc[cls.vFiber,t])).sum() for t in cls.fProdM 
-                    if cls.fProdM.index(t) == cls.vPulp.index(q)])
-            fiberRes[q] = sum([(f2pVol.loc[cls.vFiber,t].mul(1 - cls.f2pYld.loc[cls.vFiber,t])).sum() for t in cls.fProdM 
-                    if cls.fProdM.index(t) == cls.vPulp.index(q)])
-        
-        pulpUP = pbpVol.iloc[:,:-1].div(pulpProd, axis=0).fillna(0) # pulpUsePct
-        
-        rFiberRsd = pd.Series((pulpUP.loc[cls.rPulp].mul(fiberRes[cls.rPulp], axis=0)).sum(), index = cls.fProd, name = 'rFiberRsd')
-        rPulpRsd = pd.Series((pulpUP.loc[cls.rPulp].mul(1 - cls.pulpYld.iloc[:,0].loc[cls.rPulp], axis=0)).sum(), index = cls.fProd, name = 'rPulpRsd')
-        rTotalRsd = rFiberRsd + rPulpRsd
-        
-        vFiberRsd = pd.Series((pulpUP.loc[cls.vPulp].mul(fiberRes[cls.vPulp], axis=0)).sum(), index = cls.fProd, name = 'vFiberRsd')
-        vPulpRsd = pd.Series((pulpUP.loc[cls.vPulp].mul(1 - cls.pulpYld.iloc[:,0].loc[cls.vPulp], axis=0)).sum(), index = cls.fProd, name = 'vPulpRsd')
-        vTotalRsd = vFiberRsd + vPulpRsd
-        
-        rsdlType = cls.rsdlModes.index
-        rsdlQuantity = pd.DataFrame(0, index = rsdlType, columns = cls.fProd)
-        for rt in rsdlType:
-            if cls.rsdlModes.loc[rt,'Input Base'] ==  1:
-                rsdlQuantity.loc[rt,:] = rTotalRsd * cls.rsdlModes.loc[rt,'Intensity']
-            if cls.rsdlModes.loc[rt,'Input Base'] == 2:
-                rsdlQuantity.loc[rt,:] = vTotalRsd * cls.rsdlModes.loc[rt,'Intensity'] 
-        
+        pulps = cls.rPulp + cls.vPulp
+        nR = len(cls.rPulp)
+        pulpProd = np.zeros((len(f2pVol), len(pulps)))
+        fiberRes = np.zeros((len(f2pVol), len(pulps)))
+        # order of fPulp must match order of r/vPulp; pulps are matched to fProdM columns by position
+        for start, pulpSet, fibers in [(0, cls.rPulp, cls.rFiber), (nR, cls.vPulp, cls.vFiber)]:
+            n = min(len(pulpSet), len(cls.fProdM))
+            vol = f2pVol[:, cls.fiberPos(fibers), :n]
+            yld = cls.f2pYld.loc[fibers, cls.fProdM[:n]].values
+            pulpProd[:, start:start + n] = np.nansum(vol * yld, axis=1)
+            fiberRes[:, start:start + n] = np.nansum(vol * (1 - yld), axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pulpUP = pbpVol[:, cls.pulpPos(pulps)] / pulpProd[:, :, None] # pulpUsePct
+            pulpUP[np.isnan(pulpUP)] = 0
+            fiberRsd = pulpUP * fiberRes[:, :, None]
+            pulpRsd = pulpUP * (1 - cls.pulpYld.iloc[:,0].loc[pulps].values)[:, None]
+
+        # totals by product skip the NaN left by 0 * inf, as the pandas sums did
+        rTotalRsd = np.nansum(fiberRsd[:, :nR], axis=1) + np.nansum(pulpRsd[:, :nR], axis=1)
+        vTotalRsd = np.nansum(fiberRsd[:, nR:], axis=1) + np.nansum(pulpRsd[:, nR:], axis=1)
+
+        # residual quantity by solution x type x product, from the rec or vir total depending on 'Input Base'
+        base = cls.rsdlModes['Input Base'].values[:, None]
+        intensity = cls.rsdlModes['Intensity'].values[:, None]
+        rsdlQuantity = np.where(base == 1, rTotalRsd[:, None, :] * intensity,
+                                np.where(base == 2, vTotalRsd[:, None, :] * intensity, 0.0))
+
+        # volume by solution x mode x type x product
         rsdlMode = cls.rsdlModes.columns[:-2]
-        rsdlModeVol = {rM: pd.DataFrame(0, index = rsdlType, columns = cls.fProd)
-                          for rM in rsdlMode}
-        for rM in rsdlMode:
-            rsdlModeVol[rM] = rsdlQuantity.mul(cls.rsdlModes[rM], axis=0)
-            rsdlModeVol[rM] = rsdlModeVol[rM].assign(TransCode=cls.rsdlbio.loc[rM,'TransCode'] * np.ones(len(rsdlType)))
+        with np.errstate(invalid='ignore'):
+            rsdlModeVol = cls.rsdlModes[rsdlMode].values.T[None, :, :, None] * rsdlQuantity[:, None, :, :]
+        rsdlModeVol[np.isinf(rsdlModeVol)] = np.nan # TODO: what happens to make this inf?
+        modeVol = np.nansum(rsdlModeVol, axis=2) # solution x mode x product
 
-            rsdlModeVol[rM].replace([np.inf, -np.inf], np.nan, inplace=True) # TODO: what happens to make this inf?
-            rsdlModeVol[rM].fillna(0)
+        bioImp = (modeVol * cls.rsdlbio.loc[rsdlMode, cls.fProd].values).sum(axis=1)
+        fosImp = (modeVol * cls.rsdlfos.loc[rsdlMode, cls.fProd].values).sum(axis=1)
 
-        bioImp = pd.Series(0, index = cls.fProd, name = 'bioImp')
-        fosImp = pd.Series(0, index = cls.fProd, name = 'fossilImp')
-        
-        for t in cls.fProd:
-            bioImp[t] = sum([rsdlModeVol[rM][t].sum() * cls.rsdlbio.loc[rM,t] for rM in rsdlMode])
-            fosImp[t] = sum([rsdlModeVol[rM][t].sum() * cls.rsdlfos.loc[rM,t] for rM in rsdlMode])
-        
-        biofosImp = pd.Series(bioImp + fosImp, name = 'bio+fos')
-        
-        rsdlTrans = pd.Series(0, index = cls.fProd, name = 'rsdlTrans')
-        for rM in rsdlMode:
-            rsdlTrans += cls.calculateTrans(rsdlModeVol[rM])
-        
-        return pd.concat([bioImp, fosImp, biofosImp, rsdlTrans], axis=1)
+        # transport by each mode's TransCode; unlike the impacts above, NaN volumes carry through
+        rsdlTrans = cls.calculateTransBatch(rsdlModeVol.sum(axis=2), cls.rsdlbio.loc[rsdlMode, 'TransCode'].values)
+
+        return {'bioImp': bioImp, 'fossilImp': fosImp, 'bio+fos': bioImp + fosImp, 'rsdlTrans': rsdlTrans}
     
     def getExportTrans(cls,transVol):
-        transImpact = pd.Series(0, index = transVol.columns[:-1])
-        
-        tC = transVol['TransCode']
-        tC = tC[(tC != 0) & (tC != 1)] # index non-zero/non-NaN elements only
-        transVol = transVol.loc[tC.index]
-        for n in transVol.columns[:-1]:
-            for m in cls.transUMI.columns:
-                transImpact[n] += sum(transVol[n] * cls.transPct.loc[tC,m].values * cls.transKM.loc[tC,m].values * cls.transUMI[m].values)
-        
-        return transImpact.values
+        # transVol [df] - volume (in Mg) by column, TransCode last; indexed by rec fiber
+        return cls.calculateTransBatch(transVol[transVol.columns[:-1]].values[None], transVol['TransCode'].values)[0]
     
     def calculateExport(cls,exportOld,exportNew):
         # exportOld [df] old export from US; indexed by rec fiber
         # exportNew [df] new export from US; indexed by rec fiber
-        impChange = pd.Series(0, index = cls.fYield.index, name = 'impChangeByGroup')
-        sumChange = pd.Series(0, index = cls.fYield.index, name = 'sumNetChange')
-        for r in impChange.index:
+        trade = cls.calculateExportBatch(exportOld, stackTables([exportNew], exportOld.index, ['exportNew'])[:, :, 0])
+        return pd.Series(trade[0], index = cls.chinaVals.columns)
+
+    def calculateExportBatch(cls,exportOld,exportNew):
+        # exportOld [df] old export from US; indexed by rec fiber
+        # exportNew [array] new export from US; solution x rec fiber, fibers in exportOld order
+        #
+        # (return) [array] - trade emissions; solution x chinaVals column
+        change = exportNew - exportOld['exportOld'].values
+        sumChange = []
+        for r in cls.fYield.index:
             typeMask = cls.fiberType[cls.fiberType['fiberType'] == r].index
-            # impChange[r] = (exportOld.loc[typeMask, 'exportOld'] - exportNew.loc[typeMask, 'exportNew']).sum()
-            impChange[r] = (exportNew.loc[typeMask, 'exportNew'] - exportOld.loc[typeMask, 'exportOld']).sum()
-            sumChange[r] = impChange[r] * (1 - cls.fYield.loc[r,'US'] / cls.fYield.loc[r,'China'])
-            
-        beta = sumChange.sum() / (cls.chinaCons.loc['totalVir'].values + cls.chinaCons.loc['domesticRec'].values +
-                            cls.chinaCons.loc['importRec-US'].values + cls.chinaCons.loc['importRec-nonUS'].values)
-        
-        # chinaTrans = cls.getExportTrans(exportOld) - cls.getExportTrans(exportNew)
-        chinaTrans = cls.getExportTrans(exportNew) - cls.getExportTrans(exportOld)
-        
-        return cls.chinaVals.loc['Production'] * cls.chinaVals.loc['Energy Intensity'] * cls.chinaVals.loc['Emission Factor'] * beta + chinaTrans
+            impChange = np.nansum(change[:, positions(exportOld.index, typeMask)], axis=1)
+            sumChange.append(impChange * (1 - cls.fYield.loc[r,'US'] / cls.fYield.loc[r,'China']))
+
+        beta = np.nansum(sumChange, axis=0) / (cls.chinaCons.loc['totalVir'].values + cls.chinaCons.loc['domesticRec'].values +
+                                               cls.chinaCons.loc['importRec-US'].values + cls.chinaCons.loc['importRec-nonUS'].values)
+
+        exportTrans = cls.calculateTransBatch(exportNew[:, :, None], exportOld['TransCode'].values)[:, 0]
+        chinaTrans = (exportTrans - cls.getExportTrans(exportOld))[:, None]
+
+        return (cls.chinaVals.loc['Production'] * cls.chinaVals.loc['Energy Intensity'] *
+                cls.chinaVals.loc['Emission Factor']).values * beta[:, None] + chinaTrans
     
     def getForestVirginGHG(cls,virCons,woodint,slope,intercept):
-        # virCons [df] change in virgin consumption; products as columns
+        # virCons [float] change in virgin consumption
+        return cls.getForestVirginGHGBatch(np.array([virCons], dtype=float), woodint, slope, intercept)[0]
+
+    def getForestVirginGHGBatch(cls,virCons,woodint,slope,intercept):
+        # virCons [array] change in virgin consumption by solution
         # woodint [df] intervals of virgin wood consumption
         # slope [s] b1 value for GHG emissions
         # intercept[s] b0 value for GHG emissions
+        ghg = np.zeros(len(virCons)) # 0 outside of interval
+        found = np.zeros(len(virCons), dtype=bool)
         for n in range(1,len(woodint.columns)):
-            if (woodint[n].values <= virCons) & (virCons < woodint[n+1].values):
-                return virCons * slope[n] + intercept[n]
-        return 0 # catch values outside of interval
+            inside = ~found & (woodint[n].values <= virCons) & (virCons < woodint[n+1].values)
+            ghg[inside] = virCons[inside] * slope[n] + intercept[n]
+            found |= inside
+        return ghg
             
     def calculateForest(cls,virCons,forYear):
         # virCons [float] change in virgin consumption, sum of all products
         # forYear [int] forest year length for cumulative emissions calcs; 10-90 by ten        
-        deltaTotalGHG = pd.Series(cls.getForestVirginGHG(virCons / 1e6, cls.woodint, cls.wtotalGHGb1[forYear], cls.wtotalGHGb0[forYear]),
-                                  name = 'totalGHG') * 1e6
-        deltabioGHG = pd.Series(cls.getForestVirginGHG(virCons / 1e6, cls.woodint, cls.wbioGHGb1[forYear], cls.wbioGHGb0[forYear]),
-                                  name = 'bioGHG') * 1e6
-        deltafosGHG = pd.Series(cls.getForestVirginGHG(virCons / 1e6, cls.woodint, cls.wfosGHGb1[forYear], cls.wfosGHGb0[forYear]),
-                                  name = 'fosGHG') * 1e6
-        
-        return pd.concat([deltaTotalGHG, deltabioGHG, deltafosGHG], axis=1)
+        return pd.DataFrame(cls.calculateForestBatch(np.array([virCons], dtype=float), forYear))
+
+    def calculateForestBatch(cls,virCons,forYear):
+        # virCons [array] change in virgin consumption by solution, sum of all products
+        # forYear [int] forest year length for cumulative emissions calcs; 10-90 by ten
+        return {'totalGHG': cls.getForestVirginGHGBatch(virCons / 1e6, cls.woodint, cls.wtotalGHGb1[forYear], cls.wtotalGHGb0[forYear]) * 1e6,
+                'bioGHG': cls.getForestVirginGHGBatch(virCons / 1e6, cls.woodint, cls.wbioGHGb1[forYear], cls.wbioGHGb0[forYear]) * 1e6,
+                'fosGHG': cls.getForestVirginGHGBatch(virCons / 1e6, cls.woodint, cls.wfosGHGb1[forYear], cls.wfosGHGb0[forYear]) * 1e6}
+
+    def summarize(cls,chemImp,fuel,prod,energy,rsdl,eol,trans):
+        # chemImp - chemical impact by product
+        # fuel, prod, energy, rsdl, eol - results of the calculate* methods (df) or of their *Batch forms (dict)
+        # trans - transport impact by product, summed over fiber, market, chemicals, fuel, residuals & EoL
+        #
+        # (return) [dict] - summary calcs for plotting by name, all but unitImp
+        sums = {'chemImp': chemImp,
+                'fuelbio': fuel['bioFuelImp'],
+                'fuelfos': fuel['fesFuelImp'],
+                'prodImp': prod['totalCO2'],
+                'prodbio': prod['bioCO2'],
+                'prodfos': prod['fesCO2'],
+                'energy': energy['totalEnergy'],
+                'energybio': energy['bioEnergy'],
+                'energyfos': energy['fesEnergy'],
+                'residImp': rsdl['bio+fos'],
+                'residbio': rsdl['bioImp'],
+                'residfos': rsdl['fossilImp'],
+                'eolImp': eol['bftEoL'],
+                'eolbio': eol['bioEoL'],
+                'eolfos': eol['fesTransEoL'],
+                'bioCO2': prod['bioCO2'] + rsdl['bioImp'] + eol['bioEoL'],
+                'fossilCO2': trans + chemImp + fuel['fuelImp'] + prod['fesCO2'] + rsdl['fossilImp'] + eol['fesTransEoL'],
+                'g2gbio': prod['bioCO2'] + rsdl['bioImp'],
+                'g2gfos': prod['fesCO2'] + rsdl['fossilImp'] + trans}
+        sums['totalImp'] = sums['bioCO2'] + sums['fossilCO2']
+        return sums
+
+    def summaryFrame(cls,sums):
+        # sums (dict) - from summarize, for one solution
+        sums = pd.concat([pd.Series(v, name=k) for k, v in sums.items()], axis=1)
+        return pd.concat([sums, pd.Series(sums['totalImp'] / cls.prodLD.sum(), name='unitImp')], axis=1, sort=True)
     
+    def calculateBaseline(cls):
+        # baseline ("old") results depend only on the old data, so they are computed once per product set and
+        # shared through the em_factors object by every solution evaluated against it; treat them as read-only
+        key = tuple(cls.fProd)
+        if key in cls.baseline:
+            return cls.baseline[key]
+
+        pulpNames = cls.rPulp + cls.vPulp
+        mvO = [cls.pbpVolOld.loc[p] for p in pulpNames if 'Deinked' in p or 'Market' in p]
+        marketVolOld = pd.concat([mvO[0],mvO[1]], axis=1).T
+
+        # Chemical
+        chemImp = cls.calculateChem(cls.chemicals, cls.prodDemand)
+
+        # EoL
+        oldEoL = cls.calculateEoL(cls.eolEmissions, cls.consCollOld)
+
+        # Energy
+        oldPulpPct = cls.getEnergyPulpPct(cls.pbpVolOld)
+        oldPYCoeff = cls.getEnergyYldCoeff(cls.f2pVolOld, cls.pbpVolOld)
+        oldYldMultiplier = (oldPYCoeff / oldPYCoeff).fillna(0)
+        oldMP = cls.getEnergyMultiProd(oldYldMultiplier, oldPulpPct)
+        oldEnergy = cls.calculateEnergy(cls.pbpVolOld, cls.prodLD, oldMP, cls.pwpEI.iloc[:-1], cls.pwpEI.iloc[-1])
+
+        # Production
+        oldProd = cls.calculateProduction(oldEnergy)
+
+        # Fuel
+        oldFuel = cls.calculateFuel(oldEnergy)
+
+        # Residual
+        oldRsdl = cls.calculateResidual(cls.pbpVolOld, cls.f2pVolOld)
+
+        # Transportation
+        oldFiberTrans = pd.Series(cls.calculateTrans(cls.f2pVolOld), name = 'fiberTrans')
+        oldMarketTrans = pd.Series(cls.calculateTrans(marketVolOld), name = 'marketTrans')
+
+        oldTrans = pd.concat([oldFiberTrans, oldMarketTrans, chemImp['chemTrans'], oldFuel['fuelTrans'],
+                            oldRsdl['rsdlTrans'], oldEoL['eolTrans']], axis=1)
+
+        # Summary calcs for plotting
+        oldSums = cls.summaryFrame(cls.summarize(chemImp['chemImp'], oldFuel, oldProd, oldEnergy, oldRsdl, oldEoL,
+                                                 oldTrans.sum(axis=1)))
+
+        cls.baseline[key] = {'chemImp': chemImp, 'oldPYCoeff': oldPYCoeff, 'oldEnergy': oldEnergy, 'oldSums': oldSums}
+        return cls.baseline[key]
+
     def calculateEmissions(cls):
         # xls [df] - name of Excel spreadsheet to pull data from
         # fProd [df] - list of products in current scenario
@@ -461,54 +649,34 @@ class en_emissions(): # energy & emissions
         # f2pVolNew [df] - fiber to pulp volume (in Mg); indexed by fiber code
         # pbpVolNew [df] - pulp by product volume; indexed by pulp name
         # consCollNew [df] - domestic consumption, collection, and recovery by product                
+        old = cls.calculateBaseline()
+        chemImp = old['chemImp']
+        oldPYCoeff = old['oldPYCoeff']
+
         pulpNames = cls.rPulp + cls.vPulp
-        mvO = [cls.pbpVolOld.loc[p] for p in pulpNames if 'Deinked' in p or 'Market' in p]
-        marketVolOld = pd.concat([mvO[0],mvO[1]], axis=1).T
         mvN = [cls.pbpVolNew.loc[p] for p in pulpNames if 'Deinked' in p or 'Market' in p]
         marketVolNew = pd.concat([mvN[0],mvN[1]], axis=1).T
         
-        # Chemical
-        chemImp = cls.calculateChem(cls.chemicals, cls.prodDemand)
-        
         # EoL
-        oldEoL = cls.calculateEoL(cls.eolEmissions, cls.consCollOld)
         newEoL = cls.calculateEoL(cls.eolEmissions, cls.consCollNew)
         
         # Energy
-        oldPulpPct = cls.getEnergyPulpPct(cls.pbpVolOld)
         newPulpPct = cls.getEnergyPulpPct(cls.pbpVolNew)
-        
-        oldPYCoeff = cls.getEnergyYldCoeff(cls.f2pVolOld, cls.pbpVolOld)
         newPYCoeff = cls.getEnergyYldCoeff(cls.f2pVolNew, cls.pbpVolNew)
-        
-        oldYldMultiplier = (oldPYCoeff / oldPYCoeff).fillna(0)
         newYldMultiplier = (newPYCoeff / oldPYCoeff).fillna(0)
-        
-        oldMP = cls.getEnergyMultiProd(oldYldMultiplier, oldPulpPct)
         newMP = cls.getEnergyMultiProd(newYldMultiplier, newPulpPct)
-        
-        oldEnergy = cls.calculateEnergy(cls.pbpVolOld, cls.prodLD, oldMP, cls.pwpEI.iloc[:-1], cls.pwpEI.iloc[-1])
         newEnergy = cls.calculateEnergy(cls.pbpVolNew, cls.demandNew, newMP, cls.pwpEI.iloc[:-1], cls.pwpEI.iloc[-1])
         
         # Production
-        oldProd = cls.calculateProduction(oldEnergy)
         newProd = cls.calculateProduction(newEnergy)
         
         # Fuel
-        oldFuel = cls.calculateFuel(oldEnergy)
         newFuel = cls.calculateFuel(newEnergy)
         
         # Residual
-        oldRsdl = cls.calculateResidual(cls.pbpVolOld, cls.f2pVolOld)
         newRsdl = cls.calculateResidual(cls.pbpVolNew, cls.f2pVolNew)
         
         # Transportation
-        oldFiberTrans = pd.Series(cls.calculateTrans(cls.f2pVolOld), name = 'fiberTrans')
-        oldMarketTrans = pd.Series(cls.calculateTrans(marketVolOld), name = 'marketTrans')
-        
-        oldTrans = pd.concat([oldFiberTrans, oldMarketTrans, chemImp['chemTrans'], oldFuel['fuelTrans'],
-                            oldRsdl['rsdlTrans'], oldEoL['eolTrans']], axis=1)
-        
         newFiberTrans = pd.Series(cls.calculateTrans(cls.f2pVolNew), name = 'fiberTrans')
         newMarketTrans = pd.Series(cls.calculateTrans(marketVolNew), name = 'marketTrans')
         
@@ -523,51 +691,171 @@ class en_emissions(): # energy & emissions
                                      cls.f2pVolOld.iloc[:,:-1].loc[cls.vFiber].sum().sum(), 90)
         
         # Summary calcs for plotting
-        oldSums = pd.concat([pd.Series(chemImp['chemImp'], name='chemImp'),
-                             pd.Series(oldFuel['bioFuelImp'], name='fuelbio'),
-                             pd.Series(oldFuel['fesFuelImp'], name='fuelfos'),
-                             pd.Series(oldProd['totalCO2'], name='prodImp'),
-                             pd.Series(oldProd['bioCO2'], name='prodbio'),
-                             pd.Series(oldProd['fesCO2'], name='prodfos'),
-                             pd.Series(oldEnergy['totalEnergy'], name='energy'),
-                             pd.Series(oldEnergy['bioEnergy'], name='energybio'),
-                             pd.Series(oldEnergy['fesEnergy'], name='energyfos'),
-                             pd.Series(oldRsdl['bio+fos'], name='residImp'),
-                             pd.Series(oldRsdl['bioImp'], name='residbio'),
-                             pd.Series(oldRsdl['fossilImp'], name='residfos'),
-                             pd.Series(oldEoL['bftEoL'], name='eolImp'),
-                             pd.Series(oldEoL['bioEoL'], name='eolbio'),
-                             pd.Series(oldEoL['fesTransEoL'], name='eolfos'),
-                             pd.Series(oldProd['bioCO2'] + oldRsdl['bioImp'] + oldEoL['bioEoL'], name='bioCO2'),
-                             pd.Series(oldTrans.sum(axis=1) + chemImp['chemImp'] + oldFuel['fuelImp'] + 
-                                       oldProd['fesCO2'] + oldRsdl['fossilImp'] + oldEoL['fesTransEoL'], name='fossilCO2'),
-                             pd.Series(oldProd['bioCO2'] + oldRsdl['bioImp'], name='g2gbio'),
-                             pd.Series(oldProd['fesCO2'] + oldRsdl['fossilImp'] + oldTrans.sum(axis=1), name='g2gfos')], axis=1)
-        oldSums = pd.concat([oldSums, pd.Series(oldSums['bioCO2'] + oldSums['fossilCO2'], name='totalImp')], axis=1)
-        oldSums = pd.concat([oldSums, pd.Series(oldSums['totalImp'] / cls.prodLD.sum(), name='unitImp')], axis=1, sort=True)
-        
-        newSums = pd.concat([pd.Series(chemImp['chemImp'], name='chemImp'),
-                             pd.Series(newFuel['bioFuelImp'], name='fuelbio'),
-                             pd.Series(newFuel['fesFuelImp'], name='fuelfos'),
-                             pd.Series(newProd['totalCO2'], name='prodImp'),
-                             pd.Series(newProd['bioCO2'], name='prodbio'),
-                             pd.Series(newProd['fesCO2'], name='prodfos'),
-                             pd.Series(newEnergy['totalEnergy'], name='energy'),
-                             pd.Series(newEnergy['bioEnergy'], name='energybio'),
-                             pd.Series(newEnergy['fesEnergy'], name='energyfos'),
-                             pd.Series(newRsdl['bio+fos'], name='residImp'),
-                             pd.Series(newRsdl['bioImp'], name='residbio'),
-                             pd.Series(newRsdl['fossilImp'], name='residfos'),
-                             pd.Series(newEoL['bftEoL'], name='eolImp'),
-                             pd.Series(newEoL['bioEoL'], name='eolbio'),
-                             pd.Series(newEoL['fesTransEoL'], name='eolfos'),
-                             pd.Series(newProd['bioCO2'] + newRsdl['bioImp'] + newEoL['bioEoL'], name='bioCO2'),
-                             pd.Series(newTrans.sum(axis=1) + chemImp['chemImp'] + newFuel['fuelImp'] + 
-                                       newProd['fesCO2'] + newRsdl['fossilImp'] + newEoL['fesTransEoL'], name='fossilCO2'),
-                             pd.Series(newProd['bioCO2'] + newRsdl['bioImp'], name='g2gbio'),
-                             pd.Series(newProd['fesCO2'] + newRsdl['fossilImp'] + newTrans.sum(axis=1), name='g2gfos')],axis=1)
-        newSums = pd.concat([newSums, pd.Series(newSums['bioCO2'] + newSums['fossilCO2'], name='totalImp')], axis=1)
-        newSums = pd.concat([newSums, pd.Series(newSums['totalImp'] / cls.prodLD.sum(), name='unitImp')], axis=1, sort=True)
+        newSums = cls.summaryFrame(cls.summarize(chemImp['chemImp'], newFuel, newProd, newEnergy, newRsdl, newEoL,
+                                                 newTrans.sum(axis=1)))
         
         return {k: v for k,v in zip(['old','new','forest','trade','oldenergy','newenergy'],
-                                    [oldSums,newSums,forestGHG,exportImp,oldEnergy,newEnergy])}
\ No newline at end of file
+                                    [old['oldSums'],newSums,forestGHG,exportImp,old['oldEnergy'],newEnergy])}
+
+class en_emissions_batch(en_emissions): # energy & emissions for a stack of solutions
+
+    def __init__(cls,factors,fProd,rLevel,f2pYld,pulpYld,f2pVolNew,pbpVolNew,consCollNew,exportNew,demandNew):
+        # factors (em_factors) - emissions factors & old data shared by every solution; a spreadsheet name is loaded
+        # fProd, rLevel, f2pYld, pulpYld - as for en_emissions, shared by every solution in the stack
+        # f2pVolNew (array) - fiber to pulp volume (in short tons); solution x fiber x fProdM, fibers in OldData order
+        # pbpVolNew (array) - pulp by product volume; solution x pulp x product, pulps in OldData order
+        # consCollNew (array) - domestic consumption, collection, and recovery; solution x consCollOld row x product
+        # exportNew (array) - new export by rec fiber; solution x fiber, fibers in OldData order
+        # demandNew (array) - new demand; solution x rec level x product, from stackDemand
+        #
+        # stackSolutions builds these arrays from the per-solution inputs of en_emissions
+        uC = 0.907185 # unit conversion of MM US ton to Mg/metric ton
+        if not isinstance(factors, em_factors):
+            factors = em_factors(factors)
+
+        cls.fProd = fProd
+        cls.fProdM = fProd + ['Market']
+        cls.rLevel = rLevel
+        cls.f2pYld = f2pYld
+        cls.pulpYld = pulpYld
+        cls.useFactors(factors)
+
+        cls.f2pVolNew = np.asarray(f2pVolNew, dtype=float) * uC
+        cls.pbpVolNew = np.asarray(pbpVolNew, dtype=float) * uC
+        cls.consCollNew = np.asarray(consCollNew, dtype=float) * uC
+        cls.exportNew = np.asarray(exportNew, dtype=float).reshape(len(cls.f2pVolNew), -1) * uC
+        cls.demandNew = np.asarray(demandNew, dtype=float) * uC
+        cls.scenarios = pd.RangeIndex(len(cls.f2pVolNew), name='scenario')
+
+    def stackFrame(cls,columns,products):
+        # columns (dict) - name -> solution x product array
+        # products (list) - row order of each solution's block
+        pos = positions(cls.fProd, products)
+        data = np.stack([v[:, pos] for v in columns.values()], axis=-1).reshape(-1, len(columns))
+        return pd.DataFrame(data, index = pd.MultiIndex.from_product([cls.scenarios, products], names=['scenario', None]),
+                            columns = list(columns))
+
+    def calculateEmissions(cls):
+        # same keys as en_emissions.calculateEmissions; 'new' and 'newenergy' are indexed by (scenario, product),
+        # 'forest' and 'trade' by scenario, so res['new'].loc[s] matches the single-solution result for solution s
+        old = cls.calculateBaseline()
+        chemImp = old['chemImp'].loc[cls.fProd, 'chemImp'].values
+        chemTrans = old['chemImp'].loc[cls.fProd, 'chemTrans'].values
+        nS = len(cls.scenarios)
+
+        f2pVol = cls.f2pVolNew
+        pbpVol = cls.pbpVolNew
+
+        # EoL
+        newEoL = cls.calculateEoLBatch(cls.eolEmissions, cls.consCollNew)
+
+        # Energy
+        newPulpPct = cls.getEnergyPulpPctBatch(pbpVol)
+        newPYCoeff = cls.getEnergyYldCoeffBatch(f2pVol, pbpVol)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newYldMultiplier = newPYCoeff / old['oldPYCoeff'].loc[cls.pbpVolOld.index].values
+        newYldMultiplier[np.isnan(newYldMultiplier)] = 0
+        newMP = cls.getEnergyMultiProdBatch(newYldMultiplier, newPulpPct)
+        newEnergy = cls.calculateEnergyBatch(pbpVol, cls.demandNew, newMP['rYldMultiProd'], cls.pwpEI.iloc[:-1],
+                                             cls.pwpEI.iloc[-1])
+
+        # Production
+        newProd = cls.calculateProductionBatch(newEnergy)
+
+        # Fuel
+        newFuel = cls.calculateFuelBatch(newEnergy)
+
+        # Residual
+        newRsdl = cls.calculateResidualBatch(pbpVol, f2pVol)
+
+        # Transportation
+        market = [p for p in cls.rPulp + cls.vPulp if 'Deinked' in p or 'Market' in p][:2]
+        fiberTrans = cls.calculateTransBatch(f2pVol[:, :, :len(cls.fProd)], cls.f2pVolOld['TransCode'].values)
+        marketTrans = cls.calculateTransBatch(pbpVol[:, cls.pulpPos(market)], cls.pbpVolOld.loc[market, 'TransCode'].values)
+        # summed skipping NaN, as pandas sums the transport columns of en_emissions
+        newTrans = np.nansum(np.stack([fiberTrans, marketTrans, np.broadcast_to(chemTrans, (nS, len(cls.fProd))),
+                                       newFuel['fuelTrans'], newRsdl['rsdlTrans'], newEoL['eolTrans']]), axis=0)
+
+        # Export
+        exportImp = pd.DataFrame(cls.calculateExportBatch(cls.exportOld, cls.exportNew), index = cls.scenarios,
+                                 columns = cls.chinaVals.columns)
+
+        # FASOM/LURA
+        vRows = cls.fiberPos(cls.vFiber)
+        forestGHG = pd.DataFrame(cls.calculateForestBatch(np.nansum(f2pVol[:, vRows], axis=(1, 2)) -
+                                                          np.nansum(cls.f2pVolOld.iloc[:,:-1].loc[cls.vFiber].values), 90),
+                                 index = cls.scenarios)
+
+        # Summary calcs for plotting
+        newSums = cls.summarize(np.broadcast_to(chemImp, (nS, len(cls.fProd))), newFuel, newProd, newEnergy, newRsdl,
+                                newEoL, newTrans)
+        newSums['unitImp'] = newSums['totalImp'] / cls.prodLD.sum().loc[cls.fProd].values
+
+        return {k: v for k,v in zip(['old','new','forest','trade','oldenergy','newenergy'],
+                                    [old['oldSums'], cls.stackFrame(newSums, sorted(cls.fProd)), forestGHG, exportImp,
+                                     old['oldEnergy'], cls.stackFrame(newEnergy, cls.fProd)])}
+
+
+def positions(index,labels):
+    """
+    :param index: labels in array order, e.g. the index of an OldData table
+    :param labels: labels to look up
+    :return: array of the position of each label in index; a missing label raises KeyError instead of reading row -1
+    """
+    pos = pd.Index(index).get_indexer(labels)
+    if (pos < 0).any():
+        raise KeyError(f'not found: {list(np.asarray(labels)[pos < 0])}')
+    return pos
+
+
+def stackTables(tables,rows,columns):
+    """
+    stack dfs along a leading solution axis, each aligned to the same labels
+
+    :param tables: list of dfs, one per solution
+    :param rows: row labels in array order; a label missing from a table raises KeyError
+    :param columns: column labels in array order
+    :return: array of solution x row x column
+    """
+    rows, columns = pd.Index(rows), pd.Index(columns)
+    stack = np.empty((len(tables), len(rows), len(columns)))
+    for s, t in enumerate(tables):
+        r = slice(None) if t.index.equals(rows) else positions(t.index, rows)
+        c = slice(None) if t.columns.equals(columns) else positions(t.columns, columns)
+        stack[s] = t.values[r][:, c]
+    return stack
+
+
+def stackDemand(demands,fProd,rLevel):
+    """
+    stack demand by rec level, zero padded to the longest product
+
+    :param demands: list of dicts (or dfs) of demand by product, one per solution
+    :param fProd: list of products in current scenario
+    :param rLevel: dict of recycled content levels by product
+    :return: array of solution x rec level x product
+    """
+    nLevel = max(max(len(rLevel[t]), len(d[t])) for d in demands for t in fProd)
+    demand = np.zeros((len(demands), nLevel, len(fProd)))
+    for s, d in enumerate(demands):
+        for j, t in enumerate(fProd):
+            demand[s, :len(d[t]), j] = d[t].values
+    return demand
+
+
+def stackSolutions(factors,fProd,rLevel,solutions):
+    """
+    stack per-solution emissions inputs along a leading scenario axis for en_emissions_batch, aligned to the labels
+    of the old data
+
+    :param factors: em_factors object the batch is evaluated with
+    :param fProd: list of products in current scenario
+    :param rLevel: dict of recycled content levels by product
+    :param solutions: list of (f2pVolNew, pbpVolNew, consCollNew, exportNew, demandNew) as passed to en_emissions
+    :return: tuple of arrays (f2pVolNew, pbpVolNew, consCollNew, exportNew, demandNew)
+    """
+    return (stackTables([sol[0] for sol in solutions], factors.f2pVolOld.index, fProd + ['Market']),
+            stackTables([sol[1] for sol in solutions], factors.pbpVolOld.index, fProd),
+            stackTables([sol[2] for sol in solutions], factors.consCollOld.index, fProd),
+            stackTables([sol[3] for sol in solutions], factors.exportOld.index, ['exportNew'])[:, :, 0],
+            stackDemand([sol[4] for sol in solutions], fProd, rLevel))
@@ -0,0 +1,145 @@
+"""
+Write every result & emissions table of a solved model in one pass: a bundle for machines (a directory of csv
+files, a zip of csv files, or Parquet files) and a freshly written xlsx for people. The input workbook is never
+opened for writing.
+
+    tables = modelTables(model, unit='st')
+    writeBundle(tables, 'results.zip', 'zip', meta=modelMeta(model, 'st'))
+    writeWorkbook(tables, 'results.xlsx')
+"""
+import io
+import json
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+
+# xlsx sheet -> tables stacked top to bottom; tables not listed go on 'Results-Other'
+SHEETS = {'Results-FiberPulp': ['f2pVolNew', 'f2pVolOld', 'pbpVolNew', 'pbpVolOld'],
+          'Results-Demand': ['demandNew', 'oldDemand', 'collNew', 'collDelta', 'exportNew', 'exportOld', 'rsdlNew'],
+          'Results-GHG': ['emissions_old', 'emissions_new', 'emissions_forest', 'emissions_trade',
+                          'emissions_oldenergy', 'emissions_newenergy']}
+
+FORMATS = ['csv', 'zip', 'parquet']
+
+
+def flatTables(tables, prefix=''):
+    """
+    flatten nested dicts of tables (results & emissions) into file-name -> df
+
+    :param tables: dict of name -> df, series, dict of series by product, or nested dict
+    :param prefix: name prefix
+    :return: dict of str -> df
+    """
+    flat = {}
+    for k, v in tables.items():
+        name = f'{prefix}{k}'
+        if isinstance(v, dict) and all(isinstance(x, pd.Series) for x in v.values()) and v:
+            flat[name] = pd.DataFrame.from_dict(v)  # tables by product, e.g. demandNew
+        elif isinstance(v, dict):
+            flat.update(flatTables(v, f'{name}_'))
+        elif isinstance(v, (pd.DataFrame, pd.Series)):
+            flat[name] = v.to_frame() if isinstance(v, pd.Series) else v
+    return flat
+
+
+def modelTables(model, unit='st'):
+    """
+    :param model: solved createModel object with results & emissions
+    :param unit: unit of result tables, a key of modelResults.UNITS
+    :return: dict of table name -> df, result tables first, then emissions_*
+    """
+    tables = flatTables({n: model.results.get(n, unit) for n in model.results.names()})
+    tables.update(flatTables(model.emissions, 'emissions_'))
+    return tables
+
+
+def modelMeta(model, unit='st'):
+    """
+    :return: dict describing the solve, for a bundle's manifest
+    """
+    return {'model': model.m.ModelName, 'status': int(model.status), 'objective': float(model.objVal),
+            'iterations': int(model.iterations), 'unit': unit, 'products': list(model.fProd)}
+
+
+def _manifest(tables, meta):
+    return json.dumps(dict(meta or {}, tables={n: {'rows': len(df), 'columns': [str(c) for c in df.columns]}
+                                               for n, df in tables.items()}), indent=1)
+
+
+def writeBundle(tables, path, fmt='zip', meta=None):
+    """
+    write all tables plus a manifest.json
+
+    :param tables: dict of name -> df, e.g. from modelTables
+    :param path: output directory for 'csv' & 'parquet', zip file or file-like object for 'zip'
+    :param fmt: 'csv' (one file per table), 'zip' (csv files in one zip) or 'parquet' (needs pyarrow)
+    :param meta: dict of solve details for the manifest, e.g. from modelMeta
+    :return: list of written paths
+    """
+    if fmt == 'zip':
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name, df in tables.items():
+                with io.TextIOWrapper(z.open(f'{name}.csv', 'w'), encoding='utf-8', newline='') as f:
+                    df.to_csv(f)
+            z.writestr('manifest.json', _manifest(tables, meta))
+        return [path]
+    if fmt == 'parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Parquet export needs pyarrow; install it or use the 'zip' or 'csv' format") from None
+    elif fmt != 'csv':
+        raise ValueError(f"unknown format '{fmt}'; choose from {', '.join(FORMATS)}")
+
+    os.makedirs(path, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        paths.append(os.path.join(path, f'{name}.{fmt}'))
+        if fmt == 'csv':
+            df.to_csv(paths[-1])
+        else:
+            df.set_axis([str(c) for c in df.columns], axis=1).to_parquet(paths[-1])  # parquet needs str columns
+    paths.append(os.path.join(path, 'manifest.json'))
+    with open(paths[-1], 'w') as f:
+        f.write(_manifest(tables, meta))
+    return paths
+
+
+def _cell(v):
+    """
+    value openpyxl can write: python scalars, NaN as an empty cell, other labels as str
+    """
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and np.isnan(v):
+        return None
+    return v if isinstance(v, (int, float, str)) or v is None else str(v)
+
+
+def writeWorkbook(tables, file, sheets=SHEETS):
+    """
+    write tables to a new xlsx in openpyxl's write-only mode, streaming rows; each table is a title row, a header
+    row and its rows, with a blank row after it
+
+    :param tables: dict of name -> df, e.g. from modelTables
+    :param file: path or file-like object
+    :param sheets: dict of sheet name -> table names in order
+    """
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    listed = {n for names in sheets.values() for n in names}
+    layout = list(sheets.items()) + [('Results-Other', [n for n in tables if n not in listed])]
+    for sheet, names in layout:
+        names = [n for n in names if n in tables]
+        if not names:
+            continue
+        ws = wb.create_sheet(sheet)
+        for name in names:
+            df = tables[name]
+            ws.append([name])
+            ws.append([_cell(df.index.name) or ''] + [_cell(c) for c in df.columns])
+            for label, row in zip(df.index, df.itertuples(index=False)):
+                ws.append([_cell(label)] + [_cell(v) for v in row])
+            ws.append([])
+    wb.save(file)
@@ -1,59 +1,76 @@
 import pandas as pd
 import numpy as np
 import gurobipy as gp
+from sheetGrid import readSheets, cutTable
+from dataCache import workbookKey, loadTables, saveTables
+import emissionsCalcV4 as em
+from metrics import stage, timed
 
 
 class impData:
 
-    def __init__(self, file, fProd):
+    @timed('impData')
+    def __init__(self, file, fProd, cacheDir=None):
         """
         read in and clean data
 
         :param file: data spreadsheet to be read in
         :param fProd: list of strings for products in system
+        :param cacheDir: directory for cached tables keyed by workbook content & fProd; None to always read Excel
         """
         self.fileName = file
+        self.cacheKey = None
+        if cacheDir is not None:
+            self.cacheKey = workbookKey(file, fProd)
+            cached = loadTables(cacheDir, self.cacheKey)
+            if cached is not None:
+                self.__dict__.update(cached)
+                return
+
         # read in from spreadsheet
-        with pd.ExcelFile(self.fileName) as x:
-            self.fiberList = pd.read_excel(x, 'Fiber', usecols="B:G", skiprows=1, nrows=21)
-            self.fiber2pulpYield = pd.read_excel(x, 'Fiber', usecols="I:O", skiprows=1, nrows=21)
-
-            self.pulpList = pd.read_excel(x, 'Pulp', usecols="B:E", skiprows=1, nrows=14)
-            self.minPulp = pd.read_excel(x, 'Pulp', usecols="H:M", skiprows=1, nrows=14)
-            self.maxrPulp = {}
-            self.maxvPulp = {}
-            for i in range(len(fProd)):
-                self.maxrPulp[fProd[i]] = pd.read_excel(x, 'Pulp', usecols="H:N", skiprows=19 + i * 8, nrows=5)
-                self.maxvPulp[fProd[i]] = pd.read_excel(x, 'Pulp', usecols="Q:W", skiprows=19 + i * 8, nrows=5)
-
-            self.oldDemand = pd.read_excel(x, 'Demand', usecols="F:K", skiprows=1, nrows=5)
-            self.rLevel = pd.read_excel(x, 'Demand', usecols="F:K", skiprows=16, nrows=5)
-            self.minDemand = pd.read_excel(x, 'Demand', usecols="N:S", skiprows=1, nrows=5)
-            self.maxDemand = pd.read_excel(x, 'Demand', usecols="N:S", skiprows=10, nrows=5)
-
-            self.channelYield = pd.read_excel(x, 'Recovery', usecols="C:F", skiprows=1, nrows=1)
-            self.productUse = pd.read_excel(x, "Recovery", usecols="C:G", skiprows=5, nrows=6)
-            self.colOldRate = pd.read_excel(x, "Recovery", usecols="C:G", skiprows=24, nrows=6)
-            self.colMaxRate = pd.read_excel(x, "Recovery", usecols="C:G", skiprows=35, nrows=6)
-            self.colCost = pd.read_excel(x, "Recovery", usecols="C:F", skiprows=44, nrows=6)
-            self.colByProd = {}
-            for i in range(len(fProd)):
-                cols = [y + 4 * i for y in range(14, 18)]
-                self.colByProd[fProd[i]] = pd.read_excel(x, 'Recovery', usecols=cols, skiprows=31,
-                                                         nrows=16, header=None,
-                                                         names=[x for x in self.channelYield.keys()])
-            self.rConsExp = pd.read_excel(x, 'Recovery', usecols="U:V", skiprows=5, nrows=16)
-
-            self.recipeYield = pd.read_excel(x, "Recipe", usecols="L:R", skiprows=1, nrows=21)
-            self.recipeMin = pd.read_excel(x, "Recipe", usecols="T:Z", skiprows=1, nrows=16)
-            self.recipeMax = pd.read_excel(x, "Recipe", usecols="T:Z", skiprows=20, nrows=16)
-
-            self.nonFiberPct = pd.read_excel(x, "nonFiber", usecols="A:B,E:J", skiprows=2, nrows=3, index_col=0)
-
-            self.f2pVolOld = pd.read_excel(x, 'OldData', usecols="A:H", skiprows=1, nrows=21, index_col=0)
-            self.exportOld = pd.read_excel(x, 'OldData', usecols="E:F", skiprows=31, nrows=16, index_col=0)
-            self.pbpVolOld = pd.read_excel(x, 'OldData', usecols="K:Q", skiprows=1, nrows=14, index_col=0)
-            self.consCollOld = pd.read_excel(x, 'OldData', usecols="K:Q", skiprows=29, nrows=3, index_col=0)
+        with stage('readWorkbook'), pd.ExcelFile(self.fileName) as x:
+            sheet = readSheets(x, ['Fiber', 'Pulp', 'Demand', 'Recovery', 'Recipe', 'nonFiber', 'OldData'])
+
+        # cut each table out of its sheet grid by range
+        self.fiberList = cutTable(sheet['Fiber'], usecols="B:G", skiprows=1, nrows=21)
+        self.fiber2pulpYield = cutTable(sheet['Fiber'], usecols="I:O", skiprows=1, nrows=21)
+
+        self.pulpList = cutTable(sheet['Pulp'], usecols="B:E", skiprows=1, nrows=14)
+        self.minPulp = cutTable(sheet['Pulp'], usecols="H:M", skiprows=1, nrows=14)
+        self.maxrPulp = {}
+        self.maxvPulp = {}
+        for i in range(len(fProd)):
+            self.maxrPulp[fProd[i]] = cutTable(sheet['Pulp'], usecols="H:N", skiprows=19 + i * 8, nrows=5)
+            self.maxvPulp[fProd[i]] = cutTable(sheet['Pulp'], usecols="Q:W", skiprows=19 + i * 8, nrows=5)
+
+        self.oldDemand = cutTable(sheet['Demand'], usecols="F:K", skiprows=1, nrows=5)
+        self.rLevel = cutTable(sheet['Demand'], usecols="F:K", skiprows=16, nrows=5)
+        self.minDemand = cutTable(sheet['Demand'], usecols="N:S", skiprows=1, nrows=5)
+        self.maxDemand = cutTable(sheet['Demand'], usecols="N:S", skiprows=10, nrows=5)
+
+        self.channelYield = cutTable(sheet['Recovery'], usecols="C:F", skiprows=1, nrows=1)
+        self.productUse = cutTable(sheet['Recovery'], usecols="C:G", skiprows=5, nrows=6)
+        self.colOldRate = cutTable(sheet['Recovery'], usecols="C:G", skiprows=24, nrows=6)
+        self.colMaxRate = cutTable(sheet['Recovery'], usecols="C:G", skiprows=35, nrows=6)
+        self.colCost = cutTable(sheet['Recovery'], usecols="C:F", skiprows=44, nrows=6)
+        self.colByProd = {}
+        for i in range(len(fProd)):
+            cols = [y + 4 * i for y in range(14, 18)]
+            self.colByProd[fProd[i]] = cutTable(sheet['Recovery'], usecols=cols, skiprows=31,
+                                                nrows=16, header=None,
+                                                names=[x for x in self.channelYield.keys()])
+        self.rConsExp = cutTable(sheet['Recovery'], usecols="U:V", skiprows=5, nrows=16)
+
+        self.recipeYield = cutTable(sheet['Recipe'], usecols="L:R", skiprows=1, nrows=21)
+        self.recipeMin = cutTable(sheet['Recipe'], usecols="T:Z", skiprows=1, nrows=16)
+        self.recipeMax = cutTable(sheet['Recipe'], usecols="T:Z", skiprows=20, nrows=16)
+
+        self.nonFiberPct = cutTable(sheet['nonFiber'], usecols="A:B,E:J", skiprows=2, nrows=3, index_col=0)
+
+        self.f2pVolOld = cutTable(sheet['OldData'], usecols="A:H", skiprows=1, nrows=21, index_col=0)
+        self.exportOld = cutTable(sheet['OldData'], usecols="E:F", skiprows=31, nrows=16, index_col=0)
+        self.pbpVolOld = cutTable(sheet['OldData'], usecols="K:Q", skiprows=1, nrows=14, index_col=0)
+        self.consCollOld = cutTable(sheet['OldData'], usecols="K:Q", skiprows=29, nrows=3, index_col=0)
 
         # break up into lists, tuplelists, and tupledicts
         self.rFiber, self.rCat, self.rFCost, self.rExCost = gp.multidict({k: [l, m, n]
@@ -166,3 +183,18 @@ class impData:
             self.oldDemand[t].index = self.rLevel[t]
             self.minDemand[t].index = self.rLevel[t]
             self.maxDemand[t].index = self.rLevel[t]
+
+        if cacheDir is not None:
+            saveTables(cacheDir, self.cacheKey, {k: v for k, v in vars(self).items()
+                                                 if k not in ('fileName', 'cacheKey')})
+
+    def emFactors(self):
+        """
+        emissions factors & old data for this workbook, read on first use and shared by every model built from it
+
+        :return: em_factors object
+        """
+        if getattr(self, '_emFactors', None) is None:
+            with stage('emFactors'):
+                self._emFactors = em.em_factors(self.fileName)
+        return self._emFactors
@@ -2,48 +2,151 @@ import streamlit as st # need 0.89.0, 1.7.0 too late
 import numpy as np
 import pandas as pd # need at least 1.4.1
 import matplotlib.pyplot as plt
-from fromTerminal import *
+import io
+import os
+import time
 from impData import *
 from createModel import *
 from scenarios import *
 from plots import *
-from gurobipy import GRB
+from metrics import stage
+from solveJobs import solveJob
+from solverLog import logChannel
+from exportResults import modelTables, modelMeta, writeBundle, writeWorkbook
+from resultsStore import resultsStore
+from batchRun import applyScenarios
+
+STORE = 'fiberResults.sqlite'  # results store shared by all sessions
 
 
 ## BUTTON DEFINITIONS
 def load_data(file,fProd):
     if 'data' not in st.session_state:
-        st.session_state.data = impData(file, fProd)
+        st.session_state.data = impData(file, fProd, cacheDir='.fiberCache')
 
 def create_model(data,fProd):
-    # if 'model' not in st.session_state:
-    st.session_state.model = createModel('2019data', data, fProd)
+    # base model is built once per dataset & product selection; each new model is a copy of it
+    st.session_state.model = baseModel(data, fProd).copy('2019data')
+    st.session_state.spec = []  # scenarios applied so far, as batchRun specs, for the results store
 
 def apply_settings(scene, scene_tog):
-    if 'model' in st.session_state:
+    if 'model' in st.session_state and not solving():  # the model belongs to the solver until its job ends
+        spec = []
         if scene == 'Increase average recycled content':
-            setfAvg(st.session_state.model, target, incr)
-
+            spec.append({'scenario': 'fAvg', 'target': target, 'incr': incr})
         elif scene == 'Decrease mixed paper yield':
-            setmpYield(st.session_state.model, perc)
+            spec.append({'scenario': 'mpYield', 'perc': perc})
         elif scene == 'Change demand':
-            setDemand(st.session_state.model, prod, perc)
+            spec.append({'scenario': 'demand', 'prod': prod, 'perc': perc})
 
         if 'Contamination by recovery' in scene_tog:
-            setContam(st.session_state.model, recovery, contam_num)
+            spec.append({'scenario': 'contam', 'recovery': recovery, 'custom_cm': contam_num})
 
         if 'Fiber degradation' in scene_tog:
-            fiberDeg(st.session_state.model, fibdeg_num)
+            spec.append({'scenario': 'fiberDeg', 'custom_fb': fibdeg_num})
+
+        applyScenarios(st.session_state.model, spec)
+        st.session_state.spec = st.session_state.get('spec', []) + spec
 
 # def reset_settings(model):
 #     st.session_state.model = resetScenarios(model)
 #     # scene_tog.clear()
 
-def run_optimization(model, plc1):
-    with st_stdout("info", plc1):
-        model.runModel()
-    if model.solved:
-        model.getResults()
+def run_optimization(model):
+    # solve on the server's shared background pool; the page polls the job until it finishes
+    if not solving():
+        log = logChannel(os.path.join('.fiberLogs', f"{model.m.ModelName}-{time.strftime('%Y%m%d-%H%M%S')}.log"))
+        st.session_state.job = solveJob(model, cacheDir='.fiberSolves', log=log)  # repeated scenarios are read back instead of re-solved
+
+def cancel_optimization():
+    if 'job' in st.session_state:
+        st.session_state.job.cancel()
+
+def solving():
+    return 'job' in st.session_state and not st.session_state.job.finished()
+
+def push_log(box, log, force=False):
+    # append the lines logged since the last push to the page, at most once per log.interval
+    new = log.pull(force)
+    if new is None:
+        return
+    skipped, lines = new
+    if skipped:
+        box.text(f'... {skipped} lines not shown; the full log is in {log.path}')
+    if lines:
+        box.text('\n'.join(lines))
+
+def collect_job(job):
+    # a finished job's outcome becomes the displayed solution
+    st.session_state.views = {}  # new solution: figures & tables are rebuilt on next display
+    if job.diagnosis is not None:  # rows whose relaxation restores feasibility, found on a time-bounded copy
+        st.session_state.diagnosis = job.diagnosis
+    if job.state == 'done':  # keep every solved or infeasible scenario beyond the session
+        with resultsStore(STORE) as store:
+            store.addModel(job.model, st.session_state.get('spec', []), label='app')
+    del st.session_state.job
+
+
+## CACHED VIEWS
+def cached_view(name, build):
+    # reruns reuse what was built for the current solution; run_optimization clears the cache
+    views = st.session_state.setdefault('views', {})
+    if name not in views:
+        views[name] = build()
+    return views[name]
+
+def render_figure(plot, arg):
+    # draw one plots.py figure and keep it as png bytes, so reruns skip matplotlib
+    fig, ax = plt.subplots()
+    plot(arg, ax)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buf.getvalue()
+
+def export_bytes(model, kind):
+    # every result & emissions table in one pass, as an xlsx or a zip of csv files
+    tables, buf = modelTables(model), io.BytesIO()
+    with stage('export', format=kind):
+        if kind == 'xlsx':
+            writeWorkbook(tables, buf)
+        else:
+            writeBundle(tables, buf, 'zip', modelMeta(model))
+    return buf.getvalue()
+
+def result_tables(model):
+    # (caption, table) pairs shown under the results, either may be None
+    res, ems = model.results, model.emissions
+    count = '{:,.0f}'
+    bioEm = ems['new']['g2gbio'] - ems['old']['g2gbio'] + ems['new']['eolbio'] - ems['old']['eolbio']
+    fosEm = ems['new']['g2gfos'] - ems['old']['g2gfos'] + ems['new']['eolfos'] - ems['old']['eolfos']
+    exportShift = pd.DataFrame(res.exportNew.values - res.exportOld.values, index=res.exportNew.index)
+    return [
+        ('New fiber-to-pulp distribution (short tons)', res.f2pVolNew.style.format(count, precision=0)),
+        ('Old fiber-to-pulp distribution (short tons)', res.f2pVolOld.style.format(count, precision=0)),
+        ('New pulp distribution by product (short tons)', res.pbpVolNew.style.format(count, precision=0)),
+        ('Old pulp distribution by product (short tons)', res.pbpVolOld.style.format(count, precision=0)),
+        ('New demand by product (short tons)', pd.DataFrame.from_dict(res.demandNew).fillna(0).style.format(count, precision=0)),
+        ('Old demand by product (short tons)', pd.DataFrame.from_dict(res.oldDemand).fillna(0).style.format(count, precision=0)),
+        ('New collection from consumption channels', res.collNew.style.format('{:.1%}')),
+        ('Change in collection from consumption channels', res.collDelta.style.format('{:.1%}')),
+        ('Additional collection from consumption channels', res.addlRec),
+        (f"Total additional collection from consumption channels (short tons): {res.addlRec.sum()}", None),
+        ('New export volume by fiber grade (short tons)', res.exportNew.style.format(count, precision=0)),
+        ('Change in export volume by fiber grade (short tons)', exportShift.style.format(count, precision=0)),
+        (f"Total shift in export (short tons): {res.exportNew.values.sum() - res.exportOld.values.sum()}", None),
+        ('New residuals volume by fiber grade (short tons)', pd.DataFrame(res.rsdlNew).style.format(count, precision=0)),
+        ('New collection and recovery volume (short tons)', res.consCollNew.style.format(count, precision=0)),
+        ('Direct energy consumption at mills (GJ)', ems['new']['energybio'] - ems['old']['energybio']),
+        (None, ems['new']['energyfos'] - ems['old']['energyfos']),
+        ('Net GHG emissions (tons CO2 eq/yr)', ems['forest']['bioGHG']),
+        (None, bioEm),
+        (f"Total bioEm is {bioEm.sum()}", ems['forest']['bioGHG'] + bioEm.sum()),
+        (None, ems['forest']['fosGHG']),
+        (None, fosEm),
+        (f"Total fosEm is {fosEm.sum()}", None),
+        (f"fosEm from trade is {ems['trade'].sum()}", ems['forest']['fosGHG'] + fosEm.sum() + ems['trade'].sum()),
+    ]
 
 # def clear_model(model):
 #     model.m.reset(0) # reset model to unsolved state
@@ -133,13 +236,7 @@ if 'data' in st.session_state:
         with sc_col1:
             sc_set_but = st.button("Apply scenarios settings", on_click=apply_settings, args=(st.session_state.scene, st.session_state.scene_tog, ))
 
-            allConstr = {}
-            for i in [i for i in st.session_state.model.m.getConstrs()]:
-                name = i.getAttr(GRB.Attr.ConstrName).split("[", 1)
-                if name[0] in allConstr.keys():
-                    allConstr[name[0]].append(i)
-                else:
-                    allConstr.update({name[0]: [i]})
+            allConstr = st.session_state.model.constrs  # family name -> constraint handles
 
             # st.write(allConstr)
 
@@ -159,7 +256,22 @@ if 'data' in st.session_state:
         sc_screen5 = st.empty()
         opt_col1, opt_col2 = st.columns(2)
         with opt_col1:
-            om_but = st.button("Solve fiber distribution model", key='om_but', on_click=run_optimization, args=(st.session_state.model, sc_screen5, ))
+            om_but = st.button("Solve fiber distribution model", key='om_but', on_click=run_optimization, args=(st.session_state.model, ))
+        with opt_col2:
+            if solving():
+                st.button("Cancel solve", key='cancel_but', on_click=cancel_optimization)
+
+        # poll a running solve; a click on Cancel reruns the page and interrupts this loop
+        if 'job' in st.session_state:
+            job = st.session_state.job
+            log_box = st.expander('Solver log', expanded=True)
+            while not job.finished():
+                sc_screen5.info(job.describe())
+                push_log(log_box, job.log)
+                time.sleep(0.1)
+            sc_screen5.info(job.describe())
+            push_log(log_box, job.log, force=True)
+            collect_job(job)
 
         # with opt_col2: # prepare to create new model
         #     rm_but = st.button("Clear model", key='rm_but', on_click=clear_model, args=(st.session_state.model, ))
@@ -169,208 +281,45 @@ if 'data' in st.session_state:
             st.session_state.fail = ""
             # plot data
             plot_all = st.expander('Plot results')
-            with plot_all:
-                plt_col1, plt_col2 = st.columns(2)
-                with plt_col1:
-                    st.write('### Fiber Distribution')
-                    fig1, ax1 = plt.subplots()
-                    fUseChange(st.session_state.model, ax1)
-                    st.pyplot(fig1)
-
-                    fig2, ax2 = plt.subplots()
-                    fUseByProd(st.session_state.model, ax2)
-                    st.pyplot(fig2)
-
-                    fig3, ax3 = plt.subplots()
-                    fSources(st.session_state.model, ax3)
-                    st.pyplot(fig3)
-
-                    fig4, ax4 = plt.subplots()
-                    mxpShift(st.session_state.model, ax4)
-                    st.pyplot(fig4)
-
-                    # fig5, ax5 = plt.subplots()
-                    # fig6, ax6 = plt.subplots()
-                    # fig7, ax7 = plt.subplots()
-                    # fig8, ax8 = plt.subplots()
-                    # fig9, ax9 = plt.subplots()
-                    # fShiftByCat(st.session_state.model, [ax5, ax6, ax7, ax8, ax9])
-                    # st.pyplot(fig5)
-                    # st.pyplot(fig6)
-                    # st.pyplot(fig7)
-                    # st.pyplot(fig8)
-                    # st.pyplot(fig9)
-
-                with plt_col2:
-                    st.write('### Energy & Emissions')
-                    fig10, ax10 = plt.subplots()
-                    dirEnergyCons(st.session_state.model.emissions, ax10)
-                    st.pyplot(fig10)
-
-                    fig11, ax11 = plt.subplots()
-                    ghg_notForEoL(st.session_state.model.emissions, ax11)
-                    st.pyplot(fig11)
-
-                    fig12, ax12 = plt.subplots()
-                    ghg_wForEoL(st.session_state.model.emissions, ax12)
-                    st.pyplot(fig12)
-
-                    fig13, ax13 = plt.subplots()
-                    emBreakdown(st.session_state.model.emissions, ax13)
-                    st.pyplot(fig13)
-
-                    fig14, ax14 = plt.subplots()
-                    emNet(st.session_state.model.emissions, ax14)
-                    st.pyplot(fig14)
+            with plot_all, stage('plots'):
+                # figures are drawn only on request, then kept as images until the next solve
+                if st.checkbox('Draw plots', key='show_plots'):
+                    plt_col1, plt_col2 = st.columns(2)
+                    with plt_col1:
+                        st.write('### Fiber Distribution')
+                        for plot in [fUseChange, fUseByProd, fSources, mxpShift]:
+                            st.image(cached_view(plot.__name__, lambda: render_figure(plot, st.session_state.model)),
+                                     use_column_width=True)
+
+                    with plt_col2:
+                        st.write('### Energy & Emissions')
+                        for plot in [dirEnergyCons, ghg_notForEoL, ghg_wForEoL, emBreakdown, emNet]:
+                            st.image(cached_view(plot.__name__, lambda: render_figure(plot, st.session_state.model.emissions)),
+                                     use_column_width=True)
 
 
             # make data available to save
             data_all = st.expander('Save results')
-            with data_all: # TODO: write to new worksheet on Excel file & would it print right if fProd changes?
-                # save to Excel file
+            with data_all:
+                # new files, built once per solve; the uploaded workbook is never written to
+                stem = os.path.splitext(getattr(uploaded_file, 'name', 'fiber'))[0]
                 sv_col1, sv_col2 = st.columns(2)
                 with sv_col1:
-                    sv_but = st.button("Save results to spreadsheet", key="sv_but")
-                    st.session_state.save = sv_but
-                    if sv_but:
-                        with pd.ExcelWriter(uploaded_file.name, mode='a', if_sheet_exists='overlay', engine='openpyxl') as writer:
-
-                            st.session_state.model.f2pVolNew.to_excel(writer, sheet_name='Results-FiberPulp', startrow=2)
-                            st.session_state.model.pbpVolNew.to_excel(writer, sheet_name='Results-FiberPulp', startrow=2, startcol=10)
-
-                            pd.DataFrame.from_dict(st.session_state.model.demandNew).to_excel(writer, sheet_name='Results-Demand', startrow=2)
-                            st.session_state.model.collNew.to_excel(writer, sheet_name='Results-Demand', startrow=13)
-                            st.session_state.model.exportNew.to_excel(writer, sheet_name='Results-Demand', startrow=22)
-                            st.session_state.model.rsdlNew.to_excel(writer, sheet_name='Results-Demand', startrow=22, startcol=5)
-
-                            st.session_state.model.emissions['old']['bioCO2'].to_excel(writer, sheet_name='Results-GHG',
-                                                                                        startrow=2)
-                            st.session_state.model.emissions['old']['fossilCO2'].to_excel(writer, sheet_name='Results-GHG',
-                                                                                       startrow=11)
-                            st.session_state.model.emissions['old']['g2gbio'].to_excel(writer,
-                                                                                          sheet_name='Results-GHG',
-                                                                                          startrow=20)
-                            st.session_state.model.emissions['old']['g2gfos'].to_excel(writer,
-                                                                                          sheet_name='Results-GHG',
-                                                                                          startrow=29)
-                            st.session_state.model.emissions['old']['totalImp'].to_excel(writer,
-                                                                                       sheet_name='Results-GHG',
-                                                                                       startrow=38)
-                            st.session_state.model.emissions['old']['unitImp'].to_excel(writer,
-                                                                                         sheet_name='Results-GHG',
-                                                                                         startrow=46)
-
-                            st.session_state.model.emissions['new']['bioCO2'].to_excel(writer, sheet_name='Results-GHG',
-                                                                                       startrow=2, startcol=3)
-                            st.session_state.model.emissions['new']['fossilCO2'].to_excel(writer,
-                                                                                          sheet_name='Results-GHG',
-                                                                                          startrow=11, startcol=3)
-                            st.session_state.model.emissions['new']['g2gbio'].to_excel(writer,
-                                                                                       sheet_name='Results-GHG',
-                                                                                       startrow=20, startcol=3)
-                            st.session_state.model.emissions['new']['g2gfos'].to_excel(writer,
-                                                                                       sheet_name='Results-GHG',
-                                                                                       startrow=29, startcol=3)
-                            st.session_state.model.emissions['new']['totalImp'].to_excel(writer,
-                                                                                         sheet_name='Results-GHG',
-                                                                                         startrow=38, startcol=3)
-                            st.session_state.model.emissions['new']['unitImp'].to_excel(writer,
-                                                                                        sheet_name='Results-GHG',
-                                                                                        startrow=46, startcol=3)
-
-                            st.session_state.model.emissions['forest']['bioGHG'].to_excel(writer,
-                                                                                        sheet_name='Results-GHG',
-                                                                                        startrow=57, startcol=0)
-                            st.session_state.model.emissions['forest']['fosGHG'].to_excel(writer,
-                                                                                          sheet_name='Results-GHG',
-                                                                                          startrow=57, startcol=3)
-
-                            st.session_state.model.emissions['trade'].to_excel(writer,
-                                                                               sheet_name='Results-GHG',
-                                                                               startrow=61, startcol=0)
-
-                            st.session_state.model.emissions['oldenergy'].to_excel(writer,
-                                                                               sheet_name='Results-GHG',
-                                                                               startrow=65, startcol=0)
-                            st.session_state.model.emissions['newenergy'].to_excel(writer,
-                                                                                   sheet_name='Results-GHG',
-                                                                                   startrow=65, startcol=6)
-
+                    st.download_button("Download results spreadsheet",
+                                       cached_view('xlsx', lambda: export_bytes(st.session_state.model, 'xlsx')),
+                                       file_name=f'{stem}-results.xlsx', key='sv_xlsx',
+                                       mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
                 with sv_col2:
-                    if st.session_state.save:
-                        st.success('Results saved!')
-
-                # display data
-                st.write('New fiber-to-pulp distribution (short tons)')
-                st.dataframe(st.session_state.model.f2pVolNew.style.format('{:,.0f}', precision=0))
-                # st.dataframe(st.session_state.model.f2pVolNew.iloc[:16,:].sum() - st.session_state.model.f2pVolOld.iloc[:16,:].sum())
-                # st.dataframe(st.session_state.model.f2pVolNew.iloc[16:,:].sum() - st.session_state.model.f2pVolOld.iloc[16:,:].sum())
-                # st.write(f"Total virgin pulpwood (new) = {sum(st.session_state.model.f2pVolNew.iloc[16:,:4].sum()):,.0f}")
-                # st.write(f"Total virgin pulpwood (new) = {sum(st.session_state.model.f2pVolNew.iloc[16:, :4].sum()):,.0f}")
-                st.write('Old fiber-to-pulp distribution (short tons)')
-                st.dataframe(st.session_state.model.f2pVolOld.style.format('{:,.0f}', precision=0))
-                # st.write(f"Total virgin pulpwood (old) = {sum(st.session_state.model.f2pVolOld.iloc[16:, :4].sum()):,.0f}")
-                # st.write(f"Total virgin pulpwood (old) = {sum(st.session_state.model.f2pVolOld.iloc[16:, :4].sum()):,.0f}")
-
-                st.write('New pulp distribution by product (short tons)')
-                st.dataframe(st.session_state.model.pbpVolNew.style.format('{:,.0f}', precision=0))
-                # st.write(f"Total deinked market pulp = {st.session_state.model.pbpVolNew.loc['RecPulp_Deinked'].sum():,.0f}")
-                # st.write(f"Total virgin market pulp = {st.session_state.model.pbpVolNew.loc['VirPulp_Market'].sum():,.0f}")
-                st.write('Old pulp distribution by product (short tons)')
-                st.dataframe(st.session_state.model.pbpVolOld.style.format('{:,.0f}', precision=0))
-                # st.write(f"Total deinked market pulp = {st.session_state.model.pbpVolOld.loc['RecPulp_Deinked'].sum():,.0f}")
-                # st.write(f"Total virgin market pulp = {st.session_state.model.pbpVolOld.loc['VirPulp_Market'].sum():,.0f}")
-
-                st.write('New demand by product (short tons)')
-                # model.demandNew # dict
-                st.dataframe(pd.DataFrame.from_dict(st.session_state.model.demandNew).fillna(0).style.format('{:,.0f}', precision=0))
-                # st.write(f"Total demand = {pd.DataFrame.from_dict(st.session_state.model.demandNew).fillna(0).sum()}")
-                st.write('Old demand by product (short tons)')
-                st.dataframe(pd.DataFrame.from_dict(st.session_state.model.oldDemand).fillna(0).style.format('{:,.0f}', precision=0))
-
-                st.write('New collection from consumption channels')
-                st.dataframe(st.session_state.model.collNew.style.format('{:.1%}'))
-                st.write('Change in collection from consumption channels')
-                st.dataframe(st.session_state.model.collDelta.style.format('{:.1%}'))
-                st.write('Additional collection from consumption channels')
-                st.dataframe(st.session_state.model.addlRec)
-                st.write(f"Total additional collection from consumption channels (short tons): {st.session_state.model.addlRec.sum()}")
-                # st.write(pd.DataFrame.from_dict(st.session_state.data.colCost))
-
-                # st.write('Old collection from consumption channels')
-                # model.sCollectOld
-
-                st.write('New export volume by fiber grade (short tons)')
-                st.dataframe(st.session_state.model.exportNew.style.format('{:,.0f}', precision=0))
-                st.write('Change in export volume by fiber grade (short tons)')
-                st.dataframe(pd.DataFrame(st.session_state.model.exportNew.values - st.session_state.model.exportOld.values,
-                                          index=st.session_state.model.exportNew.index).style.format('{:,.0f}', precision=0))
-                st.write(f"Total shift in export (short tons): {st.session_state.model.exportNew.values.sum() - st.session_state.model.exportOld.values.sum()}")
-
-                st.write('New residuals volume by fiber grade (short tons)')
-                st.dataframe(pd.DataFrame(st.session_state.model.rsdlNew).style.format('{:,.0f}', precision=0))
-
-                st.write('New collection and recovery volume (short tons)')
-                st.dataframe(st.session_state.model.consCollNew.style.format('{:,.0f}', precision=0))
-
-                st.write('Direct energy consumption at mills (GJ)')
-                st.dataframe(st.session_state.model.emissions['new']['energybio'] - st.session_state.model.emissions['old']['energybio'])
-                st.dataframe(st.session_state.model.emissions['new']['energyfos'] - st.session_state.model.emissions['old']['energyfos'])
-
-                st.write('Net GHG emissions (tons CO2 eq/yr)')
-                st.dataframe(st.session_state.model.emissions['forest']['bioGHG'])
-                bioEm = st.session_state.model.emissions['new']['g2gbio'] - st.session_state.model.emissions['old']['g2gbio'] + \
-                        st.session_state.model.emissions['new']['eolbio'] - st.session_state.model.emissions['old']['eolbio']
-                st.dataframe(bioEm)
-                st.write(f"Total bioEm is {bioEm.sum()}")
-                st.dataframe(st.session_state.model.emissions['forest']['bioGHG'] + bioEm.sum())
-                st.dataframe(st.session_state.model.emissions['forest']['fosGHG'])
-                fosEm = st.session_state.model.emissions['new']['g2gfos'] - st.session_state.model.emissions['old']['g2gfos'] + \
-                        st.session_state.model.emissions['new']['eolfos'] - st.session_state.model.emissions['old']['eolfos']
-                st.dataframe(fosEm)
-                st.write(f"Total fosEm is {fosEm.sum()}")
-                st.write(f"fosEm from trade is {st.session_state.model.emissions['trade'].sum()}")
-                st.dataframe(st.session_state.model.emissions['forest']['fosGHG'] + fosEm.sum() + st.session_state.model.emissions['trade'].sum())
+                    st.download_button("Download all tables (zipped csv)",
+                                       cached_view('zip', lambda: export_bytes(st.session_state.model, 'zip')),
+                                       file_name=f'{stem}-results.zip', key='sv_zip', mime='application/zip')
+
+                # display data, formatted once per solve
+                for caption, table in cached_view('tables', lambda: result_tables(st.session_state.model)):
+                    if caption:
+                        st.write(caption)
+                    if table is not None:
+                        st.dataframe(table)
 
 
         else:
@@ -379,4 +328,7 @@ if 'data' in st.session_state:
                 st.session_state.fail = "No solution found. Please adjust the settings and try again."
 
             st.write(st.session_state.fail)
+            if 'model' in st.session_state and st.session_state.model.failed and 'diagnosis' in st.session_state:
+                st.write('Constraints in conflict, with the change to each that makes the model feasible:')
+                st.dataframe(st.session_state.diagnosis['conflicts'])
 
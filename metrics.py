@@ -0,0 +1,171 @@
+"""
+Per-stage instrumentation: wall time, CPU time and peak memory of each pipeline stage (workbook parse, model build,
+scenarios, update, optimize, results, emissions, plots & export), kept in memory and optionally written as json lines.
+
+    import metrics
+    metrics.enable('metrics.jsonl')
+    ...
+    print(metrics.summary())
+
+Setting the FIBER_METRICS environment variable to a file path enables it at import, e.g. for the Streamlit app.
+Stages nest; each record names its parent. Recording is off by default and then costs next to nothing.
+"""
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_RECORDS = 10000  # records kept in memory for summary()
+
+_records = collections.deque(maxlen=MAX_RECORDS)
+_out = None  # open json lines file, or None
+_enabled = False
+_memory = False
+_local = threading.local()  # per thread: stack of active stages, [name, peak bytes seen by finished children]
+
+
+def enable(path=None, memory=True):
+    """
+    start recording stages
+
+    :param path: json lines file to append records to; None to keep them in memory only
+    :param memory: trace Python allocations for each stage's peak (tracemalloc, slows allocation-heavy code);
+    the process peak resident size is recorded either way where the platform reports it
+    """
+    global _out, _enabled, _memory
+    disable()
+    if path is not None:
+        _out = open(path, 'a', buffering=1)  # line buffered, so records from several processes interleave whole
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    """
+    stop recording and close the output file
+    """
+    global _out, _enabled
+    if _out is not None:
+        _out.close()
+        _out = None
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def _maxRSS():
+    """
+    process peak resident size in MB, or None where unavailable
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10  # bytes on macOS, kB on Linux
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    record one stage; the yielded dict can be filled with more fields (e.g. solver iterations) before it ends
+
+    :param name: stage name
+    :param fields: extra json-serializable fields for the record
+    """
+    if not _enabled:
+        yield fields
+        return
+    stack = _local.__dict__.setdefault('stack', [])
+    tracing = _memory and tracemalloc.is_tracing()
+    if tracing:
+        if stack:
+            stack[-1][1] = max(stack[-1][1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+    parent = stack[-1][0] if stack else None
+    stack.append([name, 0])
+    start, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+    try:
+        yield fields
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = None
+        if tracing:
+            peak = max(stack[-1][1], tracemalloc.get_traced_memory()[1])
+            if len(stack) > 1:
+                stack[-2][1] = max(stack[-2][1], peak)
+        stack.pop()
+        record = dict(stage=name, parent=parent, start=start, wall=wall, cpu=cpu,
+                      peakMB=None if peak is None else peak / 2 ** 20, maxRSSMB=_maxRSS(), pid=os.getpid(), **fields)
+        _records.append(record)
+        if _out is not None:
+            _out.write(json.dumps(record, default=str) + '\n')
+
+
+def timed(name=None):
+    """
+    decorator recording each call of a function as a stage
+
+    :param name: stage name; None uses the function's qualified name
+    """
+    def wrap(func):
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(name or func.__qualname__):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def records():
+    """
+    :return: list of records kept in memory, oldest first
+    """
+    return list(_records)
+
+
+def summary(recs=None):
+    """
+    totals by stage
+
+    :param recs: list of records, e.g. read back from a json lines file; None uses the records kept in memory
+    :return: df indexed by stage with calls, wall & cpu seconds (total & mean), and the largest peakMB & maxRSSMB,
+    sorted by total wall time
+    """
+    df = pd.DataFrame(records() if recs is None else recs)
+    if df.empty:
+        return pd.DataFrame(columns=['calls', 'wall', 'meanWall', 'cpu', 'meanCpu', 'peakMB', 'maxRSSMB'])
+    g = df.groupby('stage')
+    return pd.DataFrame({'calls': g.size(), 'wall': g['wall'].sum(), 'meanWall': g['wall'].mean(),
+                         'cpu': g['cpu'].sum(), 'meanCpu': g['cpu'].mean(), 'peakMB': g['peakMB'].max(),
+                         'maxRSSMB': g['maxRSSMB'].max()}).sort_values('wall', ascending=False)
+
+
+def load(path):
+    """
+    :param path: json lines file written by enable
+    :return: list of records
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if os.environ.get('FIBER_METRICS'):
+    enable(os.environ['FIBER_METRICS'])
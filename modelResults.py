@@ -0,0 +1,99 @@
+import pandas as pd
+
+# size of one solver unit (MM short ton) in each reporting unit
+UNITS = {'MMst': 1, 'st': 1000, 'Mg': 1000 * 0.907185}  # short ton -> Mg as in en_emissions (uC)
+# tables of the input data reported next to every solve
+BASELINE = ['f2pVolOld', 'pbpVolOld', 'exportOld', 'consCollOld', 'oldDemand']
+
+
+def _scaled(obj, factor):
+    """
+    read-only copy of a df, series, or dict of series with values multiplied by factor
+    """
+    if isinstance(obj, dict):
+        return {k: _scaled(v, factor) for k, v in obj.items()}
+    values = obj.values.astype(float) * factor
+    values.flags.writeable = False
+    if isinstance(obj, pd.DataFrame):
+        return pd.DataFrame(values, index=obj.index, columns=obj.columns, copy=False)
+    return pd.Series(values, index=obj.index, name=obj.name, copy=False)
+
+
+def _readOnly(obj):
+    """
+    read-only view of a df, series, or dict of series; float data is wrapped without copying
+    """
+    if isinstance(obj, dict):
+        return {k: _readOnly(v) for k, v in obj.items()}
+    values = obj.to_numpy(dtype=float, copy=False)
+    values.flags.writeable = False
+    if isinstance(obj, pd.DataFrame):
+        return pd.DataFrame(values, index=obj.index, columns=obj.columns, copy=False)
+    return pd.Series(values, index=obj.index, name=obj.name, copy=False)
+
+
+class modelResults:
+
+    def __init__(self, tables, shares=None, unit='st', baseline=None):
+        """
+        solved model tables held once in solver units (MM short ton); other units are made on first access and kept
+        :param tables: dict of table name -> df, series, or dict of series by product, in solver units; tables are
+        wrapped as read-only views, so pass arrays nothing else writes to
+        :param shares: dict of unitless tables (fractions), returned as-is in every unit
+        :param unit: default unit for attribute access, a key of UNITS
+        :param baseline: modelResults of tables shared with other results, e.g. from baselineResults; its tables and
+        unit views are used as they are
+        """
+        tables = {k: _readOnly(v) for k, v in tables.items()}
+        if baseline is not None:
+            tables.update(baseline._tables)
+        tables.update({k: _readOnly(v) for k, v in (shares or {}).items()})
+        object.__setattr__(self, '_tables', tables)
+        object.__setattr__(self, '_baseline', baseline)
+        object.__setattr__(self, '_shares', set(shares or {}))
+        object.__setattr__(self, '_views', {})
+        object.__setattr__(self, 'unit', unit)
+
+    def get(self, name, unit=None):
+        """
+        result table in the requested unit
+        :param name: table name, e.g. 'f2pVolNew' or 'oldDemand'
+        :param unit: key of UNITS; None uses the default unit
+        :return: read-only df, series, or dict of series
+        """
+        unit = unit or self.unit
+        if self._baseline is not None and name in self._baseline._tables:
+            return self._baseline.get(name, unit)
+        if unit == 'MMst' or name in self._shares:
+            return self._tables[name]
+        if (name, unit) not in self._views:
+            self._views[name, unit] = _scaled(self._tables[name], UNITS[unit])
+        return self._views[name, unit]
+
+    def __getattr__(self, name):
+        if not name.startswith('_') and name in self._tables:
+            return self.get(name)
+        raise AttributeError(f"'modelResults' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        raise AttributeError('modelResults is read-only')
+
+    def __dir__(self):
+        return list(super().__dir__()) + list(self._tables)
+
+    def names(self):
+        """
+        :return: list of table names
+        """
+        return list(self._tables)
+
+
+def baselineResults(data):
+    """
+    baseline tables of a dataset (impData), copied into read-only arrays once and kept on the data object; the
+    results of every model built from it share them, unit views included
+    :return: modelResults
+    """
+    if getattr(data, '_baselineResults', None) is None:
+        data._baselineResults = modelResults({k: _scaled(getattr(data, k), 1) for k in BASELINE})
+    return data._baselineResults
@@ -2,11 +2,11 @@ import matplotlib.pyplot as plt
 import pandas as pd
 
 def fUseChange(model, ax):
-    nonPWP = [t for t in model.f2pVolNew.columns if 'P&W' not in t and 'Market' not in t and 'News' not in t]
+    nonPWP = [t for t in model.results.f2pVolNew.columns if 'P&W' not in t and 'Market' not in t and 'News' not in t]
     colors = ['#c55911']
 
-    recData = model.f2pVolNew.loc[model.rFiber][nonPWP].sum().sum() - model.f2pVolOld.loc[model.rFiber][nonPWP].sum().sum()
-    virData = model.f2pVolNew.loc[model.vFiber][nonPWP].sum().sum() - model.f2pVolOld.loc[model.vFiber][nonPWP].sum().sum()
+    recData = model.results.f2pVolNew.loc[model.rFiber][nonPWP].sum().sum() - model.results.f2pVolOld.loc[model.rFiber][nonPWP].sum().sum()
+    virData = model.results.f2pVolNew.loc[model.vFiber][nonPWP].sum().sum() - model.results.f2pVolOld.loc[model.vFiber][nonPWP].sum().sum()
 
     ax.bar(['Recovered Fiber', 'Virgin Pulpwood'], [recData / 1e6 * 0.907185, virData / 1e6 * 0.907185], color=colors)
     ax.set_ylabel('Total Fiber Use Change from Baseline (million Mg)')
@@ -16,8 +16,8 @@ def fUseByProd(model, ax):
     labels = ['Recovered Fiber', 'Virgin Pulpwood']
     colors = ['#5b9bd5', '#ed7d31', '#a5a5a5', '#ffc000', '#002eff', '#ce57ff']
 
-    recData = [model.f2pVolNew.loc[model.rFiber].sum()[t] - model.f2pVolOld.loc[model.rFiber].sum()[t] for t in model.fProd]
-    virData = [model.f2pVolNew.loc[model.vFiber].sum()[t] - model.f2pVolOld.loc[model.vFiber].sum()[t] for t in model.fProd]
+    recData = [model.results.f2pVolNew.loc[model.rFiber].sum()[t] - model.results.f2pVolOld.loc[model.rFiber].sum()[t] for t in model.fProd]
+    virData = [model.results.f2pVolNew.loc[model.vFiber].sum()[t] - model.results.f2pVolOld.loc[model.vFiber].sum()[t] for t in model.fProd]
 
     # df = pd.DataFrame({t: [r, v] for t, r, v in zip(model.fProd[:-2], recData[:-2], virData[:-2])}, index=labels) / 1e6 * 0.907185
     # df.plot(ax=ax, kind='bar', title='Fiber Use by Product', rot=0, color=colors[:-2])
@@ -31,8 +31,8 @@ def fSources(model, ax):
 
     colors = ['#ffc000']
 
-    addlData = sum([model.addlRec[i] for i in model.rFiber])
-    expData = model.exportOld.sum().sum() - model.exportNew.sum().sum()
+    addlData = sum([model.results.addlRec[i] for i in model.rFiber])
+    expData = model.results.exportOld.sum().sum() - model.results.exportNew.sum().sum()
 
     # ax.bar(['From Additional Collection','From Export Market'], [addlData, expData], color='gold')
     ax.bar(['From Additional Collection', 'From Export Market'], [addlData / 1e6 * 0.907185, expData / 1e6 * 0.907185], color=colors)
@@ -43,7 +43,7 @@ def mxpShift(model, ax):
     colors = ['#5b9bd5', '#ed7d31', '#a5a5a5', '#ffc000', '#002eff', '#ce57ff']
 
     mixedList = [key for key in model.rFiber if 'MIXED' in model.rCat[key]]
-    mxpData = [model.f2pVolNew.loc[mixedList, t].sum() - model.f2pVolOld.loc[mixedList, t].sum() for t in model.fProd]
+    mxpData = [model.results.f2pVolNew.loc[mixedList, t].sum() - model.results.f2pVolOld.loc[mixedList, t].sum() for t in model.fProd]
 
     df = pd.DataFrame({t: r for t, r in zip(model.fProd, mxpData)}, index=['MIXED Paper Shift']) / 1e6 * 0.907185
     df.plot(ax=ax, kind='bar', title='MIXED Paper Shift from Baseline', rot=0, color=colors)
@@ -62,15 +62,15 @@ def fShiftByCat(model, ax):
     highData = {}
     for i in model.rFiber:
         if model.rCat[i] in labels[0]:
-            mixedData.update({i: [model.f2pVolNew.loc[i, t] - model.f2pVolOld.loc[i, t] for t in model.fProd]})
+            mixedData.update({i: [model.results.f2pVolNew.loc[i, t] - model.results.f2pVolOld.loc[i, t] for t in model.fProd]})
         elif model.rCat[i] in labels[1]:
-            newsData.update({i: [model.f2pVolNew.loc[i, t] - model.f2pVolOld.loc[i, t] for t in model.fProd]})
+            newsData.update({i: [model.results.f2pVolNew.loc[i, t] - model.results.f2pVolOld.loc[i, t] for t in model.fProd]})
         elif model.rCat[i] in labels[2]:
-            corrData.update({i: [model.f2pVolNew.loc[i, t] - model.f2pVolOld.loc[i, t] for t in model.fProd]})
+            corrData.update({i: [model.results.f2pVolNew.loc[i, t] - model.results.f2pVolOld.loc[i, t] for t in model.fProd]})
         elif model.rCat[i] in labels[3]:
-            subsData.update({i: [model.f2pVolNew.loc[i, t] - model.f2pVolOld.loc[i, t] for t in model.fProd]})
+            subsData.update({i: [model.results.f2pVolNew.loc[i, t] - model.results.f2pVolOld.loc[i, t] for t in model.fProd]})
         elif model.rCat[i] in labels[4]:
-            highData.update({i: [model.f2pVolNew.loc[i, t] - model.f2pVolOld.loc[i, t] for t in model.fProd]})
+            highData.update({i: [model.results.f2pVolNew.loc[i, t] - model.results.f2pVolOld.loc[i, t] for t in model.fProd]})
         else:
             print(f'Fiber grade {i} was missed in calculating shift from baseline.')
 
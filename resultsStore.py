@@ -0,0 +1,195 @@
+"""
+Local store of solved scenarios, kept across sessions in one SQLite file: a row per run (settings, objective, solve
+statistics) and the run's tables in long format (table, row, column, value), indexed for lookups by table & cell.
+
+    store = resultsStore('fiberResults.sqlite')
+    store.addModel(model, [{'scenario': 'fAvg', 'target': 'Containerboard', 'incr': 5}])
+    df = store.query('summary', 'net', 'fosGHG', where={'fAvg.target': 'Containerboard'})
+    df[['fAvg.incr', 'value']]  # net fossil GHG against the Containerboard recycled content increase
+
+Run settings are columns named 'scenario.key'; a spec that applies one scenario twice keeps the last settings.
+"""
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from exportResults import flatTables
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, created REAL, label TEXT, spec TEXT, model TEXT,
+    dataKey TEXT, status INTEGER, objective REAL, iterations REAL, seconds REAL, unit TEXT);
+CREATE TABLE IF NOT EXISTS params (run INTEGER, name TEXT, num REAL, text TEXT);
+CREATE TABLE IF NOT EXISTS vals (run INTEGER, tbl TEXT, row TEXT, col TEXT, value REAL);
+CREATE INDEX IF NOT EXISTS paramsRun ON params (run);
+CREATE INDEX IF NOT EXISTS valsCell ON vals (tbl, row, col);
+CREATE INDEX IF NOT EXISTS valsRun ON vals (run);
+"""
+
+
+def emissionsSummary(emissions):
+    """
+    net GHG of a scenario against the baseline, as the app reports it: forest GHG plus the change in gate-to-gate
+    and end-of-life emissions, and for fossil GHG also trade
+
+    :param emissions: dict from en_emissions.calculateEmissions
+    :return: df with row 'net' and columns bioGHG, fosGHG
+    """
+    new, old, forest = emissions['new'], emissions['old'], emissions['forest']
+    bio = (new['g2gbio'] - old['g2gbio'] + new['eolbio'] - old['eolbio']).sum() + forest['bioGHG'].sum()
+    fos = (new['g2gfos'] - old['g2gfos'] + new['eolfos'] - old['eolfos']).sum() + forest['fosGHG'].sum() + \
+        np.asarray(emissions['trade']).sum()
+    return pd.DataFrame({'bioGHG': [bio], 'fosGHG': [fos]}, index=['net'])
+
+
+def modelValues(model, unit='st', tables=True):
+    """
+    long-format values of a solved model: emissions tables, their summary, and optionally the result tables
+
+    :param model: solved createModel object with results & emissions
+    :param unit: unit of result tables, a key of modelResults.UNITS
+    :param tables: include the result tables, not just emissions
+    :return: list of (table, row, column, value)
+    """
+    frames = flatTables(model.emissions, 'emissions_')
+    frames['summary'] = emissionsSummary(model.emissions)
+    if tables:
+        frames.update(flatTables({n: model.results.get(n, unit) for n in model.results.names()}))
+    return [(name, r, c, v) for name, df in frames.items() for (r, c), v in df.stack(dropna=False).items()]
+
+
+def _setting(v):
+    """
+    (num, text) column values for one setting
+    """
+    if isinstance(v, (bool, np.bool_)) or not isinstance(v, (int, float, np.number)):
+        return None, json.dumps(v) if isinstance(v, (list, dict)) else str(v)
+    return float(v), None
+
+
+class resultsStore:
+
+    def __init__(self, path='fiberResults.sqlite'):
+        """
+        open or create a store; several processes may append to the same file
+        :param path: SQLite file
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, spec, status, objective, iterations, values, seconds=None, label=None, model=None, dataKey=None,
+            unit='st'):
+        """
+        append one run
+
+        :param spec: list of scenario dicts as for batchRun.applyScenarios
+        :param status: Gurobi status
+        :param objective: objective value, NaN if not solved
+        :param iterations: solver iterations
+        :param values: iterable of (table, row, column, value), e.g. from modelValues
+        :param seconds: solve time
+        :param label: free text to find the run by, e.g. a sweep name
+        :param model: model name
+        :param dataKey: workbook content key (impData.cacheKey), to tell datasets apart
+        :param unit: unit of the result tables in values
+        :return: run id
+        """
+        objective = None if objective is None or np.isnan(objective) else float(objective)
+        with self.db:
+            run = self.db.execute('INSERT INTO runs (created, label, spec, model, dataKey, status, objective, '
+                                  'iterations, seconds, unit) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  (time.time(), label, json.dumps(spec), model, dataKey, int(status), objective,
+                                   iterations, seconds, unit)).lastrowid
+            settings = {f"{s['scenario']}.{k}": v for s in spec for k, v in s.items() if k != 'scenario'}
+            self.db.executemany('INSERT INTO params VALUES (?, ?, ?, ?)',
+                                [(run, k) + _setting(v) for k, v in settings.items()])
+            self.db.executemany('INSERT INTO vals VALUES (?, ?, ?, ?, ?)',
+                                [(run, t, str(r), str(c), None if v is None or v != v else float(v))
+                                 for t, r, c, v in values])
+        return run
+
+    def addModel(self, model, spec, seconds=None, label=None, unit='st', tables=True):
+        """
+        append a solved (or failed) model's run
+        :param model: createModel object after runModel, and getResults if solved
+        :param spec: list of scenario dicts applied to it
+        :param tables: also store the result tables, not just emissions & their summary
+        :return: run id
+        """
+        values = modelValues(model, unit, tables) if model.solved else []
+        return self.add(spec, model.status, model.objVal, model.iterations, values, seconds, label, model.m.ModelName,
+                        model.dataKey, unit)
+
+    def runs(self, where=None):
+        """
+        runs with their settings as columns
+
+        :param where: dict of column -> value, list of values, or function of the column returning a bool mask, e.g.
+        {'fAvg.target': 'Containerboard', 'status': 2, 'created': lambda t: t > cutoff}
+        :return: df indexed by run id
+        """
+        runs = pd.read_sql_query('SELECT * FROM runs', self.db, index_col='id')
+        params = pd.read_sql_query('SELECT * FROM params', self.db)
+        if len(params):
+            params['value'] = params['num'].astype(object).where(params['num'].notna(), params['text'])
+            wide = params.pivot_table(index='run', columns='name', values='value', aggfunc='last')
+            numeric = params.groupby('name')['text'].apply(lambda t: t.isna().all())  # settings that are all numbers
+            runs = runs.join(wide.apply(lambda c: c.astype(float) if numeric[c.name] else c))
+        for k, v in (where or {}).items():
+            if k not in runs:
+                return runs.iloc[:0]
+            if callable(v):
+                runs = runs[v(runs[k])]
+            else:
+                runs = runs[runs[k].isin(v if isinstance(v, (list, tuple, set)) else [v])]
+        return runs
+
+    def values(self, table, row=None, column=None, runs=None):
+        """
+        :param table: table name, e.g. 'summary', 'emissions_new' or 'f2pVolNew'
+        :param row: row label as str; None for all rows
+        :param column: column label as str; None for all columns
+        :param runs: iterable of run ids; None for all runs
+        :return: df with run, row, column, value
+        """
+        sql, args = 'SELECT run, row, col AS "column", value FROM vals WHERE tbl = ?', [table]
+        for field, value in [('row', row), ('col', column)]:
+            if value is not None:
+                sql += f' AND {field} = ?'
+                args.append(str(value))
+        df = pd.read_sql_query(sql, self.db, params=args)
+        return df if runs is None else df[df['run'].isin(list(runs))]
+
+    def query(self, table, row=None, column=None, where=None):
+        """
+        values of one table next to the settings of the runs they came from, for comparing runs
+
+        :param table: table name
+        :param row: row label; None for all rows
+        :param column: column label; None for all columns
+        :param where: run filter, see runs
+        :return: df with the run columns, row, column & value, one row per run & cell
+        """
+        runs = self.runs(where)
+        vals = self.values(table, row, column, runs.index)
+        return runs.join(vals.set_index('run'), how='inner').rename_axis('run').reset_index()
+
+    def table(self, run, table):
+        """
+        :return: one stored table of a run as a df of str labels
+        """
+        df = self.values(table, runs=[run])
+        return df.pivot(index='row', columns='column', values='value')
@@ -0,0 +1,296 @@
+"""
+Solve grids of independent scenarios in parallel. Each worker process reads the workbook and builds the base model
+once, then solves copies of it in its own Gurobi environment; results are appended to csv files as scenarios finish.
+
+    python scenarioSweep.py data.xlsx --grid fAvg target=Containerboard,Paperboard incr=0:15:0.5 \
+        --grid demand prod=Tissue-Home perc=-20:20:5 --grid mpYield perc=-20:0:1 --workers 4 --out sweep
+    python scenarioSweep.py data.xlsx --grid demand prod=Paperboard,Newsprint perc=-20:20:0.5 --multi
+
+With --multi, scenarios that differ only in constraint right-hand sides (e.g. setDemand percentages, or setfAvg
+increments for one target) are solved together as one Gurobi multi-scenario model per worker chunk; their
+iterations are NaN, as the solver only counts them for the whole group.
+
+Writes <out>_scenarios.csv (one row per scenario: id, spec, status, objective, iterations, seconds) and
+<out>_values.csv (long format: id, table, row, column, value) with the scenario emissions, plus the result tables
+in --unit with --tables.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from gurobipy import GRB
+import metrics
+from metrics import stage
+from batchRun import FPROD, SCENARIOS, loadModel, applyScenarios, solve, parseSetting
+from createModel import FINAL
+from dataCache import workbookKey
+from exportResults import flatTables
+from resultsStore import resultsStore, emissionsSummary
+
+EMISSIONS = ['new', 'newenergy', 'forest', 'trade']  # scenario-dependent emissions tables; 'old' is the baseline
+
+MAX_CHUNK = 100  # most scenarios per worker job with --multi
+
+_base = None  # worker's base model, set by _initWorker
+_solveCache = None  # worker's solve cache directory, set by _initWorker
+
+
+def grid(scenario, **axes):
+    """
+    all combinations of settings for one scenario
+
+    :param scenario: scenario name from batchRun.SCENARIOS
+    :param axes: setting name -> list of values, e.g. target=['Containerboard'], incr=np.arange(0, 15.5, 0.5)
+    :return: list of specs, each a one-scenario list for batchRun.applyScenarios
+    """
+    names = list(axes)
+    return [[dict(scenario=scenario, **dict(zip(names, values)))] for values in itertools.product(*axes.values())]
+
+
+def _initWorker(file, fProd, cacheDir, threads, solveCache, metricsFile):
+    global _base, _solveCache
+    if metricsFile:
+        metrics.enable(metricsFile)  # each worker appends its own records, tagged with its pid
+    _base = loadModel(file, fProd, cacheDir, 'sweep')
+    _base.m.Params.OutputFlag = 0
+    _base.m.Params.Threads = threads
+    _solveCache = solveCache
+
+
+def _record(i, spec, model, seconds, unit, tables):
+    """
+    :return: (scenario row, list of long-format value rows)
+    """
+    row = [i, json.dumps(spec), model.status, model.objVal, model.iterations, seconds]
+    values = []
+    if model.solved:
+        frames = flatTables({k: model.emissions[k] for k in EMISSIONS}, 'emissions_')
+        frames['summary'] = emissionsSummary(model.emissions)
+        if tables:
+            frames.update(flatTables({n: model.results.get(n, unit) for n in model.results.names()}))
+        for name, df in frames.items():
+            values += [[i, name, r, c, v] for (r, c), v in df.stack(dropna=False).items()]
+    return row, values
+
+
+def _solveSpec(i, spec, unit, tables):
+    """
+    solve one scenario on a copy of the worker's base model
+    """
+    with stage('scenario', id=i):
+        model = _base.copy(f'sweep{i}')
+        start = time.perf_counter()
+        applyScenarios(model, spec)
+        solve(model, _solveCache)
+    return [_record(i, spec, model, time.perf_counter() - start, unit, tables)]
+
+
+def rhsGroups(models):
+    """
+    group models that differ from the first model of their group only in constraint right-hand sides
+
+    :param models: list of createModel objects, updated
+    :return: list of lists of positions in models
+    """
+    groups = []
+    for n, model in enumerate(models):
+        m = model.m
+        shape = (m.getA(), m.getAttr('Sense', m.getConstrs()), m.getAttr('Obj', m.getVars()), m.ObjCon,
+                 m.getAttr('LB', m.getVars()), m.getAttr('UB', m.getVars()))
+        for ref, members in groups:
+            if ref[0].shape == shape[0].shape and (ref[0] != shape[0]).nnz == 0 and ref[1:] == shape[1:]:
+                members.append(n)
+                break
+        else:
+            groups.append((shape, [n]))
+    return [members for shape, members in groups]
+
+
+def solveRHSVariants(models):
+    """
+    solve models that differ only in constraint right-hand sides in one optimize call, as a Gurobi multi-scenario
+    model built on a copy of the first; each model gets its scenario's status, objective & solution, and results
+    through getResults. A scenario is optimal or infeasible only when the multi-scenario model solved to optimality;
+    otherwise it takes the model's status (e.g. INF_OR_UNBD or TIME_LIMIT). The solver does not count iterations per
+    scenario, so each model's iterations is NaN; the group's total is in the 'optimizeMulti' metrics record
+
+    :param models: list of createModel objects from rhsGroups
+    """
+    rhs = [np.array(m.m.getAttr('RHS', m.m.getConstrs())) for m in models]
+    multi = models[0].copy()
+    multi.m.NumScenarios = len(models)
+    multi.m.Params.MIPGap = 0  # scenarios of an LP are searched like a MIP; keep each one exact
+    cs = multi.m.getConstrs()
+    for s, b in enumerate(rhs):
+        diff = np.flatnonzero(b != rhs[0])
+        multi.m.Params.ScenarioNumber = s
+        multi.m.setAttr('ScenNRHS', [cs[j] for j in diff], b[diff].tolist())
+    with stage('optimizeMulti', scenarios=len(models)) as rec:
+        multi.m.optimize()
+        rec.update(status=multi.m.status, iterations=multi.m.IterCount, runtime=multi.m.Runtime, work=multi.m.Work)
+
+    x = multi.m.getVars()
+    for s, model in enumerate(models):
+        multi.m.Params.ScenarioNumber = s
+        found = multi.m.SolCount > 0 and multi.m.ScenNObjVal < GRB.INFINITY
+        if multi.m.status != GRB.OPTIMAL:
+            model.status = multi.m.status
+        else:  # every scenario is solved to optimality or proven infeasible
+            model.status = GRB.OPTIMAL if found else GRB.INFEASIBLE
+        model.solved = model.status == GRB.OPTIMAL
+        model.failed = model.status != GRB.INTERRUPTED and not model.solved
+        model.objVal = multi.m.ScenNObjVal if model.solved else np.nan
+        model.iterations = np.nan
+        model.solution = np.array(multi.m.getAttr('ScenNX', x)) if model.solved else None
+        if model.solved:
+            model.getResults()
+
+
+def _solveChunk(ids, specs, unit, tables):
+    """
+    apply a chunk of scenarios to copies of the worker's base model and solve each rhsGroups group at once;
+    scenarios found in the solve cache skip the solver
+    """
+    models, start = [], time.perf_counter()
+    for i, spec in zip(ids, specs):
+        model = _base.copy(f'sweep{i}')
+        applyScenarios(model, spec)
+        model.m.update()
+        models.append(model)
+    cached = [_solveCache is not None and model.loadSolve(_solveCache) for model in models]
+    for model, hit in zip(models, cached):
+        if hit and model.solved:
+            model.getResults()
+    seconds = [(time.perf_counter() - start) / len(models)] * len(models)
+
+    pending = [n for n, hit in enumerate(cached) if not hit]
+    for group in rhsGroups([models[n] for n in pending]):
+        group = [pending[g] for g in group]
+        start = time.perf_counter()
+        if len(group) == 1:
+            solve(models[group[0]])
+        else:
+            solveRHSVariants([models[g] for g in group])
+        for g in group:
+            seconds[g] += (time.perf_counter() - start) / len(group)
+            if _solveCache is not None and models[g].status in FINAL:  # limits & interrupts are not cached
+                models[g].saveSolve(_solveCache)
+    return [_record(i, spec, model, t, unit, tables) for i, spec, model, t in zip(ids, specs, models, seconds)]
+
+
+def runSweep(file, specs, out, fProd=FPROD, workers=None, cacheDir=None, unit='st', tables=False, multi=False,
+             solveCache=None, metricsFile=None, store=None, label=None):
+    """
+    solve scenarios across a process pool, appending each result to the output files as it completes
+
+    :param file: path to data spreadsheet
+    :param specs: list of specs, each a list of scenario dicts for batchRun.applyScenarios (see grid)
+    :param out: output path prefix
+    :param fProd: list of products in system
+    :param workers: number of processes; None for one per CPU
+    :param cacheDir: directory for cached workbook tables
+    :param unit: unit of result tables, a key of modelResults.UNITS
+    :param tables: also write every result table, not just the emissions
+    :param multi: send contiguous chunks of specs to each worker and solve right-hand-side variants together
+    :param solveCache: directory of cached solves shared by the workers; None to always run the solver
+    :param metricsFile: json lines file the workers append per-stage timings to (see metrics); None for no metrics
+    :param store: resultsStore file every scenario is also appended to; None for the csv files only
+    :param label: label of the runs in store
+    :return: (number solved, number not solved)
+    """
+    workers = workers or os.cpu_count()
+    threads = max(1, os.cpu_count() // workers)  # keep solver threads from oversubscribing the cores
+    done, failed = 0, 0
+    db = None if store is None else resultsStore(store)
+    dataKey = None if db is None else workbookKey(file, fProd)
+    with open(f'{out}_scenarios.csv', 'w', newline='') as fs, open(f'{out}_values.csv', 'w', newline='') as fv:
+        scen, vals = csv.writer(fs), csv.writer(fv)
+        scen.writerow(['id', 'spec', 'status', 'objective', 'iterations', 'seconds'])
+        vals.writerow(['id', 'table', 'row', 'column', 'value'])
+        with ProcessPoolExecutor(workers, initializer=_initWorker,
+                                 initargs=(file, list(fProd), cacheDir, threads, solveCache, metricsFile)) as pool:
+            if multi:
+                size = min(MAX_CHUNK, -(-len(specs) // workers))
+                jobs = [pool.submit(_solveChunk, range(n, n + size), specs[n:n + size], unit, tables)
+                        for n in range(0, len(specs), size)]
+            else:
+                jobs = [pool.submit(_solveSpec, i, spec, unit, tables) for i, spec in enumerate(specs)]
+            for job in as_completed(jobs):
+                for row, values in job.result():
+                    scen.writerow(row)
+                    vals.writerows(values)
+                    if db is not None:
+                        db.add(json.loads(row[1]), row[2], row[3], row[4], [v[1:] for v in values], row[5], label,
+                               f'sweep{row[0]}', dataKey, unit)
+                    if row[2] == GRB.OPTIMAL:
+                        done += 1
+                    else:
+                        failed += 1
+                fs.flush()
+                fv.flush()
+    if db is not None:
+        db.close()
+    return done, failed
+
+
+def parseAxis(text):
+    """
+    'key=a,b,c' or 'key=start:stop:step' (stop included) -> (key, list of values)
+    """
+    key, _, value = text.partition('=')
+    if value.count(':') == 2:
+        start, stop, step = map(float, value.split(':'))
+        return key, np.arange(start, stop + step / 2, step).round(10).tolist()
+    return key, [parseSetting(f'{key}={v}')[1] for v in value.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve a grid of scenarios in parallel.')
+    parser.add_argument('workbook', help='data spreadsheet')
+    parser.add_argument('--products', nargs='+', default=FPROD, help='products in system')
+    parser.add_argument('--grid', nargs='+', action='append', default=[], metavar=('NAME', 'KEY=VALUES'),
+                        help=f"scenario from {', '.join(SCENARIOS)} with comma lists or start:stop:step ranges; "
+                             "repeatable, each grid adds its own scenarios")
+    parser.add_argument('--spec', help='json file with a list of specs, each a list of scenarios applied together')
+    parser.add_argument('--out', default='sweep', help='output path prefix')
+    parser.add_argument('--workers', type=int, help='number of worker processes (default: one per CPU)')
+    parser.add_argument('--unit', default='st', choices=['MMst', 'st', 'Mg'], help='unit of result tables')
+    parser.add_argument('--tables', action='store_true', help='also write all result tables')
+    parser.add_argument('--cache-dir', help='directory for cached workbook tables')
+    parser.add_argument('--solve-cache', help='directory for cached solves; repeated scenarios skip the solver')
+    parser.add_argument('--multi', action='store_true',
+                        help='solve scenarios that differ only in right-hand sides as one multi-scenario model')
+    parser.add_argument('--metrics', help='append per-stage timing & memory records from every worker to this file')
+    parser.add_argument('--store', help='also append every scenario to this results store (see resultsStore)')
+    parser.add_argument('--label', help='label for the runs in --store, e.g. the sweep name')
+    args = parser.parse_args(argv)
+
+    specs = []
+    if args.spec:
+        with open(args.spec) as f:
+            specs = json.load(f)
+    for g in args.grid:
+        if g[0] not in SCENARIOS:
+            parser.error(f"unknown scenario '{g[0]}'; choose from {', '.join(SCENARIOS)}")
+        specs += grid(g[0], **dict(parseAxis(x) for x in g[1:]))
+    if not specs:
+        parser.error('no scenarios given; use --grid or --spec')
+
+    start, began = time.perf_counter(), time.time()
+    done, failed = runSweep(args.workbook, specs, args.out, args.products, args.workers, args.cache_dir, args.unit,
+                            args.tables, args.multi, args.solve_cache, args.metrics, args.store, args.label)
+    print(f'{done} scenarios solved, {failed} without solution in {time.perf_counter() - start:.1f}s; '
+          f'results in {args.out}_scenarios.csv and {args.out}_values.csv')
+    if args.metrics:
+        recs = [r for r in metrics.load(args.metrics) if r['start'] >= began]  # the file may hold earlier runs
+        print(metrics.summary(recs).to_string(float_format='{:.3f}'.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,17 +2,78 @@ import pandas as pd
 import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
+from metrics import timed
 
 
-rF2PYield2 = []
+def setRows(model, families, rows, lhs):
+    """
+    Set rows that share a left-hand side in place: each key's existing rows in the given families are reused with
+    the new sense & rhs (and moved if they change family), missing rows are added and leftover rows removed
 
-def inModel(model, constrName):
-    if isinstance(constrName, (list, tuple, set, np.ndarray)):
-        return [i for i in model.m.getConstrs() for x in constrName if x in i.getAttr(GRB.Attr.ConstrName)]
-    else:
-        return [i for i in model.m.getConstrs() if constrName in i.getAttr(GRB.Attr.ConstrName)]
+    :param model: Gurobi model to be modified
+    :param families: names of the constraint families the rows may be filed under
+    :param rows: dict of key -> list of (family, sense, rhs) for the rows that should be in the model
+    :param lhs: function of key -> LinExpr, only called for rows that have to be added
+    """
+    have = {}
+    for f in families:
+        for k in model.constrs.get(f, {}):
+            have.setdefault(k, []).append(f)
+
+    drop = {}
+    for k in list(rows) + [k for k in have if k not in rows]:
+        old = have.get(k, [])
+        want = sorted(rows.get(k, []), key=lambda w: w[0] not in old)  # same-family rows first
+        for f, sense, rhs in want:
+            if old:
+                f0 = old.pop(old.index(f) if f in old else 0)
+                c = model.constrs[f0][k] if f0 == f else model.moveConstr(f0, k, f)
+                c.Sense = sense
+                c.RHS = rhs
+            else:
+                model.addConstr(f, k, lhs(k), sense, rhs)
+        for f0 in old:
+            drop.setdefault(f0, []).append(k)
+    for f, keys in drop.items():
+        model.removeConstrs(f, keys)
+
+
+def setF2PYield(model, yld):
+    """
+    Put a recovered fiber to pulp yield table into rPulpinFlow and the recipe rows, changing only the
+    coefficients that differ from what the model holds now
+
+    :param model: Gurobi model to be modified
+    :param yld: yield df indexed by rFiber with rPulp as columns
+    """
+    cur = getattr(model, 'rF2PYieldSet', model.rF2PYield)
+    new = yld.loc[model.rFiber, model.rPulp].values
+    for a, b in np.argwhere(new != cur.loc[model.rFiber, model.rPulp].values):
+        i, p = model.rFiber[a], model.rPulp[b]
+        x = model.rfiber2pulp[i, p]
+        model.m.chgCoeff(model.constrs['rPulpinFlow'][p], x, new[a, b])
+        for family in ['rRecipeMin', 'rRecipeMax', 'rRecipe']:
+            if (p, i) in model.constrs[family]:
+                model.m.chgCoeff(model.constrs[family][p, i], x, new[a, b])
+    model.rF2PYieldSet = yld.copy()
+
+
+def setWasteYield(model, wYld):
+    """
+    Put a wastepaper yield dict into the rFiberAvail rows, changing only the coefficients that differ
+    from what the model holds now
 
+    :param model: Gurobi model to be modified
+    :param wYld: dict of (rFiber, product, source) -> yield
+    """
+    cur = getattr(model, 'wPaperYldSet', model.wPaperYld)
+    for (i, t, s), w in wYld.items():
+        if w != cur[i, t, s]:
+            model.m.chgCoeff(model.constrs['rFiberAvail'][i], model.sCollectNew[t, s], -(w * model.prodConsumed[t, s]))
+    model.wPaperYldSet = dict(wYld)
 
+
+@timed()
 def setfAvg(model, target='Containerboard', incr=5):
     """
     Increase recycled content for one or more product sectors by given percentage point
@@ -37,72 +98,56 @@ def setfAvg(model, target='Containerboard', incr=5):
     targInc = [sum(x) for x in zip(incr, [rAvg[i] for i in target])]
     rAvg.update({i: j for i, j in zip(target, targInc)})
 
-    model.m.remove(inModel(model, ['maxDemand', 'recFix', 'recMax', 'prodTargetRec']))
-
-    # additional constraints
-    model.m.addConstrs((model.prodDemand[r, t] <= model.maxDemand[t].loc[r] for t in model.fProd
-                        for r in model.rLevel[t] if not fRecFix[t]), "maxDemand")
-    model.m.addConstrs(
-        (gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]) == rAvg[t] * model.oldDemand[t].sum() for t in
-         model.fProd
-         if fRecFix[t]), "recFix")
-    model.m.addConstrs(
-        (gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]) <= rAvg[t] * model.oldDemand[t].sum() for t in
-         model.fProd
-         if not fRecFix[t] and not fTarget[t]), "recMax")
-    model.m.addConstrs((gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]) ==
-                        rAvg[t] * model.productUse.loc[t, 'Domestic Consumption'] for t in model.fProd
-                        if fTarget[t]), "prodTargetRec")
+    # update constraints in place
+    setRows(model, ['maxDemand'], {(t, r): [('maxDemand', GRB.LESS_EQUAL, model.maxDemand[t].loc[r])]
+                                   for t in model.fProd for r in model.rLevel[t] if not fRecFix[t]},
+            lambda k: model.prodDemand[k[1], k[0]])
+
+    recRows = {t: [] for t in model.fProd}
+    for t in model.fProd:
+        if fRecFix[t]:
+            recRows[t].append(('recFix', GRB.EQUAL, rAvg[t] * model.oldDemand[t].sum()))
+        elif not fTarget[t]:
+            recRows[t].append(('recMax', GRB.LESS_EQUAL, rAvg[t] * model.oldDemand[t].sum()))
+        if fTarget[t]:
+            recRows[t].append(('prodTargetRec', GRB.EQUAL, rAvg[t] * model.productUse.loc[t, 'Domestic Consumption']))
+    setRows(model, ['recFix', 'recMax', 'prodTargetRec'], recRows,
+            lambda t: gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]))
     model.m.update()
 
     return model
 
 
+@timed()
 def setmpYield(model, perc=5):
-    global rF2PYield2
-    rF2PYield2 = model.rF2PYield.copy()
+    rF2PYield2 = model.rF2PYield.copy()  # from the base yields; a fiberDeg applied before is dropped
 
     mixedList = [key for key in model.rFiber if 'MIXED' in model.rCat[key]]
     rF2PYield2.loc[mixedList] = rF2PYield2.loc[mixedList] * (1 - perc / 100)
 
-    model.m.remove(inModel(model, ['rRecipeMin', 'rRecipeMax', 'rRecipe', 'rPulpinFlow']))
-    model.m.update()
-
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] >= model.recipeMin.loc[i, p] * model.rpulpProd[p]
-         for p in model.rPulp for i in model.rFiber), "rRecipeMin")
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] <= model.recipeMax.loc[i, p] * model.rpulpProd[p]
-         for p in model.rPulp for i in model.rFiber), "rRecipeMax")
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] - model.rRecipeYield.loc[i, p] * model.rpulpProd[p] == 0
-         for p in model.rPulp for i in model.rFiber if 'Deinked' in p or 'P&W' in p or 'News' in p), 'rRecipe')
-    model.m.addConstrs(
-        (rF2PYield2.loc[:, p].dot(model.rfiber2pulp.select('*', p)) == model.rpulpProd[p] for p in model.rPulp),
-        "rPulpinFlow")
-
+    setF2PYield(model, rF2PYield2)
     model.m.update()
     return model
 
 
+@timed()
 def setDemand(model, prod='Containerboard', perc=5):
-    model.m.remove(inModel(model, ['non-constantDemand', 'constantDemand']));
-    model.m.update()
-
     if not isinstance(prod, (list, tuple, set, np.ndarray)): prod = [prod]
     if not isinstance(perc, (list, tuple, set, np.ndarray)): perc = [perc]
 
     newD = {t: 0 for t in model.fProd}
     newD.update({t: x for t, x in zip(prod, perc)})
 
-    model.m.addConstrs(
-        (model.prodDemand.sum('*', t) == model.productUse.loc[t, 'Domestic Consumption'] * (1 + newD[t] / 100)
-         for t in model.fProd), "non-constantDemand")
+    # same rows with a new rhs
+    setRows(model, ['constantDemand', 'non-constantDemand'],
+            {t: [('non-constantDemand', GRB.EQUAL, model.productUse.loc[t, 'Domestic Consumption'] * (1 + newD[t] / 100))]
+             for t in model.fProd}, lambda t: model.prodDemand.sum('*', t))
 
     model.m.update()
     return model
 
 
+@timed()
 def setContam(model, recovery='mix', custom_cm=0):
     affChan = ['Residential', 'Retail']  # affected channels, most susceptible to changes in recycling
     cRate = [0.272, 0.17, 0.19, 0.24]  # contamination rates from Eureka Recycling, The Recycling Partnership, and WM
@@ -139,21 +184,14 @@ def setContam(model, recovery='mix', custom_cm=0):
             if isinstance(wPaperYld2[i], (list, tuple, set, np.ndarray)):
                 wPaperYld2[i] = wPaperYld2[i][0]
 
-        model.m.remove(inModel(model, 'rFiberAvail'));
-        model.m.update()
-
-        model.m.addConstrs((model.rfiber2pulp.sum(i, '*') + model.rExpNew[i] + model.rResidue[i] -
-                            gp.quicksum(gp.quicksum(
-                                wPaperYld2[i, t, s] * model.sCollectNew[t, s] * model.prodConsumed[t, s] for
-                                s in model.wsource)
-                                        for t in model.fProd) == 0 for i in model.rFiber), "rFiberAvail")
-
+        setWasteYield(model, wPaperYld2)
         model.m.update()
 
     except ValueError:
         print("Not a valid scenario. Try 'Mix', 'SSR', or 'Dual'.")
 
 
+@timed()
 def fiberDeg(model, custom_fb=0):
     rng = np.random.default_rng()
     switch = {
@@ -164,11 +202,8 @@ def fiberDeg(model, custom_fb=0):
         'NEWS': rng.random() * 5 / 100 + 0.2  # 20 - 25%, about 1 in 4
     }
 
-    global rF2PYield2
-    if not isinstance(rF2PYield2, list):
-        pass  # means MP yield scenario has been set, so just use that version
-    else:
-        rF2PYield2 = model.rF2PYield.copy()
+    # from the yields this model holds, so an MP yield scenario set before is kept
+    rF2PYield2 = getattr(model, 'rF2PYieldSet', model.rF2PYield).copy()
 
     if custom_fb > 0.001:
         for i in model.rFiber:  # decrease for each grade in dataframe
@@ -177,80 +212,23 @@ def fiberDeg(model, custom_fb=0):
         for i in model.rFiber:  # decrease for each grade in dataframe
             rF2PYield2.loc[i] = rF2PYield2.loc[i] * (1 - switch.get(model.rCat[i], 'N/A'))
 
-    # remove old constraints
-    model.m.remove([inModel(model, ['rRecipeMin', 'rRecipeMax', 'rRecipe', 'rPulpinFlow'])])
-
-    # add new ones
-    model.m.addConstrs(
-        (rF2PYield2[p].dot(model.rfiber2pulp.select('*', p)) == model.rpulpProd[p] for p in model.rPulp),
-        "rPulpinFlow")
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] >= model.recipeMin.loc[i, p] * model.rpulpProd[p] for p in
-         model.rPulp for i in
-         model.rFiber),
-        "rRecipeMin")
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] <= model.recipeMax.loc[i, p] * model.rpulpProd[p] for p in
-         model.rPulp for i in
-         model.rFiber),
-        "rRecipeMax")
-    model.m.addConstrs(
-        (rF2PYield2.loc[i, p] * model.rfiber2pulp[i, p] - model.rRecipeYield.loc[i, p] * model.rpulpProd[p] == 0
-         for p in model.rPulp for i in model.rFiber
-         if 'Deinked' in p or 'P&W' in p or 'News' in p), 'rRecipe')
+    # update coefficients in place
+    setF2PYield(model, rF2PYield2)
 
     model.m.update()
 
 
 def resetScenarios(model):
-    model.m.remove([  # TODO: re-add constraints from base case 791 -> 797?
-        inModel(model,
-                ['maxDemand', 'recFix', 'recMax', 'prodTargetRec', 'rRecipeMin', 'rRecipeMax', 'rRecipe', 'rPulpinFlow',
-                 'rFiberAvail', 'constantDemand', 'non-constantDemand']),
-    ])
-    # re-add base constraints
-    model.m.addConstrs(
-        (model.rF2PYield[p].dot(model.rfiber2pulp.select('*', p)) == model.rpulpProd[p] for p in model.rPulp),
-        "rPulpinFlow")
-    model.m.addConstrs(
-        (model.rF2PYield.loc[i, p] * model.rfiber2pulp[i, p] >= model.recipeMin.loc[i, p] * model.rpulpProd[p] for p in
-         model.rPulp for i in
-         model.rFiber),
-        "rRecipeMin")
-    model.m.addConstrs(
-        (model.rF2PYield.loc[i, p] * model.rfiber2pulp[i, p] <= model.recipeMax.loc[i, p] * model.rpulpProd[p] for p in
-         model.rPulp for i in
-         model.rFiber),
-        "rRecipeMax")
-    model.m.addConstrs(
-        (model.rF2PYield.loc[i, p] * model.rfiber2pulp[i, p] - model.rRecipeYield.loc[i, p] * model.rpulpProd[p] == 0
-         for p in model.rPulp for i
-         in model.rFiber
-         if 'Deinked' in p or 'P&W' in p or 'News'), 'rRecipe')
-    model.m.addConstrs((model.rfiber2pulp.sum(i, '*') + model.rExpNew[i] + model.rResidue[i] -
-                        gp.quicksum(gp.quicksum(
-                            model.wPaperYld[i, t, s] * model.sCollectNew[t, s] * model.prodConsumed[t, s] for s in
-                            model.wsource)
-                                    for t in model.fProd) == 0 for i in model.rFiber), "rFiberAvail")
-    model.m.addConstrs(
-        (model.prodDemand.sum('*', t) == model.productUse.loc[t, 'Domestic Consumption'] for t in model.fProd),
-        "constantDemand")
-    model.m.addConstrs(
-        (model.prodDemand[r, t] <= model.maxDemand[t].loc[r] for t in model.fProd for r in model.rLevel[t]
-         if t not in model.fProd[-2:]), "maxDemand")
-
-    rAvg = {t: model.oldDemand[t].dot(model.rLevel[t]) / model.oldDemand[t].sum() for t in model.fProd}
-    model.m.addConstrs(
-        (gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]) == rAvg[t] * model.oldDemand[t].sum()
-         for t in model.fProd if t in model.fProd[-2:]), "recFix")
-    model.m.addConstrs(
-        (gp.quicksum(r * model.prodDemand[r, t] for r in model.rLevel[t]) <= rAvg[t] * model.oldDemand[t].sum()
-         for t in model.fProd if t not in model.fProd[-2:]), "recMax")
-
-    model.m.update()
+    """
+    Drop all scenario settings by starting again from a copy of the base model
 
-    # reset global
-    global rF2PYield2
-    rF2PYield2 = model.rF2PYield.copy()
+    :param model: model copied from a base model (createModel.copy)
+    :return: fresh copy of the base model
+    """
+    if model.base is None:
+        raise ValueError('model has no base to reset to; create it with baseModel(data, fProd).copy()')
 
-    return model
+    fresh = model.base.copy()
+    fresh.m.ModelName = model.m.ModelName
+    fresh.warm = model.warm  # start the next solve from the last optimal basis
+    return fresh
@@ -0,0 +1,103 @@
+import pandas as pd
+import numpy as np
+
+
+def colIndex(letters):
+    """
+    convert an Excel column label to a zero-based column index
+
+    :param letters: column label as str, e.g. 'A' or 'AB'
+    :return: column index as int
+    """
+    n = 0
+    for c in letters.strip().upper():
+        n = n * 26 + ord(c) - ord('A') + 1
+    return n - 1
+
+
+def parseCols(usecols):
+    """
+    expand a read_excel-style usecols spec into zero-based column indexes
+
+    :param usecols: str of Excel ranges ("B:G", "A:B,E:J") or list of int column indexes
+    :return: list of int column indexes
+    """
+    if not isinstance(usecols, str):
+        return list(usecols)
+    cols = []
+    for part in usecols.split(','):
+        ends = part.split(':')
+        cols += list(range(colIndex(ends[0]), colIndex(ends[-1]) + 1))
+    return cols
+
+
+def dedupNames(names):
+    """
+    label a header row the way pandas does: blanks become 'Unnamed: i', repeats get '.1', '.2', ... skipping labels
+    already in the row; named cells are labelled before blank ones
+
+    :param names: header cell values in sheet order
+    :return: list of column labels
+    """
+    unnamed = [i for i, col in enumerate(names) if not isinstance(col, str) and pd.isna(col)]
+    labels = [f'Unnamed: {i}' if i in unnamed else col for i, col in enumerate(names)]
+    counts = {}
+    for i in [i for i in range(len(labels)) if i not in unnamed] + unnamed:
+        col = old = labels[i]
+        cur = counts.get(col, 0)
+        while cur > 0:
+            counts[old] = cur + 1
+            col = f'{old}.{cur}'
+            cur = cur + 1 if col in labels else counts.get(col, 0)
+        labels[i] = col
+        counts[col] = cur + 1
+    return labels
+
+
+def readSheets(x, sheets):
+    """
+    parse each worksheet once into a raw grid of cell values
+
+    :param x: pd.ExcelFile or anything pd.read_excel accepts
+    :param sheets: list of sheet names
+    :return: dict of sheet name -> df indexed by zero-based Excel row/column
+    """
+    return pd.read_excel(x, sheet_name=list(sheets), header=None, dtype=object)
+
+
+def cutTable(grid, usecols, skiprows=0, nrows=None, header=0, index_col=None, names=None):
+    """
+    slice one table out of a raw sheet grid, matching pd.read_excel with the same arguments
+
+    :param grid: raw sheet grid from readSheets
+    :param usecols: Excel column ranges as str or list of int column indexes
+    :param skiprows: rows skipped above the header (or above the data if header is None)
+    :param nrows: number of data rows
+    :param header: 0 to take column labels from the first row, None for no header
+    :param index_col: position within usecols of the index column
+    :param names: column labels to use instead of the header
+    :return: df
+    """
+    cols = [c for c in parseCols(usecols) if c < grid.shape[1]]  # columns past the sheet's last one are dropped
+
+    if header is None:
+        top = skiprows
+        labels = list(cols)
+    else:
+        top = skiprows + 1
+        row = grid.iloc[skiprows] if skiprows < len(grid) else pd.Series(np.nan, index=grid.columns)
+        allLabels = dedupNames(row.values)
+        labels = [allLabels[c] for c in cols]
+    if names is not None:
+        labels = list(names)
+
+    bottom = len(grid) if nrows is None else top + nrows
+    block = grid.iloc[top:bottom, cols]
+    df = pd.DataFrame(block.values, columns=pd.Index(labels)).infer_objects()
+
+    if index_col is not None:
+        df = df.set_index(df.columns[index_col])
+        df.columns = pd.Index(list(df.columns))
+        if header is not None and names is None and pd.isna(row.values[cols[index_col]]):
+            df.index.name = None  # blank header cell leaves the index unnamed
+    return df
@@ -0,0 +1,136 @@
+"""
+Background solves for the app. Jobs run on one pool of solver threads shared by every session of the server, so
+sessions queue their solves without blocking one another; each job reports progress from a Gurobi callback and can
+be cancelled while queued or running. A Gurobi environment is not thread safe, so a job copies its model into an
+environment of its own on the submitting thread, and the solver thread only ever touches that copy.
+
+    job = solveJob(model, cacheDir='.fiberSolves')
+    while not job.finished():
+        print(job.describe())
+        time.sleep(0.5)
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import gurobipy as gp
+from gurobipy import GRB
+from createModel import failedMessage
+
+WORKERS = 2  # solves running at once across all sessions; later jobs wait in the queue
+
+_pool = ThreadPoolExecutor(WORKERS, thread_name_prefix='solve')
+_lock = threading.Lock()
+_open = []  # unfinished jobs in submission order
+
+
+def jobEnv():
+    """
+    :return: new started Gurobi environment for one job
+    """
+    env = gp.Env(empty=True)
+    env.setParam('OutputFlag', 0)  # no license banner per job; copied models keep their own OutputFlag
+    return env.start()
+
+
+class solveJob:
+
+    def __init__(self, model, cacheDir=None, diagnose=True, log=None):
+        """
+        submit a solve, with results & emissions extracted when it is optimal
+        :param model: createModel object; leave it alone until the job has finished, when it holds the outcome of the
+        solve (see createModel.takeSolve)
+        :param cacheDir: directory of cached solves, see createModel.runModel
+        :param diagnose: on infeasibility, also run createModel.diagnose('relax') and keep the report in diagnosis
+        :param log: solverLog.logChannel fed with Gurobi's log lines and, at the end, the job's outcome
+        """
+        self.model = model
+        self._env = jobEnv()
+        # copied on the submitting thread, so the pool thread only uses the job's environment, never the default one
+        # the sessions build their models in
+        self._solver = model.copy(env=self._env)
+        self.log = log
+        self.state = 'queued'  # queued, running, done, cancelled or failed
+        self.progress = {'iterations': 0, 'objective': None, 'elapsed': 0.0}
+        self.diagnosis = None
+        self.error = None
+        self._cancel = threading.Event()
+        with _lock:
+            _open.append(self)
+        self._future = _pool.submit(self._run, cacheDir, diagnose)
+
+    def _callback(self, m, where):
+        if where == GRB.Callback.MESSAGE:
+            if self.log is not None:
+                self.log.write(m.cbGet(GRB.Callback.MSG_STRING))
+        elif where == GRB.Callback.SIMPLEX:
+            self.progress = {'iterations': int(m.cbGet(GRB.Callback.SPX_ITRCNT)),
+                             'objective': m.cbGet(GRB.Callback.SPX_OBJVAL), 'elapsed': m.cbGet(GRB.Callback.RUNTIME)}
+        elif where == GRB.Callback.BARRIER:
+            self.progress = {'iterations': m.cbGet(GRB.Callback.BARRIER_ITRCNT),
+                             'objective': m.cbGet(GRB.Callback.BARRIER_PRIMOBJ),
+                             'elapsed': m.cbGet(GRB.Callback.RUNTIME)}
+        if self._cancel.is_set():
+            m.terminate()
+
+    def _run(self, cacheDir, diagnose):
+        try:
+            if self._cancel.is_set():
+                self.state = 'cancelled'
+                return
+            self.state = 'running'
+            solver = self._solver
+            solver.runModel(cacheDir, callback=self._callback)
+            if solver.solved:
+                solver.getResults()
+            elif diagnose and solver.status != GRB.INTERRUPTED:
+                self.diagnosis = solver.diagnose('relax')
+            self.model.takeSolve(solver)
+            if self.model.status == GRB.INTERRUPTED:
+                self.state = 'cancelled'
+                return
+            self.state = 'done'
+        except Exception as e:  # kept for the session to show; the pool thread carries on
+            self.error = e
+            self.state = 'failed'
+        finally:
+            self._solver.m.dispose()
+            self._env.dispose()
+            self._solver = None
+            if self.log is not None:
+                self.log.write(f'\n{self.describe()}\n')
+                self.log.close()
+            with _lock:
+                _open.remove(self)
+
+    def cancel(self):
+        """
+        stop the solve: a queued job never starts, a running one is terminated at Gurobi's next callback
+        """
+        self._cancel.set()
+
+    def finished(self):
+        return self._future.done()  # after the log is closed, unlike the final state
+
+    def ahead(self):
+        """
+        :return: number of unfinished jobs submitted before this one, from any session
+        """
+        with _lock:
+            return _open.index(self) if self in _open else 0
+
+    def describe(self):
+        """
+        :return: one-line status for display
+        """
+        if self.state == 'queued':
+            return f'Waiting for a free solver ({self.ahead()} solves ahead)'
+        if self.state == 'running':
+            p = self.progress
+            obj = '' if p['objective'] is None else f", objective {p['objective']:,.2f}"
+            return f"Solving: {p['iterations']:,} iterations{obj}, {p['elapsed']:.1f}s"
+        if self.state == 'done':
+            if self.model.solved:
+                return f'Solved: objective {self.model.objVal:,.2f} in {int(self.model.iterations):,} iterations'
+            return failedMessage(self.model.status)
+        if self.state == 'cancelled':
+            return failedMessage(GRB.INTERRUPTED)
+        return f'The solve failed: {self.error}'
@@ -0,0 +1,98 @@
+"""
+Solver log channel: lines from Gurobi's message callback go to a bounded ring buffer for display and, in full,
+to a file on disk. Readers pull only the lines added since their last pull, at most once per interval, so the cost
+of showing the log grows with the new lines rather than with the whole log.
+
+    log = logChannel('.fiberLogs/run.log')
+    job = solveJob(model, log=log)  # solveJobs feeds the log from the callback
+    while not job.finished():
+        new = log.pull()  # None until the interval has passed, else (skipped, lines)
+"""
+import collections
+import os
+import threading
+import time
+
+MAX_LINES = 200  # lines kept in memory; older ones are only on disk
+INTERVAL = 0.5  # seconds between pulls
+
+
+class logChannel:
+
+    def __init__(self, path=None, maxLines=MAX_LINES, interval=INTERVAL):
+        """
+        :param path: file the full log is appended to; None to keep only the ring buffer
+        :param maxLines: size of the ring buffer
+        :param interval: least time in seconds between two pulls that return lines
+        """
+        self.path = path
+        self.interval = interval
+        self.lines = collections.deque(maxlen=maxLines)
+        self.count = 0  # complete lines written so far
+        self._partial = ''
+        self._sent = 0  # count at the last pull
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self._file = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._file = open(path, 'a', buffering=1)
+
+    def write(self, text):
+        """
+        add text, which may hold several lines or part of one
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.write(text)
+            parts = (self._partial + text).split('\n')
+            self._partial = parts.pop()
+            self.lines.extend(parts)
+            self.count += len(parts)
+
+    def close(self):
+        """
+        end any unfinished line and close the file; the ring buffer stays readable
+        """
+        if self._partial:
+            self.write('\n')
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def since(self, n):
+        """
+        :param n: a line count, e.g. an earlier value of count
+        :return: (number of lines after the n-th that have left the ring buffer, list of those still in it)
+        """
+        with self._lock:
+            return self._since(n)
+
+    def _since(self, n):
+        new = self.count - n
+        kept = min(new, len(self.lines))
+        return new - kept, list(self.lines)[len(self.lines) - kept:]
+
+    def pull(self, force=False):
+        """
+        lines added since the last pull, rate limited to one pull per interval
+
+        :param force: pull even if the interval has not passed, e.g. once the solve has ended
+        :return: (skipped, lines) as from since, or None if the interval has not passed
+        """
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return None
+        self._last = now
+        with self._lock:
+            new = self._since(self._sent)
+            self._sent = self.count
+        return new
+
+    def tail(self):
+        """
+        :return: list of the lines in the ring buffer
+        """
+        with self._lock:
+            return list(self.lines)
@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthWorkbook import writeWorkbook, fProd as FPROD  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('data') / 'synth.xlsx')
+    writeWorkbook(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def data(workbook):
+    from impData import impData
+    return impData(workbook, FPROD)
+
+
+@pytest.fixture(scope='session')
+def solved(data):
+    """
+    base model solved once, with results & emissions; tests must not change it
+    """
+    from createModel import createModel
+    model = createModel('test', data, FPROD)
+    model.m.Params.OutputFlag = 0
+    model.runModel()
+    assert model.solved
+    model.getResults()
+    return model
@@ -0,0 +1,153 @@
+"""
+Small synthetic input workbook with the layout impData and em_factors read, for the tests: random but fixed
+prices, yields, recipes and emissions tables for the six products, 16 recovered and 5 virgin fibers.
+"""
+import numpy as np
+import openpyxl
+from openpyxl.utils import column_index_from_string as ci
+
+fProd = ['Containerboard', 'Paperboard', 'Tissue-Away', 'Tissue-Home', 'P&W', 'Newsprint']
+fProdM = fProd + ['Market']
+rFiber = [f'R{i}' for i in range(1, 17)]
+vFiber = [f'V{i}' for i in range(1, 6)]
+cats = ['MIXED', 'NEWS', 'CORRUGATED', 'SUBS', 'HIGH']
+rCat = [cats[i % 5] for i in range(16)]
+rPulp = [f'RecPulp_{t}' for t in fProd] + ['RecPulp_Deinked']
+vPulp = [f'VirPulp_{t}' for t in fProd] + ['VirPulp_Market']
+chan = ['Residential', 'Retail', 'Commercial', 'Industrial']
+levels = {'Containerboard': [0.3, 0.5, 0.7, 0.9, 1.0], 'Paperboard': [0.2, 0.5, 0.8, 1.0],
+          'Tissue-Away': [0.0, 0.5, 1.0], 'Tissue-Home': [0.0, 0.4, 0.8, 1.0],
+          'P&W': [0.0, 0.1, 0.3], 'Newsprint': [0.2, 0.6, 1.0]}
+DC = {'Containerboard': 30.0, 'Paperboard': 12.0, 'Tissue-Away': 3.0, 'Tissue-Home': 5.0, 'P&W': 15.0, 'Newsprint': 3.0}
+
+
+def put(ws, hrow, col, header, rows):
+    """
+    write a table with its header at row hrow, starting at column col; NaN and None cells stay empty
+    """
+    c0 = ci(col)
+    for k, h in enumerate(header):
+        if h is not None:
+            ws.cell(hrow, c0 + k, h)
+    for r, row in enumerate(rows):
+        for k, v in enumerate(row):
+            if v is not None and not (isinstance(v, float) and np.isnan(v)):
+                ws.cell(hrow + 1 + r, c0 + k, v.item() if hasattr(v, 'item') else v)
+
+
+def writeWorkbook(path, seed=0):
+    """
+    :param path: xlsx file to write
+    :param seed: random seed; the same seed gives the same workbook
+    """
+    rng = np.random.default_rng(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    ws = wb.create_sheet('Fiber')
+    put(ws, 2, 'B', ['No', 'Code', 'Category', 'Unit', 'DomPrice', 'ExpPrice'],
+        [[i + 1, f, c, 'ton', float(rng.uniform(50, 150)), float(rng.uniform(60, 200))]
+         for i, (f, c) in enumerate(zip(rFiber + vFiber, rCat + ['VIRGIN'] * 5))])
+    put(ws, 2, 'I', fProdM, rng.uniform(0.7, 0.95, (21, 7)).tolist())
+
+    ws = wb.create_sheet('Pulp')
+    put(ws, 2, 'B', ['Pulp', 'Price', 'Yield', 'Capacity'],
+        [[p, float(rng.uniform(300, 700)), float(rng.uniform(0.85, 0.98)), 1000.0] for p in rPulp + vPulp])
+    put(ws, 2, 'H', fProd, np.zeros((14, 6)).tolist())
+    for i, t in enumerate(fProd):
+        put(ws, 20 + 8 * i, 'H', rPulp, (np.full((5, 7), 500.0)).tolist())
+        put(ws, 20 + 8 * i, 'Q', vPulp, (np.full((5, 7), 500.0)).tolist())
+
+    ws = wb.create_sheet('Demand')
+    old = np.full((5, 6), np.nan); lv = np.full((5, 6), np.nan)
+    for j, t in enumerate(fProd):
+        n = len(levels[t])
+        w = rng.uniform(1, 2, n); w = w / w.sum() * DC[t]
+        old[:n, j] = w; lv[:n, j] = levels[t]
+    put(ws, 2, 'F', fProd, old.tolist())
+    put(ws, 17, 'F', fProd, lv.tolist())
+    put(ws, 2, 'N', fProd, np.zeros((5, 6)).tolist())
+    put(ws, 11, 'N', fProd, np.full((5, 6), 100.0).tolist())
+
+    ws = wb.create_sheet('Recovery')
+    put(ws, 2, 'C', chan, [[0.9, 0.85, 0.95, 0.97]])
+    share = rng.dirichlet(np.ones(4), 6)
+    put(ws, 6, 'C', chan + ['Domestic Consumption'], [list(share[j]) + [DC[t]] for j, t in enumerate(fProd)])
+    co = rng.uniform(0.3, 0.6, (6, 4))
+    put(ws, 25, 'C', chan, co.tolist())
+    put(ws, 36, 'C', chan, np.minimum(co + 0.3, 0.99).tolist())
+    put(ws, 45, 'C', chan, rng.uniform(10, 50, (6, 4)).tolist())
+    for i in range(6):
+        by = rng.dirichlet(np.ones(16), 4).T
+        for r in range(16):
+            for k in range(4):
+                ws.cell(32 + r, 15 + 4 * i + k, float(by[r, k]))
+    put(ws, 6, 'U', ['Import', 'Export'], [[0.0, float(rng.uniform(0.1, 0.5))] for _ in range(16)])
+
+    ws = wb.create_sheet('Recipe')
+    ry = np.vstack([rng.dirichlet(np.ones(16), 7).T, rng.dirichlet(np.ones(5), 7).T])
+    put(ws, 2, 'L', fProdM, ry.tolist())
+    put(ws, 2, 'T', fProdM, np.zeros((16, 7)).tolist())
+    put(ws, 21, 'T', fProdM, np.ones((16, 7)).tolist())
+
+    ws = wb.create_sheet('nonFiber')
+    put(ws, 3, 'A', ['No', 'Name'], [[i + 1, f'chem{i}'] for i in range(42)])
+    put(ws, 3, 'E', fProd + ['TransCode', 'Impact Factor'],
+        [list(rng.uniform(0, 0.03, 6)) + [int(rng.integers(2, 8)), float(rng.uniform(0.1, 2))] for _ in range(42)])
+
+    ws = wb.create_sheet('OldData')
+    f2p = rng.uniform(0, 2, (21, 7))
+    put(ws, 2, 'A', ['Code'] + fProdM + ['TransCode'],
+        [[f] + list(f2p[k]) + [int(rng.integers(0, 8))] for k, f in enumerate(rFiber + vFiber)])
+    pbp = rng.uniform(0, 5, (14, 6))
+    put(ws, 2, 'K', ['Pulp'] + fProd + ['TransCode'],
+        [[p] + list(pbp[k]) + [int(rng.integers(0, 8))] for k, p in enumerate(rPulp + vPulp)])
+    put(ws, 20, 'K', ['Level'] + fProd, [[f'L{r}'] + list(old[r]) for r in range(5)])
+    put(ws, 27, 'A', ['Demand'] + fProd, [['total'] + [DC[t] for t in fProd]])
+    put(ws, 30, 'K', ['Item'] + fProd, [['Domestic Consumption'] + [DC[t] for t in fProd],
+                                        ['Collection Volume'] + [DC[t] * 0.6 for t in fProd],
+                                        ['Recovery Volume'] + [DC[t] * 0.5 for t in fProd]])
+    put(ws, 32, 'E', ['Code', 'exportOld', 'TransCode'],
+        [[f, float(rng.uniform(0.1, 0.5)), int(rng.integers(2, 8))] for f in rFiber])
+    put(ws, 32, 'A', ['Code', 'fiberType'], [[f, c] for f, c in zip(rFiber + vFiber[:4], rCat + ['VIRGIN'] * 4)])
+
+    ws = wb.create_sheet('EmTables')
+    put(ws, 3, 'A', ['Item'] + fProd, [['bioCO2'] + list(rng.uniform(0.1, 1, 6)),
+                                       ['fossilCO2'] + list(rng.uniform(0.1, 1, 6)),
+                                       ['TransCode'] + [5] * 6])
+    put(ws, 3, 'J', ['Item'] + fProd, [['bioEI b1'] + list(rng.uniform(1, 3, 6)),
+                                       ['bioEI b0'] + list(rng.uniform(1, 3, 6)),
+                                       ['fesEI'] + list(rng.uniform(1, 3, 6))])
+    put(ws, 9, 'J', ['Item'] + fProd, [['bioPct b1'] + list(rng.uniform(0, 0.3, 6)),
+                                       ['bioPct b0'] + list(rng.uniform(0.2, 0.5, 6))])
+    put(ws, 10, 'A', ['Item'] + fProd, [['bioCO2 b1'] + list(rng.uniform(0, 0.1, 6)),
+                                        ['fesCO2 b1'] + list(rng.uniform(0, 0.1, 6))])
+    put(ws, 15, 'O', ['Pulp', 'EI'], [[p, float(rng.uniform(5, 15))] for p in
+                                      ['RecPulp_Containerboard', 'RecPulp_P&W', 'VirPulp_P&W', 'VirPulp_Newsprint']]
+        + [['PPE', 7.5]])
+    fuels = [f'fuel{i}' for i in range(13)]
+    put(ws, 16, 'A', ['Fuel'] + fProd + ['Fuel Type', 'Upstream Impact Factor', 'FU/GJ', 'TransCode', 'x1', 'x2'],
+        [[f] + list(rng.uniform(0, 0.2, 6)) + [int(1 + (k % 2)), float(rng.uniform(0, 1)),
+                                              float(rng.uniform(0, 1)), int(rng.integers(0, 8)), None, None]
+         for k, f in enumerate(fuels)])
+    modes = ['Landfill', 'Burn', 'LandApp', 'Compost']
+    put(ws, 33, 'A', ['Type'] + modes + ['Input Base', 'Intensity'],
+        [[f'rt{k}'] + list(rng.dirichlet(np.ones(4))) + [1 + (k % 2), float(rng.uniform(0.5, 1.5))] for k in range(6)])
+    put(ws, 42, 'A', ['Mode'] + fProd + ['TransCode'],
+        [[m] + list(rng.uniform(0, 1, 6)) + [int(rng.integers(2, 8))] for m in modes])
+    put(ws, 49, 'A', ['Mode'] + fProd + ['TransCode'],
+        [[m] + list(rng.uniform(0, 1, 6)) + [int(rng.integers(2, 8))] for m in modes])
+    tm = ['Truck', 'Rail', 'Barge', 'Ship']
+    put(ws, 33, 'L', ['Code'] + tm, [[k] + list(rng.dirichlet(np.ones(4))) for k in range(2, 13)])
+    put(ws, 47, 'L', ['Code'] + tm, [[k] + list(rng.uniform(10, 500, 4)) for k in range(2, 13)])
+    put(ws, 60, 'L', ['Code'] + tm, [['transUMI'] + list(rng.uniform(1e-5, 1e-4, 4))])
+    put(ws, 59, 'A', ['Int'] + list(range(1, 8)), [['wood'] + [-100.0, -10.0, -1.0, 0.0, 1.0, 10.0, 100.0]])
+    for hr in [63, 72, 81, 90, 99, 108]:
+        put(ws, hr, 'A', ['n'] + list(range(10, 101, 10)),
+            [[n] + list(rng.uniform(-1, 1, 10)) for n in range(1, 7)])
+    put(ws, 67, 'L', ['Item', 'Val'], [['Production', 100.0], ['Energy Intensity', 10.0], ['Emission Factor', 0.1]])
+    put(ws, 73, 'L', ['Item', 'Val'], [['totalVir', 50.0], ['domesticRec', 40.0], ['importRec-US', 10.0],
+                                       ['importRec-nonUS', 5.0], ['x', 1.0], ['y', 2.0]])
+    put(ws, 82, 'L', ['Cat', 'US', 'China'], [[c, float(rng.uniform(0.7, 0.9)), float(rng.uniform(0.6, 0.9))]
+                                             for c in cats])
+    wb.save(path)
+
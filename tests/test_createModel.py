@@ -0,0 +1,103 @@
+import json
+import os
+import time
+import pytest
+from gurobipy import GRB
+from createModel import baseModel, failedMessage
+from batchRun import applyScenarios
+from dataCache import saveSolution
+from scenarios import resetScenarios
+from solveJobs import solveJob
+from synthWorkbook import fProd as FPROD
+
+
+def test_baseModelMatchesReference(solved):
+    # frozen from the addConstrs build of the model on writeWorkbook(seed=0)
+    with open(os.path.join(os.path.dirname(__file__), 'baseModelReference.json')) as f:
+        ref = json.load(f)
+    assert (solved.m.NumConstrs, solved.m.NumVars) == (ref['rows'], ref['cols'])
+    assert sorted(c.ConstrName for c in solved.m.getConstrs()) == ref['constrs']
+    assert sorted(v.VarName for v in solved.m.getVars()) == ref['vars']
+    assert solved.objVal == pytest.approx(ref['objective'], rel=1e-9)
+
+
+def test_copyKeepsPendingChanges(data):
+    model = baseModel(data, FPROD).copy('pending')
+    x = model.m.getVars()[0]
+    model.addConstr('extra', 0, x + 0, GRB.LESS_EQUAL, 5)  # not yet applied by update
+    new = model.copy('pendingCopy')
+    c = new.constrs['extra'][0]
+    assert c.ConstrName == 'extra[0]' and c.RHS == 5
+    assert new.m.NumConstrs == model.m.NumConstrs
+    for f, cs in model.constrs.items():
+        assert all(new.constrs[f][k].ConstrName == v.ConstrName for k, v in cs.items()), f
+
+
+def test_copyRaisesOnStaleHandle(data):
+    model = baseModel(data, FPROD).copy('stale')
+    fam = next(iter(model.constrs))
+    model.m.remove(next(iter(model.constrs[fam].values())))  # removed without removeConstrs, so the handle stays
+    with pytest.raises(ValueError):
+        model.copy()
+
+
+@pytest.mark.parametrize('status', [GRB.INFEASIBLE, GRB.UNBOUNDED, GRB.INF_OR_UNBD])
+def test_cachedFailureMessage(data, tmp_path, status):
+    model = baseModel(data, FPROD).copy('cachedFailure')
+    saveSolution(str(tmp_path), model.cacheKey(), status, None, None)
+    job = solveJob(model, str(tmp_path), diagnose=False)
+    while not job.finished():
+        time.sleep(0.05)
+    assert model.failed and model.status == status and model.iterations == 0
+    assert job.describe() == failedMessage(status)
+
+
+def rows(model):
+    """
+    (sense, rhs, coefficients) of every registry row by family & key
+    """
+    model.m.update()
+    A = model.m.getA().tocsr()
+    coeffs = lambda j: dict(zip(A[j].indices.tolist(), A[j].data.tolist()))
+    return {f: {k: (c.Sense, c.RHS, coeffs(c.index)) for k, c in cs.items()} for f, cs in model.constrs.items() if cs}
+
+
+def solveQuiet(model):
+    model.m.Params.OutputFlag = 0
+    model.runModel()
+    assert model.solved
+    return model.objVal
+
+
+FAVG = {'scenario': 'fAvg', 'target': 'Containerboard', 'incr': 5}
+FAVG2 = {'scenario': 'fAvg', 'target': ['Containerboard', 'Tissue-Home'], 'incr': [3, 7]}
+DEMAND = {'scenario': 'demand', 'prod': 'Paperboard', 'perc': -5}
+CONTAM = {'scenario': 'contam', 'custom_cm': 0.1}
+MPYIELD = {'scenario': 'mpYield', 'perc': 10}
+
+
+@pytest.mark.parametrize('steps, final', [
+    ([FAVG, FAVG], [FAVG]),
+    ([FAVG, DEMAND, FAVG2, CONTAM], [DEMAND, FAVG2, CONTAM]),
+    ([DEMAND, dict(DEMAND, perc=8), MPYIELD, FAVG2, FAVG], [dict(DEMAND, perc=8), MPYIELD, FAVG]),
+    ([CONTAM, MPYIELD, dict(MPYIELD, perc=5), dict(CONTAM, custom_cm=0.2)],
+     [dict(MPYIELD, perc=5), dict(CONTAM, custom_cm=0.2)]),
+])
+def test_scenariosInPlaceMatchFresh(data, steps, final):
+    edited = baseModel(data, FPROD).copy('edited')
+    for step in steps:
+        applyScenarios(edited, [step])
+    fresh = baseModel(data, FPROD).copy('fresh')
+    applyScenarios(fresh, final)
+    assert rows(edited) == rows(fresh)
+    assert edited.m.NumConstrs == fresh.m.NumConstrs
+    assert solveQuiet(edited) == pytest.approx(solveQuiet(fresh), rel=1e-9)
+
+
+def test_resetScenariosGivesBase(data, solved):
+    model = baseModel(data, FPROD).copy('reset')
+    applyScenarios(model, [FAVG, DEMAND, CONTAM])
+    assert solveQuiet(model) != pytest.approx(solved.objVal, rel=1e-9)
+    model = resetScenarios(model)
+    assert rows(model) == rows(baseModel(data, FPROD))
+    assert solveQuiet(model) == pytest.approx(solved.objVal, rel=1e-9)
@@ -0,0 +1,68 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal, assert_series_equal
+import impData as impDataModule
+from dataCache import workbookKey, loadTables, saveTables, evict
+from impData import impData
+from synthWorkbook import writeWorkbook, fProd as FPROD
+
+
+def assertSame(a, b, name):
+    if isinstance(a, pd.DataFrame):
+        assert_frame_equal(a, b, obj=name)
+    elif isinstance(a, pd.Series):
+        assert_series_equal(a, b, obj=name)
+    elif isinstance(a, dict):
+        assert list(a) == list(b), name
+        for k in a:
+            assertSame(a[k], b[k], f'{name}[{k}]')
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b), name
+        for k, (x, y) in enumerate(zip(a, b)):
+            assertSame(x, y, f'{name}[{k}]')
+    else:
+        assert a == b, name
+
+
+def entries(cacheDir):
+    return sorted(n for n in os.listdir(cacheDir) if not n.startswith('.'))
+
+
+def test_cachedTablesMatchParse(workbook, data, tmp_path, monkeypatch):
+    cacheDir = str(tmp_path)
+    first = impData(workbook, FPROD, cacheDir=cacheDir)
+    assert entries(cacheDir) == [first.cacheKey]
+    monkeypatch.setattr(impDataModule, 'readSheets', lambda *args: pytest.fail('workbook read despite the cache'))
+    cached = impData(workbook, FPROD, cacheDir=cacheDir)
+    tables = {k: v for k, v in vars(data).items() if k not in ('fileName', 'cacheKey') and not k.startswith('_')}
+    assert sorted(k for k in vars(cached) if k not in ('fileName', 'cacheKey')) == sorted(tables)
+    for k, v in tables.items():
+        assertSame(v, getattr(cached, k), k)
+
+
+def test_keyFollowsContent(workbook, tmp_path):
+    other = str(tmp_path / 'other.xlsx')
+    writeWorkbook(other, seed=1)
+    same = str(tmp_path / 'same.xlsx')
+    with open(workbook, 'rb') as f, open(same, 'wb') as g:
+        g.write(f.read())
+    assert workbookKey(same, FPROD) == workbookKey(workbook, FPROD)
+    assert workbookKey(other, FPROD) != workbookKey(workbook, FPROD)
+    assert workbookKey(workbook, FPROD[:-1]) != workbookKey(workbook, FPROD)
+
+
+def test_evictLeastRecentlyUsed(tmp_path):
+    cacheDir, now = str(tmp_path), time.time()
+    for n in range(5):
+        saveTables(cacheDir, f'k{n}', {'a': pd.Series(np.arange(1000, dtype=float) + n)})
+        os.utime(os.path.join(cacheDir, f'k{n}', 'manifest.json'), (now - 100 + n, now - 100 + n))  # older first
+    os.utime(os.path.join(cacheDir, 'k0', 'manifest.json'))  # just used
+    size = lambda k: sum(os.path.getsize(os.path.join(cacheDir, k, f)) for f in os.listdir(os.path.join(cacheDir, k)))
+    maxBytes = size('k0') * 2.5
+    evict(cacheDir, maxBytes)
+    assert entries(cacheDir) == ['k0', 'k4']
+    assert sum(size(k) for k in entries(cacheDir)) <= maxBytes
+    assert loadTables(cacheDir, 'k0')['a'].iloc[0] == 0
@@ -0,0 +1,284 @@
+import copy
+import numpy as np
+import pandas as pd
+import pytest
+import emissionsCalcV4 as em
+
+
+class loopEmissions(em.en_emissions):
+    """
+    the per-product loops the vectorized methods replaced, kept as the reference for their results, NaN included
+    """
+
+    def calculateTrans(cls,transVol):
+        transImpact = pd.Series(0.0, index = cls.fProd)
+        tC = transVol['TransCode']
+        tC = tC[(tC != 0) & (tC != 1)]
+        transVol = transVol.loc[tC.index]
+        for t in cls.fProd:
+            for m in cls.transUMI.columns:
+                transImpact[t] += sum(transVol[t] * cls.transPct.loc[tC,m].values * cls.transKM.loc[tC,m].values *
+                                      cls.transUMI[m].values)
+        return transImpact
+
+    def getExportTrans(cls,transVol):
+        transImpact = pd.Series(0.0, index = transVol.columns[:-1])
+        tC = transVol['TransCode']
+        tC = tC[(tC != 0) & (tC != 1)]
+        transVol = transVol.loc[tC.index]
+        for n in transVol.columns[:-1]:
+            for m in cls.transUMI.columns:
+                transImpact[n] += sum(transVol[n] * cls.transPct.loc[tC,m].values * cls.transKM.loc[tC,m].values *
+                                      cls.transUMI[m].values)
+        return transImpact.values
+
+    def getEnergyYldCoeff(cls,f2pVol,pbpVol):
+        f2pByPulp = pd.Series(0.0, index = pbpVol.index, name = 'fiber2pulp')
+        for p in cls.rPulp:
+            f2pByPulp[p] = sum([f2pVol.loc[cls.rFiber,t].sum() for t in cls.fProdM
+                                if cls.fProdM.index(t) == cls.rPulp.index(p)])
+        for q in cls.vPulp:
+            f2pByPulp[q] = sum([f2pVol.loc[cls.vFiber,t].sum() for t in cls.fProdM
+                                if cls.fProdM.index(t) == cls.vPulp.index(q)])
+        pulpProd = pd.Series([pbpVol.loc[i].sum() for i in pbpVol.index], index = pbpVol.index, name = 'pulpProd')
+        PYCoeff = pd.Series(f2pByPulp / pulpProd, name = 'pulpYldCoeff')
+        PYCoeff.replace([np.inf, -np.inf], np.nan, inplace=True)
+        return PYCoeff.fillna(0)
+
+    def getEnergyPulpPct(cls,pbpVol):
+        pulpPct = pbpVol.copy().drop(['TransCode'], axis=1)
+        for t in pulpPct.columns:
+            rTotalPulp = pulpPct.loc[cls.rPulp,t].sum()
+            vTotalPulp = pulpPct.loc[cls.vPulp,t].sum()
+            pulpPct.loc[cls.rPulp,t] = pulpPct.loc[cls.rPulp,t] / rTotalPulp
+            pulpPct.loc[cls.vPulp,t] = pulpPct.loc[cls.vPulp,t] / vTotalPulp
+        return pulpPct.fillna(0)
+
+    def getEnergyMultiProd(cls,PYMult,pulpPct):
+        rYldMultiProd = pd.Series([sum(pulpPct.loc[cls.rPulp,t] * PYMult[cls.rPulp]) for t in cls.fProd],
+                                  index = cls.fProd, name = 'rYldMultiProd')
+        vYldMultiProd = pd.Series([sum(pulpPct.loc[cls.vPulp,t] * PYMult[cls.vPulp]) for t in cls.fProd],
+                                  index = cls.fProd, name = 'vYldMultiProd')
+        rYldMultiProd.replace([np.inf, -np.inf], np.nan, inplace=True)
+        vYldMultiProd.replace([np.inf, -np.inf], np.nan, inplace=True)
+        return pd.concat([rYldMultiProd.fillna(0), vYldMultiProd.fillna(0)], axis=1)
+
+    def calculateEnergy(cls,pbpVol,prodLD,multiProd,pwpEI,paperEI):
+        bioEnergy = pd.Series(0.0, index = cls.fProd, name = 'bioEnergy')
+        fesEnergy = pd.Series(0.0, index = cls.fProd, name = 'fesEnergy')
+        totalEnergy = pd.Series(0.0, index = cls.fProd, name = 'totalEnergy')
+        for t in cls.fProd:
+            avgrecPct = sum(prodLD[t].values[:len(cls.rLevel[t])] * cls.rLevel[t]) / prodLD[t].sum()
+            bioPctPW = avgrecPct * cls.bioPct.loc['bioPct b1',t] + cls.bioPct.loc['bioPct b0',t]
+            pulpProdEnergy = sum([pbpVol.loc[p,t] * pwpEI.loc[p].values[0] for p in pwpEI.index])
+            ppEnergy = pulpProdEnergy + prodLD[t].sum() * paperEI.values[0]
+            bioEnergy[t] = bioPctPW * ppEnergy
+            fesEnergy[t] = (1 - bioPctPW) * ppEnergy * multiProd.loc[t,'rYldMultiProd']
+            totalEnergy[t] = bioEnergy[t] + fesEnergy[t]
+        return pd.concat([bioEnergy, fesEnergy, totalEnergy], axis=1)
+
+    def calculateFuel(cls,calcEnergy):
+        fuels = cls.fuelTable.index
+        bioFI = pd.Series(0.0, index = cls.fProd, name = 'bioFuelImp')
+        fesFI = pd.Series(0.0, index = cls.fProd, name = 'fesFuelImp')
+        fuelImp = pd.Series(0.0, index = cls.fProd, name = 'fuelImp')
+        for t in cls.fProd:
+            bioFI[t] = calcEnergy.loc[t,'bioEnergy'] * sum([cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'Upstream Impact Factor']
+                                                            for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 1])
+            fesFI[t] = calcEnergy.loc[t,'fesEnergy'] * sum([cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'Upstream Impact Factor']
+                                                            for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 2])
+            fuelImp[t] = bioFI[t] + fesFI[t]
+        fuelTransVol = cls.fuelTable.copy()
+        fuel1 = [f for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 1]
+        fuel2 = [f for f in fuels if cls.fuelTable.loc[f,'Fuel Type'] == 2]
+        for t in cls.fProd:
+            fuelTransVol.loc[fuel1,t] = [calcEnergy.loc[t,'bioEnergy'] * cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'FU/GJ']
+                                         for f in fuel1]
+            fuelTransVol.loc[fuel2,t] = [calcEnergy.loc[t,'fesEnergy'] * cls.fuelTable.loc[f,t] * cls.fuelTable.loc[f,'FU/GJ']
+                                         for f in fuel2]
+        fuelTrans = pd.Series(cls.calculateTrans(fuelTransVol), name = 'fuelTrans')
+        return pd.concat([bioFI, fesFI, fuelImp, fuelTrans], axis=1)
+
+    def calculateResidual(cls,pbpVol,f2pVol):
+        pulpProd = pd.Series(0.0, index = cls.rPulp + cls.vPulp, name = 'pulpProduced')
+        fiberRes = pd.Series(0.0, index = cls.rPulp + cls.vPulp, name = 'fiberResidue')
+        for pulps, fibers in [(cls.rPulp, cls.rFiber), (cls.vPulp, cls.vFiber)]:
+            for p in pulps:
+                pulpProd[p] = sum([(f2pVol.loc[fibers,t].mul(cls.f2pYld.loc[fibers,t])).sum() for t in cls.fProdM
+                                   if cls.fProdM.index(t) == pulps.index(p)])
+                fiberRes[p] = sum([(f2pVol.loc[fibers,t].mul(1 - cls.f2pYld.loc[fibers,t])).sum() for t in cls.fProdM
+                                   if cls.fProdM.index(t) == pulps.index(p)])
+        pulpUP = pbpVol.iloc[:,:-1].div(pulpProd, axis=0).fillna(0)
+
+        totalRsd = []
+        for pulps in (cls.rPulp, cls.vPulp):
+            fiberRsd = pulpUP.loc[pulps].mul(fiberRes[pulps], axis=0).sum()
+            pulpRsd = pulpUP.loc[pulps].mul(1 - cls.pulpYld.iloc[:,0].loc[pulps], axis=0).sum()
+            totalRsd.append(pd.Series(fiberRsd + pulpRsd, index = cls.fProd))
+
+        rsdlType = cls.rsdlModes.index
+        rsdlQuantity = pd.DataFrame(0.0, index = rsdlType, columns = cls.fProd)
+        for rt in rsdlType:
+            if cls.rsdlModes.loc[rt,'Input Base'] == 1:
+                rsdlQuantity.loc[rt,:] = totalRsd[0] * cls.rsdlModes.loc[rt,'Intensity']
+            if cls.rsdlModes.loc[rt,'Input Base'] == 2:
+                rsdlQuantity.loc[rt,:] = totalRsd[1] * cls.rsdlModes.loc[rt,'Intensity']
+
+        rsdlMode = cls.rsdlModes.columns[:-2]
+        rsdlModeVol = {}
+        for rM in rsdlMode:
+            rsdlModeVol[rM] = rsdlQuantity.mul(cls.rsdlModes[rM], axis=0)
+            rsdlModeVol[rM] = rsdlModeVol[rM].assign(TransCode=cls.rsdlbio.loc[rM,'TransCode'] * np.ones(len(rsdlType)))
+            rsdlModeVol[rM].replace([np.inf, -np.inf], np.nan, inplace=True)
+
+        bioImp = pd.Series(0.0, index = cls.fProd, name = 'bioImp')
+        fosImp = pd.Series(0.0, index = cls.fProd, name = 'fossilImp')
+        for t in cls.fProd:
+            bioImp[t] = sum([rsdlModeVol[rM][t].sum() * cls.rsdlbio.loc[rM,t] for rM in rsdlMode])
+            fosImp[t] = sum([rsdlModeVol[rM][t].sum() * cls.rsdlfos.loc[rM,t] for rM in rsdlMode])
+        biofosImp = pd.Series(bioImp + fosImp, name = 'bio+fos')
+
+        rsdlTrans = pd.Series(0.0, index = cls.fProd, name = 'rsdlTrans')
+        for rM in rsdlMode:
+            rsdlTrans += cls.calculateTrans(rsdlModeVol[rM])
+        return pd.concat([bioImp, fosImp, biofosImp, rsdlTrans], axis=1)
+
+
+def ownFactors(factors):
+    """
+    shallow copy of em_factors with its own baseline cache, so baselines of different implementations stay apart
+    """
+    factors = copy.copy(factors)
+    factors.baseline = {}
+    return factors
+
+
+def pulpYields(data):
+    p2pYld = data.rPYield.copy(); p2pYld.update(data.vPYield)
+    return pd.DataFrame.from_dict(p2pYld, orient='index', columns=['pYield'])
+
+
+def solutions(model, n=12, seed=1):
+    """
+    emissions inputs scattered around a solved model's: random volumes, with some pulps, products & fibers at zero
+    and some volumes blank (NaN)
+    """
+    rng = np.random.default_rng(seed)
+    res = model.results
+    sols = []
+    for k in range(n):
+        f2p = res.f2pVolNew * rng.uniform(0, 2, res.f2pVolNew.shape)
+        pbp = res.pbpVolNew * rng.uniform(0, 2, res.pbpVolNew.shape)
+        if k % 3 == 0:
+            pbp.iloc[rng.integers(0, len(pbp))] = 0
+            f2p[f2p.columns[rng.integers(0, f2p.shape[1])]] = 0.0
+        if k % 4 == 1:
+            pbp[model.fProd[3]] = 0.0
+        if k % 5 == 2:
+            f2p.loc[model.emFactors.vFiber] *= 50
+        if k % 3 == 2:
+            f2p.iloc[rng.integers(0, len(f2p)), rng.integers(0, f2p.shape[1])] = np.nan
+            pbp.iloc[rng.integers(0, len(pbp)), rng.integers(0, pbp.shape[1])] = np.nan
+        demand = {t: res.demandNew[t] * rng.uniform(0, 2, len(res.demandNew[t])) for t in model.fProd}
+        sols.append((f2p, pbp, res.consCollNew * rng.uniform(0.5, 1.5, res.consCollNew.shape),
+                     res.exportNew * rng.uniform(0, 2), demand))
+    return sols
+
+
+def assertSame(a, b, what):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        np.testing.assert_allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float), rtol=1e-9, err_msg=what)
+    else:
+        pd.testing.assert_frame_equal(pd.DataFrame(a), pd.DataFrame(b), check_dtype=False, check_names=False,
+                                      rtol=1e-9, obj=what)
+
+
+def compareMethods(A, B):
+    """
+    every vectorized method of B against the loop in A, and the full calculation
+    """
+    assertSame(A.calculateTrans(A.f2pVolNew), B.calculateTrans(B.f2pVolNew), 'calculateTrans')
+    assertSame(A.getExportTrans(A.exportNew), B.getExportTrans(B.exportNew), 'getExportTrans')
+    yA, yB = A.getEnergyYldCoeff(A.f2pVolNew, A.pbpVolNew), B.getEnergyYldCoeff(B.f2pVolNew, B.pbpVolNew)
+    assertSame(yA, yB, 'getEnergyYldCoeff')
+    pA, pB = A.getEnergyPulpPct(A.pbpVolNew), B.getEnergyPulpPct(B.pbpVolNew)
+    assertSame(pA, pB, 'getEnergyPulpPct')
+    mult = (yA / A.getEnergyYldCoeff(A.f2pVolOld, A.pbpVolOld)).fillna(0)
+    mA, mB = A.getEnergyMultiProd(mult, pA), B.getEnergyMultiProd(mult, pB)
+    assertSame(mA, mB, 'getEnergyMultiProd')
+    eA = A.calculateEnergy(A.pbpVolNew, A.demandNew, mA, A.pwpEI.iloc[:-1], A.pwpEI.iloc[-1])
+    eB = B.calculateEnergy(B.pbpVolNew, B.demandNew, mB, B.pwpEI.iloc[:-1], B.pwpEI.iloc[-1])
+    assertSame(eA, eB, 'calculateEnergy')
+    assertSame(A.calculateFuel(eA), B.calculateFuel(eB), 'calculateFuel')
+    assertSame(A.calculateResidual(A.pbpVolNew, A.f2pVolNew), B.calculateResidual(B.pbpVolNew, B.f2pVolNew),
+               'calculateResidual')
+    rA, rB = A.calculateEmissions(), B.calculateEmissions()
+    for k in rA:
+        assertSame(rA[k], rB[k], k)
+
+
+def test_vectorizedMatchesLoop(solved, data):
+    shared = (solved.fProd, data.rLevel, data.fiber2pulpYield, pulpYields(data))
+    for sol in solutions(solved):
+        compareMethods(loopEmissions(ownFactors(data.emFactors()), *shared, *sol),
+                       em.en_emissions(data.emFactors(), *shared, *sol))
+
+
+def test_blankTransportFactors(solved, data):
+    # a blank % or distance makes that TransCode's impact NaN, as the loop did; other codes are unaffected
+    factors = ownFactors(data.emFactors())
+    factors.transPct = factors.transPct.copy()
+    factors.transPct.iloc[1, 2] = np.nan
+    factors.transUnitImp = em.transUnitImpact(factors.transPct, factors.transKM, factors.transUMI)
+    assert factors.transUnitImp.isna().sum() == 1
+
+    shared = (solved.fProd, data.rLevel, data.fiber2pulpYield, pulpYields(data))
+    sol = solutions(solved, 1)[0]
+    compareMethods(loopEmissions(ownFactors(factors), *shared, *sol), em.en_emissions(factors, *shared, *sol))
+
+
+@pytest.mark.parametrize('column', ['Containerboard', 'Market'])
+def test_blankFiberVolume(solved, data, column):
+    # blank fiber volumes count as 0 in the pulp yield coefficient & residuals, as the pandas sums did
+    shared = (solved.fProd, data.rLevel, data.fiber2pulpYield, pulpYields(data))
+    f2p, pbp, consColl, export, demand = solutions(solved, 1)[0]
+    f2p = f2p.copy()
+    f2p.loc[f2p.index[0], column] = np.nan
+    f2p.loc[f2p.index[-1], column] = np.nan
+    B = em.en_emissions(data.emFactors(), *shared, f2p, pbp, consColl, export, demand)
+    assert np.isfinite(B.getEnergyYldCoeff(B.f2pVolNew, B.pbpVolNew)).all()
+    assert np.isfinite(B.calculateResidual(B.pbpVolNew, B.f2pVolNew)[['bioImp', 'fossilImp']].values).all()
+    compareMethods(loopEmissions(ownFactors(data.emFactors()), *shared, f2p, pbp, consColl, export, demand), B)
+
+
+def test_batchMatchesSingle(solved, data):
+    shared = (solved.fProd, data.rLevel, data.fiber2pulpYield, pulpYields(data))
+    sols = solutions(solved, seed=2)
+    sols[1] = (sols[1][0].iloc[::-1], sols[1][1].iloc[::-1]) + sols[1][2:]  # rows in another order are aligned by label
+    batch = em.en_emissions_batch(data.emFactors(), *shared,
+                                  *em.stackSolutions(data.emFactors(), solved.fProd, data.rLevel, sols))
+    res = batch.calculateEmissions()
+    for s, sol in enumerate(sols):
+        single = em.en_emissions(data.emFactors(), *shared, *sol).calculateEmissions()
+        assertSame(res['new'].loc[s], single['new'], f'new {s}')
+        assertSame(res['newenergy'].loc[s], single['newenergy'], f'newenergy {s}')
+        assertSame(res['forest'].loc[[s]].reset_index(drop=True), single['forest'], f'forest {s}')
+        assertSame(res['trade'].loc[s].values, single['trade'].values, f'trade {s}')
+        assert res['old'] is single['old']
+
+
+def test_missingLabelRaises(solved, data):
+    shared = (solved.fProd, data.rLevel, data.fiber2pulpYield, pulpYields(data))
+    f2p, pbp, consColl, export, demand = solutions(solved, 1)[0]
+    with pytest.raises(KeyError):
+        em.stackSolutions(data.emFactors(), solved.fProd, data.rLevel, [(f2p.iloc[1:], pbp, consColl, export, demand)])
+    B = em.en_emissions(data.emFactors(), *shared, f2p, pbp, consColl, export, demand)
+    with pytest.raises(KeyError):
+        B.getEnergyYldCoeff(B.f2pVolNew, B.pbpVolNew.iloc[:-1])
+
+    factors = ownFactors(data.emFactors())
+    factors.fiberType = factors.fiberType.rename(index={factors.fiberType.index[0]: 'unknown'})
+    B = em.en_emissions_batch(factors, *shared, *em.stackSolutions(factors, solved.fProd, data.rLevel, [
+        (f2p, pbp, consColl, export, demand)]))
+    with pytest.raises(KeyError):
+        B.calculateEmissions()
@@ -0,0 +1,37 @@
+import json
+import zipfile
+import openpyxl
+import pandas as pd
+import pytest
+from exportResults import SHEETS, modelTables, modelMeta, writeBundle, writeWorkbook
+
+
+@pytest.fixture(scope='module')
+def tables(solved):
+    return modelTables(solved, 'st')
+
+
+def test_zipBundle(solved, tables, tmp_path):
+    path = str(tmp_path / 'results.zip')
+    assert writeBundle(tables, path, 'zip', meta=modelMeta(solved, 'st')) == [path]
+    with zipfile.ZipFile(path) as z:
+        assert sorted(z.namelist()) == sorted([f'{n}.csv' for n in tables] + ['manifest.json'])
+        manifest = json.loads(z.read('manifest.json'))
+        with z.open('f2pVolNew.csv') as f:
+            f2p = pd.read_csv(f, index_col=0)
+    assert list(manifest['tables']) == list(tables)
+    assert {n: t['rows'] for n, t in manifest['tables'].items()} == {n: len(df) for n, df in tables.items()}
+    assert manifest['objective'] == solved.objVal and manifest['unit'] == 'st'
+    assert f2p.values == pytest.approx(tables['f2pVolNew'].values)
+
+
+def test_workbookSheets(tables, tmp_path):
+    path = str(tmp_path / 'results.xlsx')
+    writeWorkbook(tables, path)
+    wb = openpyxl.load_workbook(path, read_only=True)
+    assert wb.sheetnames == list(SHEETS) + ['Results-Other']
+    titles = {ws.title: [r[0] for r in ws.iter_rows(values_only=True) if r and r[0] in tables] for ws in wb}
+    for sheet, names in SHEETS.items():
+        assert titles[sheet][:len(names)] == [n for n in names if n in tables]
+    assert sorted(n for names in titles.values() for n in names) == sorted(tables)
+    wb.close()
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modelResults import modelResults, UNITS
+
+
+def test_tablesAreReadOnlyViews():
+    df = pd.DataFrame(np.arange(6, dtype=float).reshape(2, 3), index=['a', 'b'])
+    res = modelResults({'t': df})
+    assert np.shares_memory(res.get('t', 'MMst').values, df.values)
+    with pytest.raises(ValueError):
+        res.get('t', 'MMst').values[0, 0] = 1
+    assert res.get('t', 'st').values[1, 2] == 5 * UNITS['st']
+
+
+def test_baselineSharedAcrossSolves(solved):
+    first = solved.results
+    second = solved.copy('again')
+    second.getResults(solved.m.getAttr('X', solved.m.getVars()))
+    for name in ['f2pVolOld', 'consCollOld']:
+        assert second.results.get(name, 'MMst') is first.get(name, 'MMst')
+        assert second.results.get(name, 'Mg') is first.get(name, 'Mg')
+    assert second.results.oldDemand is first.oldDemand
+    assert second.results.names() == first.names()
+    with pytest.raises(ValueError):
+        first.get('f2pVolOld', 'MMst').values[0, 0] = 1
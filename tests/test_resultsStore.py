@@ -0,0 +1,12 @@
+import pytest
+from resultsStore import resultsStore, emissionsSummary
+
+
+def test_addModelAndQuery(solved, tmp_path):
+    with resultsStore(str(tmp_path / 'store.sqlite')) as store:
+        runs = [store.addModel(solved, [{'scenario': 'fAvg', 'target': 'Containerboard', 'incr': incr}], label='t',
+                               tables=False) for incr in [5, 7]]
+        df = store.query('summary', 'net', 'fosGHG', where={'fAvg.target': 'Containerboard', 'fAvg.incr': 7})
+    assert df['run'].tolist() == runs[1:]
+    assert df['value'].iloc[0] == pytest.approx(emissionsSummary(solved.emissions).loc['net', 'fosGHG'])
+    assert df['objective'].iloc[0] == pytest.approx(solved.objVal)
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pytest
+from gurobipy import GRB
+import scenarioSweep
+from synthWorkbook import fProd as FPROD
+
+DEMAND = [[{'scenario': 'demand', 'prod': 'Containerboard', 'perc': p}] for p in [-10, 0, 10, 1000]]
+
+
+@pytest.fixture(scope='module')
+def worker(workbook):
+    scenarioSweep._initWorker(workbook, FPROD, None, 1, None, None)
+    yield scenarioSweep._base
+    scenarioSweep._base = None
+
+
+def singleSolve(spec):
+    model = scenarioSweep._base.copy('single')
+    scenarioSweep.applyScenarios(model, spec)
+    scenarioSweep.solve(model)
+    return model
+
+
+def test_rhsVariantsKeepScenarioStatus(worker, tmp_path, monkeypatch):
+    monkeypatch.setattr(scenarioSweep, '_solveCache', str(tmp_path))
+    rows = [row for row, values in scenarioSweep._solveChunk(range(len(DEMAND)), DEMAND, 'st', False)]
+    assert [r[2] for r in rows] == [GRB.OPTIMAL] * 3 + [GRB.INFEASIBLE]
+    assert all(np.isnan(r[4]) for r in rows)  # one optimize call for the group; no per-scenario count
+    for row, spec in zip(rows[:3], DEMAND):
+        assert row[3] == pytest.approx(singleSolve(spec).objVal, rel=1e-9)
+    assert len(os.listdir(tmp_path)) == len(DEMAND)
+
+
+def test_rhsVariantsDoNotCacheLimits(worker, tmp_path, monkeypatch):
+    monkeypatch.setattr(scenarioSweep, '_solveCache', str(tmp_path))
+    worker.m.Params.TimeLimit = 0
+    try:
+        rows = [row for row, values in scenarioSweep._solveChunk(range(3), DEMAND[:3], 'st', False)]
+    finally:
+        worker.m.Params.TimeLimit = GRB.INFINITY
+    assert [r[2] for r in rows] == [GRB.TIME_LIMIT] * 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_fiberDegRepeatsInOneWorker(worker):
+    spec = [{'scenario': 'fiberDeg', 'custom_fb': 0.05}]
+    first, = scenarioSweep._solveSpec(0, [{'scenario': 'mpYield', 'perc': 10}], 'st', False)
+    second, = scenarioSweep._solveSpec(1, spec, 'st', False)
+    third, = scenarioSweep._solveSpec(2, spec, 'st', False)
+    assert second[0][2] == GRB.OPTIMAL
+    assert second[0][3] == third[0][3]
+    assert [v[1:] for v in second[1]] == [v[1:] for v in third[1]]
+    assert first[0][3] != second[0][3]
+
+
+def test_fiberDegKeepsMPYield(worker):
+    model = scenarioSweep._base.copy('mpFiber')
+    scenarioSweep.applyScenarios(model, [{'scenario': 'mpYield', 'perc': 10},
+                                         {'scenario': 'fiberDeg', 'custom_fb': 0.05}])
+    mixed = [i for i in model.rFiber if 'MIXED' in model.rCat[i]]
+    other = [i for i in model.rFiber if i not in mixed]
+    assert np.allclose(model.rF2PYieldSet.loc[mixed], model.rF2PYield.loc[mixed] * 0.9 * 0.95)
+    assert np.allclose(model.rF2PYieldSet.loc[other], model.rF2PYield.loc[other] * 0.95)
+    assert not hasattr(scenarioSweep._base, 'rF2PYieldSet')
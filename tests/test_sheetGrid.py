@@ -0,0 +1,45 @@
+import io
+import openpyxl
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from sheetGrid import readSheets, cutTable, dedupNames
+from synthWorkbook import put
+
+# (sheet, read_excel keyword arguments) for a selection of impData's tables
+TABLES = [('Fiber', dict(usecols='B:G', skiprows=1, nrows=21)),
+          ('Fiber', dict(usecols='I:O', skiprows=1, nrows=21)),
+          ('Pulp', dict(usecols='Q:W', skiprows=27, nrows=5)),
+          ('Demand', dict(usecols='N:S', skiprows=1, nrows=5)),  # header repeats the one in F:K
+          ('Recovery', dict(usecols=[18, 19, 20, 21], skiprows=31, nrows=16, header=None,
+                            names=['Residential', 'Retail', 'Commercial', 'Industrial'])),
+          ('nonFiber', dict(usecols='A:B,E:J', skiprows=2, nrows=3, index_col=0)),
+          ('OldData', dict(usecols='K:Q', skiprows=29, nrows=3, index_col=0))]
+
+
+@pytest.mark.parametrize('sheet, kwargs', TABLES, ids=[f"{s}-{k['usecols']}" for s, k in TABLES])
+def test_cutTableMatchesReadExcel(workbook, sheet, kwargs):
+    grid = readSheets(workbook, [sheet])[sheet]
+    assert_frame_equal(cutTable(grid, **kwargs), pd.read_excel(workbook, sheet, **kwargs))
+
+
+@pytest.mark.parametrize('kwargs', [dict(usecols='A:F', skiprows=1, nrows=3),
+                                    dict(usecols='C:E', skiprows=1, nrows=3),  # labels depend on the whole row
+                                    dict(usecols='B:H', skiprows=1, nrows=4),  # past the last column & row
+                                    dict(usecols='A:F', skiprows=1, index_col=0)])
+def test_cutTableRepeatedHeader(tmp_path, kwargs):
+    path = str(tmp_path / 'repeat.xlsx')
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'S'
+    put(ws, 2, 'A', ['key', 'a', 'b', 'a', None, 'a.1'],
+        [['x', 1, 2.5, 3, None, 'u'], ['y', 4, None, 6, 7, 'v'], ['z', 7, 8, None, None, None]])
+    wb.save(path)
+    grid = readSheets(path, ['S'])['S']
+    assert_frame_equal(cutTable(grid, **kwargs), pd.read_excel(path, 'S', **kwargs))
+
+
+@pytest.mark.parametrize('header', ['a,a,,a.1,a', 'a.1,a,a,a', ',Unnamed: 0,b,b.1,b', 'x,y,x.1,x,x.2'])
+def test_dedupNamesMatchesPandas(header):
+    names = [h or float('nan') for h in header.split(',')]
+    assert dedupNames(names) == pd.read_csv(io.StringIO(f"{header}\n{','.join('1' * len(names))}")).columns.tolist()
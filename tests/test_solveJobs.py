@@ -0,0 +1,59 @@
+import threading
+import time
+import numpy as np
+import pytest
+from gurobipy import GRB
+from batchRun import applyScenarios
+from createModel import createModel, baseModel
+from solveJobs import solveJob
+from synthWorkbook import fProd as FPROD
+
+
+class listLog:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+    def close(self):
+        pass
+
+
+def wait(job):
+    while not job.finished():
+        time.sleep(0.05)
+    return job
+
+
+def test_copiedOnSubmittingThread(data, monkeypatch):
+    copies = []
+    copy = createModel.copy
+
+    def recordCopy(self, *args, **kwargs):
+        copies.append(threading.current_thread())
+        return copy(self, *args, **kwargs)
+
+    monkeypatch.setattr(createModel, 'copy', recordCopy)
+    job = wait(solveJob(baseModel(data, FPROD).copy('submit'), diagnose=False))
+    assert job.state == 'done' and job.model.solved
+    assert copies[1:] == [threading.current_thread()]  # the first copy is the test's own
+
+
+def test_concurrentJobs(data, solved):
+    models = []
+    for perc in [0, 10, 1000]:
+        model = baseModel(data, FPROD).copy(f'job{perc}')
+        applyScenarios(model, [{'scenario': 'demand', 'prod': 'Containerboard', 'perc': perc}])
+        models.append(model)
+    logs = [listLog() for model in models]
+    jobs = [wait(job) for job in [solveJob(model, diagnose=False, log=log) for model, log in zip(models, logs)]]
+    assert [job.state for job in jobs] == ['done'] * 3, [job.error for job in jobs]
+
+    first = models[0]
+    assert first.solved and first.objVal == pytest.approx(solved.objVal, rel=1e-9)
+    assert first.solution is not None and first.warm is not None
+    assert np.allclose(first.results.f2pVolNew, solved.results.f2pVolNew)
+    assert models[1].solved and models[1].objVal > first.objVal
+    assert models[2].failed and models[2].status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD)
+    assert any('Optimal objective' in line for line in logs[0].lines)